@@ -0,0 +1,171 @@
+"""
+Numeric kernels for the HOS rule checks
+
+Each kernel is a plain loop over parallel columns (times and durations in
+seconds, integer duty status codes). The rule checks return the row indices
+which break a limit, so callers only build Violation objects for the few
+offending entries; tail searches count indices down rather than reversing.
+When Numba is installed the kernels are compiled with @njit; otherwise they
+run as ordinary Python and the app behaves exactly the same.
+"""
+
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMBA_AVAILABLE = False
+    logger.info('Numba is not installed; HOS rule kernels run as plain Python')
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function as plain Python"""
+        def decorator(func):
+            # No wrapper: the fallback loops are called directly, without an extra frame per call
+            return func
+        return decorator
+
+
+# Integer codes for DutyStatus values in the status column
+OFF_DUTY_CODE = 0
+SLEEPER_BERTH_CODE = 1
+DRIVING_CODE = 2
+ON_DUTY_NOT_DRIVING_CODE = 3
+
+# Code for statuses the engine does not know about
+UNKNOWN_STATUS_CODE = -1
+
+
+def as_float_column(values):
+    """Return values in the form the kernels expect (a float64 array under Numba)"""
+    return np.asarray(values, dtype=np.float64) if NUMBA_AVAILABLE else values
+
+
+def as_code_column(values):
+    """Return status codes in the form the kernels expect (an int8 array under Numba)"""
+    return np.asarray(values, dtype=np.int8) if NUMBA_AVAILABLE else values
+
+
+@njit(cache=True)
+def sum_durations(duration_s, status_code, start_s, code_a, code_b, since_s):
+    """Total seconds of closed entries with status code_a or code_b starting at or after since_s"""
+    total = 0.0
+    for i in range(len(duration_s)):
+        code = status_code[i]
+        if (code == code_a or code == code_b) and start_s[i] >= since_s and not math.isnan(duration_s[i]):
+            total += duration_s[i]
+    return total
+
+
+@njit(cache=True)
+def scan_violations(duration_s, status_code, max_driving_s, max_on_duty_s, min_restart_s):
+    """
+    Run the per-entry rule checks in a single pass over the columns
+    
+    Returns the indices of driving entries over max_driving_s, on-duty entries
+    over max_on_duty_s and off-duty entries under min_restart_s, plus the total
+    seconds of closed on-duty entries (the cycle hours).
+    """
+    driving_over = []
+    on_duty_over = []
+    restart_too_short = []
+    on_duty_total = 0.0
+    for i in range(len(duration_s)):
+        code = status_code[i]
+        duration = duration_s[i]
+        if code == DRIVING_CODE or code == ON_DUTY_NOT_DRIVING_CODE:
+            if math.isnan(duration):
+                continue
+            on_duty_total += duration
+            if code == DRIVING_CODE and duration > max_driving_s:
+                driving_over.append(i)
+            if duration > max_on_duty_s:
+                on_duty_over.append(i)
+        elif code == OFF_DUTY_CODE and duration < min_restart_s:
+            restart_too_short.append(i)
+    return driving_over, on_duty_over, restart_too_short, on_duty_total
+
+
+@njit(cache=True)
+def last_off_duty_marks(duration_s, status_code, min_break_s, min_rest_s):
+    """
+    Indices of the last off-duty entry, the last one of at least min_break_s and
+    the last one of at least min_rest_s (-1 when absent), from one backward sweep
+    
+    A qualifying rest is also a break, so the sweep stops at the last rest.
+    """
+    last_off = -1
+    last_break = -1
+    for i in range(len(duration_s) - 1, -1, -1):
+        if status_code[i] != OFF_DUTY_CODE:
+            continue
+        if last_off < 0:
+            last_off = i
+        duration = duration_s[i]
+        if last_break < 0 and duration >= min_break_s:
+            last_break = i
+        if duration >= min_rest_s:
+            return last_off, last_break, i
+    return last_off, last_break, -1
+
+
+@njit(cache=True)
+def hours_since(duration_s, status_code, start_s, first, driving_since_s, on_duty_since_s):
+    """
+    Seconds of closed driving entries starting at or after driving_since_s and of
+    closed on-duty entries starting at or after on_duty_since_s, in one pass
+    
+    Rows before first are skipped; callers pass the first row that can start
+    after both cutoffs.
+    """
+    driving_total = 0.0
+    on_duty_total = 0.0
+    for i in range(first, len(duration_s)):
+        code = status_code[i]
+        duration = duration_s[i]
+        if (code != DRIVING_CODE and code != ON_DUTY_NOT_DRIVING_CODE) or math.isnan(duration):
+            continue
+        if start_s[i] >= on_duty_since_s:
+            on_duty_total += duration
+        if code == DRIVING_CODE and start_s[i] >= driving_since_s:
+            driving_total += duration
+    return driving_total, on_duty_total
+
+
+@njit(cache=True)
+def closed_and_driving_seconds(duration_s, status_code):
+    """Total seconds of all closed entries and of closed driving entries, in one pass"""
+    total = 0.0
+    driving = 0.0
+    for i in range(len(duration_s)):
+        duration = duration_s[i]
+        if math.isnan(duration):
+            continue
+        total += duration
+        if status_code[i] == DRIVING_CODE:
+            driving += duration
+    return total, driving
+
+
+def warm_up():
+    """
+    Compile (or load from the Numba cache) every kernel for the column types used at runtime
+    
+    Called once when the app loads so the first compliance request in a worker
+    does not pay the compile cost. Does nothing when Numba is not installed.
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    duration_s = as_float_column([0.0])
+    start_s = as_float_column([0.0])
+    status_code = as_code_column([OFF_DUTY_CODE])
+    sum_durations(duration_s, status_code, start_s, DRIVING_CODE, ON_DUTY_NOT_DRIVING_CODE, 0.0)
+    scan_violations(duration_s, status_code, 0.0, 0.0, 0.0)
+    last_off_duty_marks(duration_s, status_code, 0.0, 0.0)
+    hours_since(duration_s, status_code, start_s, 0, 0.0, 0.0)
+    closed_and_driving_seconds(duration_s, status_code)
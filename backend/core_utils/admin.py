@@ -1,17 +1,24 @@
 from django.contrib import admin
+from django.db.models import ExpressionWrapper, F, FloatField
 from .models import AuditLog, SystemSettings, Notification, FileUpload
+from .paginators import LargeTablePaginator
 
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     """Audit log admin configuration (read-only)"""
     list_display = ['user', 'action', 'model_name', 'object_id', 'timestamp', 'ip_address']
-    list_filter = ['action', 'model_name', 'timestamp']
-    search_fields = ['user__email', 'user__first_name', 'user__last_name', 'description', 'ip_address']
+    list_filter = ['action', 'model_name', ('timestamp', admin.DateFieldListFilter), ('user', admin.RelatedOnlyFieldListFilter)]
+    search_fields = ['description', 'ip_address']
     raw_id_fields = ['user']
-    date_hierarchy = 'timestamp'
+    list_select_related = ['user']
+    paginator = LargeTablePaginator
+    show_full_result_count = False
     readonly_fields = ['user', 'action', 'model_name', 'object_id', 'description', 'ip_address', 'user_agent', 'timestamp']
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+    
     def has_add_permission(self, request):
         return False
     
@@ -41,10 +48,10 @@ class SystemSettingsAdmin(admin.ModelAdmin):
 class NotificationAdmin(admin.ModelAdmin):
     """Notification admin configuration"""
     list_display = ['user', 'title', 'notification_type', 'is_read', 'priority', 'created_at']
-    list_filter = ['notification_type', 'is_read', 'priority', 'created_at']
-    search_fields = ['user__email', 'user__first_name', 'user__last_name', 'title', 'message']
+    list_filter = ['notification_type', 'is_read', 'priority', ('created_at', admin.DateFieldListFilter), ('user', admin.RelatedOnlyFieldListFilter)]
+    search_fields = ['title', 'message']
     raw_id_fields = ['user']
-    date_hierarchy = 'created_at'
+    list_select_related = ['user']
     
     fieldsets = (
         ('User & Type', {'fields': ('user', 'notification_type', 'priority')}),
@@ -55,16 +62,19 @@ class NotificationAdmin(admin.ModelAdmin):
         ('Timestamps', {'fields': ('created_at',)}),
     )
     readonly_fields = ['created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
 
 
 @admin.register(FileUpload)
 class FileUploadAdmin(admin.ModelAdmin):
     """File upload admin configuration"""
     list_display = ['user', 'original_filename', 'file_type', 'file_size_mb', 'is_public', 'created_at']
-    list_filter = ['file_type', 'is_public', 'created_at']
-    search_fields = ['user__email', 'user__first_name', 'user__last_name', 'original_filename', 'description']
+    list_filter = ['file_type', 'is_public', ('created_at', admin.DateFieldListFilter), ('user', admin.RelatedOnlyFieldListFilter)]
+    search_fields = ['original_filename']
     raw_id_fields = ['user']
-    date_hierarchy = 'created_at'
+    list_select_related = ['user']
     
     fieldsets = (
         ('User & File', {'fields': ('user', 'file_type', 'original_filename', 'file_path')}),
@@ -72,4 +82,14 @@ class FileUploadAdmin(admin.ModelAdmin):
         ('Visibility', {'fields': ('is_public',)}),
         ('Timestamps', {'fields': ('created_at',)}),
     )
-    readonly_fields = ['created_at', 'file_size_mb']
\ No newline at end of file
+    readonly_fields = ['created_at', 'file_size_mb']
+    
+    def get_queryset(self, request):
+        # Compute the MB size in the changelist SELECT rather than per row
+        return super().get_queryset(request).select_related('user').annotate(
+            _size_mb=ExpressionWrapper(F('file_size') / 1048576.0, output_field=FloatField())
+        )
+    
+    @admin.display(description='File size (MB)', ordering='_size_mb')
+    def file_size_mb(self, obj):
+        return f"{obj._size_mb:.2f}"
@@ -1,6 +1,35 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 from django.apps import AppConfig
 
 
+def queue_root_log_handlers():
+    """
+    Move the root logger's handlers behind a QueueHandler served by a listener thread
+    
+    Processes that never load this app keep writing through the handlers directly.
+    """
+    root = logging.getLogger()
+    if not root.handlers or any(isinstance(handler, QueueHandler) for handler in root.handlers):
+        return
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+
+
 class CoreUtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core_utils'
+
+    def ready(self):
+        # Log I/O happens on a listener thread (see LOGGING)
+        queue_root_log_handlers()
+
+        # Compile the HOS rule kernels at startup rather than on the first request
+        from . import _hos_kernels
+        _hos_kernels.warm_up()
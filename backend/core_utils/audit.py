@@ -0,0 +1,61 @@
+"""
+Request-scoped buffering for audit log writes
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import List, Optional
+
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_current_buffer: ContextVar[Optional["AuditLogBuffer"]] = ContextVar("audit_log_buffer", default=None)
+
+
+class AuditLogBuffer:
+    """
+    Collects AuditLog rows during a request and writes them with a single
+    bulk_create when flushed by AuditLogBufferMiddleware
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self):
+        self._entries: List[AuditLog] = []
+
+    def add(self, **kwargs) -> None:
+        self._entries.append(AuditLog(**kwargs))
+
+    def flush(self) -> None:
+        if not self._entries:
+            return
+        entries, self._entries = self._entries, []
+        AuditLog.objects.bulk_create(entries, batch_size=self.BATCH_SIZE, ignore_conflicts=True)
+
+    def activate(self):
+        """Make this the buffer returned by get_audit_log_buffer(); returns a reset token"""
+        return _current_buffer.set(self)
+
+    @staticmethod
+    def deactivate(token) -> None:
+        _current_buffer.reset(token)
+
+
+class _ImmediateAuditLog:
+    """Fallback used outside a request (tasks, shell): writes each entry straight away"""
+
+    def add(self, **kwargs) -> None:
+        AuditLog.objects.create(**kwargs)
+
+    def flush(self) -> None:
+        pass
+
+
+_immediate_audit_log = _ImmediateAuditLog()
+
+
+def get_audit_log_buffer():
+    """Return the active request's audit buffer, or an unbuffered writer"""
+    buffer = _current_buffer.get()
+    return buffer if buffer is not None else _immediate_audit_log
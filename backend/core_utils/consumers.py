@@ -2,161 +2,226 @@
 WebSocket consumers for real-time features
 """
 
-import json
 import logging
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+import orjson
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Close codes sent when a handshake is rejected before accept()
+WS_CLOSE_UNAUTHORIZED = 4401
+WS_CLOSE_FORBIDDEN = 4403
+
+# Envelopes that are identical for every client are encoded once at import
+INVALID_JSON_MESSAGE = orjson.dumps({
+    'type': 'error',
+    'data': {'message': 'Invalid JSON format'}
+}).decode()
+
+
+def _scope_user_id(scope):
+    """
+    Resolve the authenticated user id for a WebSocket handshake.
+
+    Uses the session user populated by AuthMiddlewareStack, falling back to a
+    JWT access token passed as ``?token=``. Token verification is signature
+    and expiry only, so no database query is made. Returns None when the
+    socket is unauthenticated.
+    """
+    user = scope.get('user')
+    if user is not None and user.is_authenticated:
+        return user.id
+    
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+    if not token:
+        return None
+    try:
+        return int(AccessToken(token[0])[jwt_settings.USER_ID_CLAIM])
+    except (TokenError, KeyError, TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _notification_connected_message(user_id, room):
+    """Encoded connection_established envelope for a notification room"""
+    return orjson.dumps({
+        'type': 'connection_established',
+        'data': {
+            'user_id': user_id,
+            'room': room,
+            'message': 'WebSocket connected successfully'
+        }
+    }).decode()
+
+
+@lru_cache(maxsize=1024)
+def _trip_connected_message(trip_id, room):
+    """Encoded connection_established envelope for a trip room"""
+    return orjson.dumps({
+        'type': 'connection_established',
+        'data': {
+            'trip_id': trip_id,
+            'room': room,
+            'message': 'Trip WebSocket connected successfully'
+        }
+    }).decode()
+
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     """
     Consumer for real-time notifications
     """
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.room_group_name = None
+        self.user_id = None
+    
     async def connect(self):
+        self._layer = self.channel_layer
+        self._handlers = {
+            'ping': self._on_ping,
+            'subscribe': self._on_subscribe,
+            'unsubscribe': self._on_unsubscribe,
+        }
+        
         # Get user from URL parameters or scope
         user_id = self.scope.get('url_route', {}).get('kwargs', {}).get('user_id')
         self.user = self.scope.get("user")
         
-        logger.info(f"WebSocket connection attempt - user_id: {user_id}, user: {self.user}")
-        print(f"WebSocket connection attempt - user_id: {user_id}, user: {self.user}")
+        logger.info("WebSocket connection attempt - user_id: %s, user: %s", user_id, self.user)
         
-        # Accept connection first, then set up room
-        await self.accept()
-        
-        # Determine user ID
-        if user_id:
-            self.user_id = int(user_id)
-        elif self.user and self.user.is_authenticated:
-            self.user_id = self.user.id
+        # Authenticate before accepting so rejected sockets never reach the
+        # channel layer
+        auth_user_id = _scope_user_id(self.scope)
+        if auth_user_id is not None:
+            if user_id and int(user_id) != auth_user_id:
+                await self.close(code=WS_CLOSE_FORBIDDEN)
+                return
+            self.user_id = auth_user_id
+        elif settings.DEBUG:
+            # For development, fall back to the URL user or user 1
+            self.user_id = int(user_id) if user_id else 1
         else:
-            # For development, default to user 1
-            self.user_id = 1
+            await self.close(code=WS_CLOSE_UNAUTHORIZED)
+            return
             
         self.room_group_name = f"notifications_{self.user_id}"
+        await self.accept()
         
         # Join room group
         try:
-            await self.channel_layer.group_add(
+            await self._layer.group_add(
                 self.room_group_name,
                 self.channel_name
             )
-            logger.info(f"User {self.user_id} joined room: {self.room_group_name}")
-            print(f"User {self.user_id} joined room: {self.room_group_name}")
+            logger.info("User %s joined room: %s", self.user_id, self.room_group_name)
             
             # Send connection confirmation
-            await self.send(text_data=json.dumps({
-                'type': 'connection_established',
-                'data': {
-                    'user_id': self.user_id,
-                    'room': self.room_group_name,
-                    'message': 'WebSocket connected successfully'
-                }
-            }))
+            await self.send(text_data=_notification_connected_message(
+                self.user_id, self.room_group_name
+            ))
         except Exception as e:
             logger.error(f"Error joining room: {e}")
-            print(f"Error joining room: {e}")
     
     async def disconnect(self, close_code):
-        logger.info(f"WebSocket disconnected with code: {close_code}")
-        print(f"WebSocket disconnected with code: {close_code}")
+        logger.info("WebSocket disconnected with code: %s", close_code)
         
-        if hasattr(self, 'room_group_name'):
+        if self.room_group_name is not None:
             try:
                 # Leave room group
-                await self.channel_layer.group_discard(
+                await self._layer.group_discard(
                     self.room_group_name,
                     self.channel_name
                 )
-                logger.info(f"User left room: {self.room_group_name}")
+                logger.info("User left room: %s", self.room_group_name)
             except Exception as e:
                 logger.error(f"Error leaving room: {e}")
     
     # Receive message from WebSocket
     async def receive(self, text_data):
         try:
-            text_data_json = json.loads(text_data)
-            logger.info(f"Received message: {text_data_json}")
-            print(f"Received message: {text_data_json}")
-            
-            # Handle different message types
-            if 'type' in text_data_json:
-                message_type = text_data_json['type']
-                
-                # Handle ping/pong messages
-                if message_type == 'ping':
-                    await self.send(text_data=json.dumps({
-                        'type': 'pong', 
-                        'data': {
-                            'timestamp': text_data_json.get('data', {}).get('timestamp')
-                        }
-                    }))
-                    return
-                
-                # Handle subscription messages
-                elif message_type == 'subscribe':
-                    channel = text_data_json.get('data', {}).get('channel')
-                    if channel:
-                        # Add to additional channel groups if needed
-                        await self.channel_layer.group_add(
-                            f"{self.room_group_name}_{channel}",
-                            self.channel_name
-                        )
-                        await self.send(text_data=json.dumps({
-                            'type': 'subscribed',
-                            'data': {'channel': channel}
-                        }))
-                    return
-                
-                # Handle unsubscribe messages
-                elif message_type == 'unsubscribe':
-                    channel = text_data_json.get('data', {}).get('channel')
-                    if channel:
-                        await self.channel_layer.group_discard(
-                            f"{self.room_group_name}_{channel}",
-                            self.channel_name
-                        )
-                        await self.send(text_data=json.dumps({
-                            'type': 'unsubscribed',
-                            'data': {'channel': channel}
-                        }))
-                    return
+            text_data_json = orjson.loads(text_data)
+            logger.debug("Received message: %s", text_data_json)
             
-            # For other messages, broadcast to room group
-            if hasattr(self, 'room_group_name'):
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        'type': 'notification_message',
-                        'message': text_data_json
-                    }
-                )
+            # Dispatch on message type; anything unrecognised is broadcast
+            handler = self._handlers.get(text_data_json.get('type'), self._on_broadcast)
+            await handler(text_data_json)
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON received: {e}")
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'data': {'message': 'Invalid JSON format'}
-            }))
+            await self.send(text_data=INVALID_JSON_MESSAGE)
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send(text_data=orjson.dumps({
                 'type': 'error',
                 'data': {'message': str(e)}
-            }))
+            }).decode())
+    
+    async def _on_ping(self, text_data_json):
+        data = text_data_json.get('data') or {}
+        await self.send(text_data=orjson.dumps({
+            'type': 'pong', 
+            'data': {
+                'timestamp': data.get('timestamp')
+            }
+        }).decode())
+    
+    async def _on_subscribe(self, text_data_json):
+        data = text_data_json.get('data') or {}
+        channel = data.get('channel')
+        if channel:
+            # Add to additional channel groups if needed
+            await self._layer.group_add(
+                f"{self.room_group_name}_{channel}",
+                self.channel_name
+            )
+            await self.send(text_data=orjson.dumps({
+                'type': 'subscribed',
+                'data': {'channel': channel}
+            }).decode())
+    
+    async def _on_unsubscribe(self, text_data_json):
+        data = text_data_json.get('data') or {}
+        channel = data.get('channel')
+        if channel:
+            await self._layer.group_discard(
+                f"{self.room_group_name}_{channel}",
+                self.channel_name
+            )
+            await self.send(text_data=orjson.dumps({
+                'type': 'unsubscribed',
+                'data': {'channel': channel}
+            }).decode())
+    
+    async def _on_broadcast(self, text_data_json):
+        # For other messages, broadcast to room group
+        if self.room_group_name is not None:
+            await self._layer.group_send(
+                self.room_group_name,
+                {
+                    'type': 'notification_message',
+                    # Serialized once here rather than once per subscriber
+                    'payload': orjson.dumps({
+                        'type': 'notification',
+                        'data': text_data_json
+                    }).decode()
+                }
+            )
     
     # Receive message from room group
     async def notification_message(self, event):
-        message = event['message']
-        
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
-            'data': message
-        }))
+        # Send pre-serialized message to WebSocket
+        await self.send(text_data=event['payload'])
 
 
 class TripUpdateConsumer(AsyncWebsocketConsumer):
@@ -164,91 +229,93 @@ class TripUpdateConsumer(AsyncWebsocketConsumer):
     Consumer for real-time trip updates
     """
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trip_group_name = None
+        self.trip_id = None
+    
     async def connect(self):
+        self._layer = self.channel_layer
         self.trip_id = self.scope['url_route']['kwargs']['trip_id']
-        self.trip_group_name = f'trip_{self.trip_id}'
         
-        logger.info(f"Trip WebSocket connection for trip {self.trip_id}")
-        print(f"Trip WebSocket connection for trip {self.trip_id}")
+        logger.info("Trip WebSocket connection for trip %s", self.trip_id)
         
-        # Accept connection
+        # Authenticate before accepting so rejected sockets never reach the
+        # channel layer
+        if _scope_user_id(self.scope) is None and not settings.DEBUG:
+            await self.close(code=WS_CLOSE_UNAUTHORIZED)
+            return
+        
+        self.trip_group_name = f'trip_{self.trip_id}'
         await self.accept()
         
         # Join room group
         try:
-            await self.channel_layer.group_add(
+            await self._layer.group_add(
                 self.trip_group_name,
                 self.channel_name
             )
             
             # Send connection confirmation
-            await self.send(text_data=json.dumps({
-                'type': 'connection_established',
-                'data': {
-                    'trip_id': self.trip_id,
-                    'room': self.trip_group_name,
-                    'message': 'Trip WebSocket connected successfully'
-                }
-            }))
+            await self.send(text_data=_trip_connected_message(
+                self.trip_id, self.trip_group_name
+            ))
         except Exception as e:
             logger.error(f"Error joining trip room: {e}")
     
     async def disconnect(self, close_code):
-        logger.info(f"Trip WebSocket disconnected with code: {close_code}")
+        logger.info("Trip WebSocket disconnected with code: %s", close_code)
         
         # Leave room group
-        try:
-            await self.channel_layer.group_discard(
-                self.trip_group_name,
-                self.channel_name
-            )
-        except Exception as e:
-            logger.error(f"Error leaving trip room: {e}")
+        if self.trip_group_name is not None:
+            try:
+                await self._layer.group_discard(
+                    self.trip_group_name,
+                    self.channel_name
+                )
+            except Exception as e:
+                logger.error(f"Error leaving trip room: {e}")
     
     # Receive message from WebSocket
     async def receive(self, text_data):
         try:
-            text_data_json = json.loads(text_data)
-            logger.info(f"Trip message received: {text_data_json}")
+            text_data_json = orjson.loads(text_data)
+            logger.debug("Trip message received: %s", text_data_json)
             
             # Handle ping/pong messages
             if text_data_json.get('type') == 'ping':
-                await self.send(text_data=json.dumps({
+                await self.send(text_data=orjson.dumps({
                     'type': 'pong', 
                     'data': {
                         'timestamp': text_data_json.get('data', {}).get('timestamp')
                     }
-                }))
+                }).decode())
                 return
             
             # Broadcast to trip room
-            await self.channel_layer.group_send(
+            await self._layer.group_send(
                 self.trip_group_name,
                 {
                     'type': 'trip_update',
-                    'message': text_data_json
+                    # Serialized once here rather than once per subscriber
+                    'payload': orjson.dumps({
+                        'type': 'trip_update',
+                        'data': text_data_json
+                    }).decode()
                 }
             )
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Invalid JSON in trip message: {e}")
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'data': {'message': 'Invalid JSON format'}
-            }))
+            await self.send(text_data=INVALID_JSON_MESSAGE)
         except Exception as e:
             logger.error(f"Error processing trip message: {e}")
-            await self.send(text_data=json.dumps({
+            await self.send(text_data=orjson.dumps({
                 'type': 'error',
                 'data': {'message': str(e)}
-            }))
+            }).decode())
     
     # Receive message from room group
     async def trip_update(self, event):
-        message = event['message']
-        
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'trip_update',
-            'data': message
-        }))
\ No newline at end of file
+        # Send pre-serialized message to WebSocket
+        await self.send(text_data=event['payload'])
\ No newline at end of file
@@ -4,51 +4,183 @@ Provides secure file storage, permissions, preview, and cleanup functionality
 """
 
 import os
+import re
 import uuid
 import hashlib
-from typing import Dict, Any, List, Optional
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import timedelta
+from django.core.files import File
 from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import UploadedFile
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
 from django.core.exceptions import ValidationError, PermissionDenied
-from django.http import Http404, FileResponse, HttpResponse
+from django.http import Http404, FileResponse, HttpRequest, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
 import logging
 
-from .models import FileUpload, AuditLog
+from .audit import AuditLogBuffer, get_audit_log_buffer
+from .models import FileUpload
 from django.contrib.auth.models import User
 
 logger = logging.getLogger(__name__)
 
+# MIME types that browsers can render inline
+_PREVIEWABLE_MIME_TYPES = frozenset(
+    {
+        "image/jpeg",
+        "image/png",
+        "image/gif",
+        "image/webp",
+        "image/svg+xml",
+        "application/pdf",
+        "text/plain",
+        "text/csv",
+    }
+)
+
+# Columns read by list_user_files; each row dict is extended in place into the response
+_FILE_LIST_FIELDS = (
+    "id",
+    "original_filename",
+    "file_type",
+    "file_size",
+    "size_mb",
+    "mime_type",
+    "description",
+    "is_public",
+    "created_at",
+)
+
+# Columns needed to serve (download/preview) and to delete a single file
+_FILE_SERVE_FIELDS = ("file_path", "mime_type", "original_filename", "user", "is_public")
+_FILE_DELETE_FIELDS = ("file_path", "original_filename", "user", "is_public")
+
+# Single "bytes=start-end" range; multi-range requests are answered with the whole file
+_RANGE_HEADER_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Read size used when streaming a byte range
+_RANGE_BLOCK_SIZE = 64 * 1024
+
+
+def _parse_byte_range(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) pair
+
+    Returns None when the header is absent or not a single byte range, in which
+    case the whole file is served. A start at or past file_size means the range
+    is unsatisfiable.
+    """
+    match = _RANGE_HEADER_RE.match(range_header.strip()) if range_header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0:
+            return file_size, file_size
+        return max(file_size - suffix, 0), file_size - 1
+    start = int(first)
+    end = min(int(last), file_size - 1) if last else file_size - 1
+    if last and int(last) < start:
+        return None
+    return start, end
+
+
+def _iter_byte_range(file_content, length: int):
+    """Yield ``length`` bytes from the current position of file_content, then close it"""
+    try:
+        while length > 0:
+            data = file_content.read(min(_RANGE_BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        file_content.close()
+
+
+def _is_s3_storage() -> bool:
+    """Whether default_storage is an S3-style backend (django-storages exposes ``bucket``)"""
+    return hasattr(default_storage, "bucket")
+
+
+class HashingFile(File):
+    """
+    File wrapper that feeds every byte read through it into a SHA-256 hasher,
+    so an upload can be hashed while it is being written to storage.
+
+    ``temporary_file_path`` is deliberately not proxied: storages would
+    otherwise move the temporary file into place without reading it.
+    """
+
+    def __init__(self, uploaded_file: UploadedFile):
+        super().__init__(uploaded_file, name=uploaded_file.name)
+        self.content_type = getattr(uploaded_file, "content_type", None)
+        self._hasher = hashlib.sha256()
+        # Bytes fed to the hasher, i.e. the position of a sequential reader
+        self._hashed = 0
+
+    def read(self, *args, **kwargs) -> bytes:
+        data = self.file.read(*args, **kwargs)
+        if self._hasher is not None:
+            self._hasher.update(data)
+            self._hashed += len(data)
+        return data
+
+    def seek(self, offset: int, *args) -> int:
+        position = self.file.seek(offset, *args)
+        if position == 0:
+            # Re-reading from the start must not hash the same bytes twice
+            self._hasher = hashlib.sha256()
+            self._hashed = 0
+        elif position != self._hashed:
+            # Reads from here would skip or repeat bytes, so the hash is lost
+            # until the file is read again from the start
+            self._hasher = None
+        return position
+
+    def hexdigest(self) -> Optional[str]:
+        """SHA-256 of the bytes read, or None if a seek broke the sequential read"""
+        return self._hasher.hexdigest() if self._hasher is not None else None
+
 
 class FileManager:
     """
     Comprehensive file management service with security and permissions
     """
 
-    # Allowed file types and their MIME types
+    # Allowed file types and their MIME types (frozensets for hashed lookups)
     ALLOWED_FILE_TYPES = {
-        "image": ["image/jpeg", "image/png", "image/gif", "image/webp", "image/svg+xml"],
-        "document": [
-            "application/pdf",
-            "application/msword",
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/vnd.ms-excel",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "application/vnd.ms-powerpoint",
-            "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            "text/plain",
-            "text/csv",
-            "application/rtf",
-        ],
-        "log_export": [
-            "application/pdf",
-            "text/csv",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        ],
-        "archive": ["application/zip", "application/x-rar-compressed", "application/x-7z-compressed"],
-        "other": [],  # Empty means all types allowed
+        "image": frozenset({"image/jpeg", "image/png", "image/gif", "image/webp", "image/svg+xml"}),
+        "document": frozenset(
+            {
+                "application/pdf",
+                "application/msword",
+                "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                "application/vnd.ms-excel",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                "application/vnd.ms-powerpoint",
+                "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+                "text/plain",
+                "text/csv",
+                "application/rtf",
+            }
+        ),
+        "log_export": frozenset(
+            {
+                "application/pdf",
+                "text/csv",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            }
+        ),
+        "archive": frozenset({"application/zip", "application/x-rar-compressed", "application/x-7z-compressed"}),
+        "other": frozenset(),  # Empty means all types allowed
     }
 
     # Maximum file sizes (in bytes)
@@ -60,8 +192,29 @@ class FileManager:
         "other": 25 * 1024 * 1024,  # 25MB
     }
 
-    def __init__(self, user: User):
+    # Lifetime in seconds of signed S3 download URLs
+    PRESIGNED_URL_EXPIRY = 300
+
+    # Bulk storage deletion tuning for cleanup_old_files
+    STORAGE_DELETE_BATCH_SIZE = 1000  # S3 delete_objects limit
+    STORAGE_DELETE_WORKERS = 32
+
+    # Large uploads to S3-style storage go up as parallel multipart parts
+    MULTIPART_THRESHOLD = 8 * 1024 * 1024  # 8MB
+    MULTIPART_PART_SIZE = 16 * 1024 * 1024  # 16MB
+    MULTIPART_WORKERS = 8
+
+    def __init__(self, user: User, request: Optional[HttpRequest] = None):
         self.user = user
+        self.request = request
+        self._audit = getattr(request, "audit_log", None) or get_audit_log_buffer()
+        # Resolved once so every audit entry from this manager reuses it
+        self._client_ip = self._parse_client_ip(request)
+        # Permission decisions keyed by (user id, file id) for this manager's lifetime
+        self._perm_cache: Dict[Tuple[int, int], bool] = {}
+        # Upload directory prefixes share one timestamp for the manager's lifetime
+        self._now = timezone.now()
+        self._path_prefix_cache: Dict[str, str] = {}
 
     def upload_file(
         self, uploaded_file: UploadedFile, file_type: str, description: str = "", is_public: bool = False
@@ -85,17 +238,30 @@ class FileManager:
             # Validate file size
             self._validate_file_size(uploaded_file, file_type)
 
+            file_size = uploaded_file.size
+
             # Generate secure filename
             secure_filename = self._generate_secure_filename(uploaded_file.name)
 
             # Create file path
             file_path = self._create_file_path(file_type, secure_filename)
 
-            # Calculate file hash for integrity
-            file_hash = self._calculate_file_hash(uploaded_file)
-
-            # Save file to storage
-            saved_path = default_storage.save(file_path, uploaded_file)
+            # Save file to storage, hashing it for integrity on the way out
+            if file_size > self.MULTIPART_THRESHOLD and _is_s3_storage():
+                saved_path, file_hash = self._upload_multipart(uploaded_file, file_path)
+            elif hasattr(uploaded_file, "temporary_file_path"):
+                # Already on disk: hash it with file_digest, then let storage move it into place
+                with open(uploaded_file.temporary_file_path(), "rb") as temp_file:
+                    file_hash = hashlib.file_digest(temp_file, "sha256").hexdigest()
+                saved_path = default_storage.save(file_path, uploaded_file)
+            else:
+                hashing_file = HashingFile(uploaded_file)
+                saved_path = default_storage.save(file_path, hashing_file)
+                file_hash = hashing_file.hexdigest()
+                if file_hash is None:
+                    # Storage did not read the file straight through, so hash it separately
+                    uploaded_file.seek(0)
+                    file_hash = hashlib.file_digest(uploaded_file.file, "sha256").hexdigest()
 
             # Create database record
             with transaction.atomic():
@@ -104,14 +270,14 @@ class FileManager:
                     file_type=file_type,
                     original_filename=uploaded_file.name,
                     file_path=saved_path,
-                    file_size=uploaded_file.size,
+                    file_size=file_size,
                     mime_type=uploaded_file.content_type,
                     description=description,
                     is_public=is_public,
                 )
 
                 # Create audit log
-                AuditLog.objects.create(
+                self._audit.add(
                     user=self.user,
                     action="create",
                     model_name="FileUpload",
@@ -124,8 +290,8 @@ class FileManager:
                 "success": True,
                 "file_id": file_upload.id,
                 "filename": uploaded_file.name,
-                "file_size": uploaded_file.size,
-                "file_size_mb": round(uploaded_file.size / (1024 * 1024), 2),
+                "file_size": file_size,
+                "file_size_mb": round(file_size / 1048576, 2),
                 "mime_type": uploaded_file.content_type,
                 "file_path": saved_path,
                 "file_hash": file_hash,
@@ -151,7 +317,7 @@ class FileManager:
             Dictionary with file information
         """
         try:
-            file_upload = FileUpload.objects.get(id=file_id)
+            file_upload = self._get_file_upload(file_id)
 
             # Check permissions
             if not self._check_file_permission(file_upload, user):
@@ -172,7 +338,7 @@ class FileManager:
                 "description": file_upload.description,
                 "is_public": file_upload.is_public,
                 "created_at": file_upload.created_at.isoformat(),
-                "file_url": self._get_file_url(file_upload),
+                "file_url": self._get_file_url(file_upload.id),
             }
 
         except FileUpload.DoesNotExist:
@@ -195,34 +361,46 @@ class FileManager:
             HttpResponse with file content
         """
         try:
-            file_upload = FileUpload.objects.get(id=file_id)
+            file_upload = self._get_file_upload(file_id, _FILE_SERVE_FIELDS)
 
             # Check permissions
             if not self._check_file_permission(file_upload, user):
                 raise PermissionDenied("You don't have permission to download this file")
 
-            # Check if file exists
-            if not default_storage.exists(file_upload.file_path):
-                raise Http404("File not found")
-
-            # Get file content
-            file_content = default_storage.open(file_upload.file_path, "rb")
+            content_disposition = f'attachment; filename="{file_upload.original_filename}"'
 
-            # Create response
-            response = FileResponse(
-                file_content,
-                content_type=file_upload.mime_type,
-                as_attachment=True,
-                filename=file_upload.original_filename,
-            )
+            if _is_s3_storage():
+                # Let the client fetch the object straight from S3 with a short-lived
+                # signed URL instead of proxying every byte through this worker
+                url = default_storage.url(
+                    file_upload.file_path,
+                    parameters={"ResponseContentDisposition": content_disposition},
+                    expire=self.PRESIGNED_URL_EXPIRY,
+                )
+                response = HttpResponseRedirect(url)
+                response["Cache-Control"] = "private, max-age=0"
+            else:
+                # Get file content; open() raises for a missing file, so no exists() probe
+                try:
+                    file_content = default_storage.open(file_upload.file_path, "rb")
+                except OSError:
+                    raise Http404("File not found")
+
+                # Create response
+                response = FileResponse(
+                    file_content,
+                    content_type=file_upload.mime_type,
+                    as_attachment=True,
+                    filename=file_upload.original_filename,
+                )
 
-            # Set security headers
-            response["Content-Disposition"] = f'attachment; filename="{file_upload.original_filename}"'
-            response["X-Content-Type-Options"] = "nosniff"
-            response["X-Frame-Options"] = "DENY"
+                # Set security headers
+                response["Content-Disposition"] = content_disposition
+                response["X-Content-Type-Options"] = "nosniff"
+                response["X-Frame-Options"] = "DENY"
 
             # Create audit log
-            AuditLog.objects.create(
+            self._audit.add(
                 user=user or self.user,
                 action="download",
                 model_name="FileUpload",
@@ -253,30 +431,71 @@ class FileManager:
             HttpResponse with file content for preview
         """
         try:
-            file_upload = FileUpload.objects.get(id=file_id)
+            file_upload = self._get_file_upload(file_id, _FILE_SERVE_FIELDS)
 
             # Check permissions
             if not self._check_file_permission(file_upload, user):
                 raise PermissionDenied("You don't have permission to preview this file")
 
-            # Check if file exists
-            if not default_storage.exists(file_upload.file_path):
-                raise Http404("File not found")
-
             # Check if file type supports preview
             if not self._supports_preview(file_upload.mime_type):
                 raise ValidationError("File type does not support preview")
 
-            # Get file content
-            file_content = default_storage.open(file_upload.file_path, "rb")
+            content_disposition = f'inline; filename="{file_upload.original_filename}"'
+
+            if _is_s3_storage():
+                # S3 answers Range requests itself, so hand the viewer a signed URL
+                url = default_storage.url(
+                    file_upload.file_path,
+                    parameters={
+                        "ResponseContentDisposition": content_disposition,
+                        "ResponseContentType": file_upload.mime_type,
+                    },
+                    expire=self.PRESIGNED_URL_EXPIRY,
+                )
+                response = HttpResponseRedirect(url)
+                response["Cache-Control"] = "private, max-age=0"
+                return response
+
+            # Get file content; open() raises for a missing file, so no exists() probe
+            try:
+                file_content = default_storage.open(file_upload.file_path, "rb")
+            except OSError:
+                raise Http404("File not found")
+
+            range_header = self.request.META.get("HTTP_RANGE") if self.request is not None else None
+            byte_range = _parse_byte_range(range_header, file_content.size) if range_header else None
 
-            # Create response for preview
-            response = HttpResponse(file_content.read(), content_type=file_upload.mime_type)
+            if byte_range is None:
+                # Stream the file for preview instead of reading it into memory
+                response = FileResponse(
+                    file_content,
+                    content_type=file_upload.mime_type,
+                    as_attachment=False,
+                    filename=file_upload.original_filename,
+                )
+            elif byte_range[0] >= file_content.size:
+                file_size = file_content.size
+                file_content.close()
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{file_size}"
+            else:
+                # Serve only the requested bytes so viewers can page through large PDFs
+                start, end = byte_range
+                length = end - start + 1
+                file_size = file_content.size
+                file_content.seek(start)
+                response = StreamingHttpResponse(
+                    _iter_byte_range(file_content, length), status=206, content_type=file_upload.mime_type
+                )
+                response["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+                response["Content-Length"] = str(length)
 
             # Set security headers
+            response["Accept-Ranges"] = "bytes"
             response["X-Content-Type-Options"] = "nosniff"
             response["X-Frame-Options"] = "SAMEORIGIN"
-            response["Content-Disposition"] = f'inline; filename="{file_upload.original_filename}"'
+            response["Content-Disposition"] = content_disposition
 
             return response
 
@@ -302,19 +521,21 @@ class FileManager:
             Dictionary with deletion results
         """
         try:
-            file_upload = FileUpload.objects.get(id=file_id)
+            file_upload = self._get_file_upload(file_id, _FILE_DELETE_FIELDS)
 
             # Check permissions
             if not self._check_file_permission(file_upload, user):
                 raise PermissionDenied("You don't have permission to delete this file")
 
             with transaction.atomic():
-                # Delete file from storage
-                if default_storage.exists(file_upload.file_path):
+                # Delete file from storage; a file that is already gone is fine
+                try:
                     default_storage.delete(file_upload.file_path)
+                except FileNotFoundError:
+                    pass
 
                 # Create audit log before deletion
-                AuditLog.objects.create(
+                self._audit.add(
                     user=user or self.user,
                     action="delete",
                     model_name="FileUpload",
@@ -364,25 +585,21 @@ class FileManager:
             if is_public is not None:
                 queryset = queryset.filter(is_public=is_public)
 
-            files = []
-            for file_upload in queryset.order_by("-created_at"):
-                files.append(
-                    {
-                        "id": file_upload.id,
-                        "original_filename": file_upload.original_filename,
-                        "file_type": file_upload.file_type,
-                        "file_size": file_upload.file_size,
-                        "file_size_mb": file_upload.file_size_mb,
-                        "mime_type": file_upload.mime_type,
-                        "description": file_upload.description,
-                        "is_public": file_upload.is_public,
-                        "created_at": file_upload.created_at.isoformat(),
-                        "file_url": self._get_file_url(file_upload),
-                        "supports_preview": self._supports_preview(file_upload.mime_type),
-                    }
-                )
+            # Read plain rows rather than materializing FileUpload instances
+            rows = list(
+                queryset.order_by("-created_at")
+                .annotate(size_mb=Cast(F("file_size"), FloatField()) / 1048576.0)
+                .values(*_FILE_LIST_FIELDS)
+            )
 
-            return files
+            # Reuse each row dict for the response instead of building a new one
+            for row in rows:
+                row["file_size_mb"] = round(row.pop("size_mb"), 2)
+                row["created_at"] = row["created_at"].isoformat()
+                row["file_url"] = self._get_file_url(row["id"])
+                row["supports_preview"] = self._supports_preview(row["mime_type"])
+
+            return rows
 
         except Exception as e:
             logger.error(f"Error listing files for user {target_user.id}: {str(e)}")
@@ -400,24 +617,39 @@ class FileManager:
         """
         try:
             cutoff_date = timezone.now() - timedelta(days=days_old)
-            old_files = FileUpload.objects.filter(created_at__lt=cutoff_date)
+            old_files = list(
+                FileUpload.objects.filter(created_at__lt=cutoff_date).values_list(
+                    "id", "file_path", "file_size", "original_filename"
+                )
+            )
+            ids = [file_id for file_id, _, _, _ in old_files]
+            paths = [file_path for _, file_path, _, _ in old_files]
 
-            deleted_count = 0
-            total_size_freed = 0
+            # Remove the records in one statement before touching storage, so a
+            # storage failure can only leave orphaned files, never dangling rows
+            with transaction.atomic():
+                FileUpload.objects.filter(id__in=ids).delete()
 
-            for file_upload in old_files:
-                try:
-                    # Delete from storage
-                    if default_storage.exists(file_upload.file_path):
-                        default_storage.delete(file_upload.file_path)
-                        total_size_freed += file_upload.file_size
+            deleted = self._bulk_delete_from_storage(paths)
 
-                    # Delete database record
-                    file_upload.delete()
-                    deleted_count += 1
+            # Record every deletion in a single bulk insert
+            audit_log = AuditLogBuffer()
+            for file_id, _, _, original_filename in old_files:
+                audit_log.add(
+                    user=self.user,
+                    action="delete",
+                    model_name="FileUpload",
+                    object_id=str(file_id),
+                    description=f"Cleaned up file: {original_filename}",
+                    ip_address=self._get_client_ip(),
+                )
+            audit_log.flush()
 
-                except Exception as e:
-                    logger.error(f"Error cleaning up file {file_upload.id}: {str(e)}")
+            deleted_count = len(ids)
+            # Only count storage that was actually released
+            total_size_freed = sum(
+                file_size for (_, _, file_size, _), was_deleted in zip(old_files, deleted) if was_deleted
+            )
 
             return {
                 "success": True,
@@ -430,6 +662,111 @@ class FileManager:
             logger.error(f"Error during file cleanup: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    def _upload_multipart(self, uploaded_file: UploadedFile, file_path: str) -> Tuple[str, str]:
+        """
+        Upload a large file to S3-style storage as a multipart upload
+
+        Parts of MULTIPART_PART_SIZE bytes are sent by up to MULTIPART_WORKERS
+        threads, with at most that many parts held in memory at once. Each part
+        is fed into the SHA-256 hasher before it is handed off, so the file is
+        hashed in the same single pass.
+
+        Returns:
+            Tuple of (saved storage name, SHA-256 hex digest)
+        """
+        name = default_storage.get_available_name(file_path)
+        # Apply the storage's location prefix the same way S3Storage._save does
+        normalize = getattr(default_storage, "_normalize_name", None)
+        key = normalize(name) if normalize else name
+        bucket = default_storage.bucket
+        client = bucket.meta.client
+
+        upload_id = client.create_multipart_upload(
+            Bucket=bucket.name, Key=key, ContentType=uploaded_file.content_type or "application/octet-stream"
+        )["UploadId"]
+        hasher = hashlib.sha256()
+        try:
+            futures = {}
+            with ThreadPoolExecutor(max_workers=self.MULTIPART_WORKERS) as executor:
+                pending = set()
+                # Read fixed-size parts directly: in-memory uploads ignore chunks(chunk_size)
+                uploaded_file.seek(0)
+                part_reader = iter(lambda: uploaded_file.read(self.MULTIPART_PART_SIZE), b"")
+                for part_number, data in enumerate(part_reader, start=1):
+                    hasher.update(data)
+                    if len(pending) >= self.MULTIPART_WORKERS:
+                        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    future = executor.submit(
+                        client.upload_part,
+                        Bucket=bucket.name,
+                        Key=key,
+                        UploadId=upload_id,
+                        PartNumber=part_number,
+                        Body=data,
+                    )
+                    futures[part_number] = future
+                    pending.add(future)
+
+            parts = [
+                {"ETag": future.result()["ETag"], "PartNumber": part_number}
+                for part_number, future in sorted(futures.items())
+            ]
+            client.complete_multipart_upload(
+                Bucket=bucket.name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+            )
+        except Exception:
+            client.abort_multipart_upload(Bucket=bucket.name, Key=key, UploadId=upload_id)
+            raise
+
+        return name, hasher.hexdigest()
+
+    def _bulk_delete_from_storage(self, paths: List[str]) -> List[bool]:
+        """
+        Delete many files from storage without a per-file exists() probe
+
+        S3-style storages exposing ``bucket.delete_objects`` are cleared in
+        batches of STORAGE_DELETE_BATCH_SIZE keys per request; other storages
+        have their deletes fanned out over a bounded thread pool, since each
+        delete() is dominated by I/O latency.
+
+        Returns:
+            One flag per path, True where the file is gone from storage
+        """
+        bucket = default_storage.bucket if _is_s3_storage() else None
+        if bucket is not None and hasattr(bucket, "delete_objects"):
+            results = []
+            for start in range(0, len(paths), self.STORAGE_DELETE_BATCH_SIZE):
+                batch = paths[start : start + self.STORAGE_DELETE_BATCH_SIZE]
+                try:
+                    response = bucket.delete_objects(
+                        Delete={"Objects": [{"Key": path} for path in batch], "Quiet": True}
+                    )
+                except Exception as e:
+                    logger.error(f"Error deleting {len(batch)} files from storage: {str(e)}")
+                    results.extend([False] * len(batch))
+                    continue
+                # Quiet mode only reports the keys that failed
+                errors = (response or {}).get("Errors", [])
+                for error in errors:
+                    logger.error(f"Error deleting file {error.get('Key')} from storage: {error.get('Message')}")
+                failed = {error.get("Key") for error in errors}
+                results.extend(path not in failed for path in batch)
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.STORAGE_DELETE_WORKERS) as executor:
+            return list(executor.map(self._safe_delete, paths))
+
+    def _safe_delete(self, path: str) -> bool:
+        """Delete a single file from storage, logging rather than raising on failure"""
+        try:
+            default_storage.delete(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting file {path} from storage: {str(e)}")
+            return False
+        return True
+
     def _validate_file_type(self, uploaded_file: UploadedFile, file_type: str) -> None:
         """Validate file type and MIME type"""
         if file_type not in self.ALLOWED_FILE_TYPES:
@@ -448,70 +785,70 @@ class FileManager:
 
     def _generate_secure_filename(self, original_filename: str) -> str:
         """Generate a secure filename to prevent path traversal attacks"""
-        # Get file extension
-        _, ext = os.path.splitext(original_filename)
-
-        # Generate unique filename
-        unique_id = str(uuid.uuid4())
-        secure_filename = f"{unique_id}{ext}"
+        # Get file extension, normalised to lower case
+        ext = os.path.splitext(original_filename)[1].lower()
 
-        return secure_filename
+        # Generate unique filename from the 32-char hex form of the UUID
+        return f"{uuid.uuid4().hex}{ext}"
 
     def _create_file_path(self, file_type: str, filename: str) -> str:
         """Create a secure file path"""
         # Create directory structure: uploads/file_type/year/month/filename
-        now = timezone.now()
-        path_parts = ["uploads", file_type, str(now.year), str(now.month).zfill(2), filename]
+        prefix = self._path_prefix_cache.get(file_type)
+        if prefix is None:
+            prefix = f"uploads/{file_type}/{self._now.year}/{self._now.month:02d}/"
+            self._path_prefix_cache[file_type] = prefix
 
-        return "/".join(path_parts)
-
-    def _calculate_file_hash(self, uploaded_file: UploadedFile) -> str:
-        """Calculate SHA-256 hash of the file for integrity checking"""
-        uploaded_file.seek(0)  # Reset file pointer
-        file_content = uploaded_file.read()
-        return hashlib.sha256(file_content).hexdigest()
+        return prefix + filename
 
     def _check_file_permission(self, file_upload: FileUpload, user: Optional[User]) -> bool:
         """Check if user has permission to access the file"""
         if not user:
             return False
 
-        # Owner can always access
-        if file_upload.user == user:
-            return True
+        key = (user.id, file_upload.id)
+        if key not in self._perm_cache:
+            self._perm_cache[key] = (
+                # Owner can always access (compare ids so the owner row is not fetched)
+                file_upload.user_id == user.id
+                # Public files can be accessed by anyone
+                or file_upload.is_public
+                # Staff can access all files
+                or user.is_staff
+            )
+        return self._perm_cache[key]
 
-        # Public files can be accessed by anyone
-        if file_upload.is_public:
-            return True
+    def _supports_preview(self, mime_type: str) -> bool:
+        """Check if file type supports browser preview"""
+        return mime_type in _PREVIEWABLE_MIME_TYPES
 
-        # Staff can access all files
-        if user.is_staff:
-            return True
+    def _get_file_upload(self, file_id: int, fields: Optional[Tuple[str, ...]] = None) -> FileUpload:
+        """
+        Fetch a file record, either whole with its owner or limited to ``fields``
 
-        return False
+        Projected records skip the owner join: permission checks only compare user_id.
+        """
+        if fields is not None:
+            return FileUpload.objects.only(*fields).get(id=file_id)
+        return FileUpload.objects.select_related("user").get(id=file_id)
 
-    def _supports_preview(self, mime_type: str) -> bool:
-        """Check if file type supports browser preview"""
-        previewable_types = [
-            "image/jpeg",
-            "image/png",
-            "image/gif",
-            "image/webp",
-            "image/svg+xml",
-            "application/pdf",
-            "text/plain",
-            "text/csv",
-        ]
-        return mime_type in previewable_types
-
-    def _get_file_url(self, file_upload: FileUpload) -> str:
+    def _get_file_url(self, file_id: int) -> str:
         """Generate file URL for access"""
-        return f"/api/files/{file_upload.id}/"
+        return "/api/files/%d/" % file_id
 
     def _get_client_ip(self) -> str:
         """Get client IP address for audit logging"""
-        # This would typically come from the request object
-        return "127.0.0.1"
+        return self._client_ip
+
+    @staticmethod
+    def _parse_client_ip(request: Optional[HttpRequest]) -> str:
+        """Read the client IP from the request, falling back to localhost outside a request"""
+        if request is None:
+            return "127.0.0.1"
+        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+        if x_forwarded_for:
+            return x_forwarded_for.split(",")[0].strip()
+        return request.META.get("REMOTE_ADDR") or "127.0.0.1"
 
 
 class FilePermissionManager:
@@ -521,6 +858,9 @@ class FilePermissionManager:
 
     def __init__(self, user: User):
         self.user = user
+        self._is_staff = user.is_staff
+        # Permission decisions keyed by (action, file id) for this manager's lifetime
+        self._perm_cache: Dict[Tuple[str, int], bool] = {}
 
     def can_upload(self, file_type: str) -> bool:
         """Check if user can upload files of given type"""
@@ -529,24 +869,25 @@ class FilePermissionManager:
 
     def can_download(self, file_upload: FileUpload) -> bool:
         """Check if user can download a specific file"""
-        # Owner can always download
-        if file_upload.user == self.user:
-            return True
-
-        # Public files can be downloaded by anyone
-        if file_upload.is_public:
-            return True
-
-        # Staff can download all files
-        if self.user.is_staff:
-            return True
-
-        return False
+        key = ("download", file_upload.id)
+        if key not in self._perm_cache:
+            self._perm_cache[key] = (
+                # Owner can always download
+                file_upload.user_id == self.user.id
+                # Public files can be downloaded by anyone
+                or file_upload.is_public
+                # Staff can download all files
+                or self._is_staff
+            )
+        return self._perm_cache[key]
 
     def can_delete(self, file_upload: FileUpload) -> bool:
         """Check if user can delete a specific file"""
-        # Only owner or staff can delete
-        return file_upload.user == self.user or self.user.is_staff
+        key = ("delete", file_upload.id)
+        if key not in self._perm_cache:
+            # Only owner or staff can delete
+            self._perm_cache[key] = file_upload.user_id == self.user.id or self._is_staff
+        return self._perm_cache[key]
 
     def can_preview(self, file_upload: FileUpload) -> bool:
         """Check if user can preview a specific file"""
@@ -9,18 +9,27 @@ Implements comprehensive FMCSA regulations with advanced features:
 - Secure data processing
 """
 
+import functools
+import math
+import types
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, Union, Any
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from django.utils import timezone
 from django.db import transaction
 from django.core.exceptions import ValidationError
 import logging
 
+from . import _hos_kernels
+
 logger = logging.getLogger(__name__)
 
+# Seconds per hour, for converting entry durations
+SECONDS_PER_HOUR = 3600.0
+
 
 class CycleType(Enum):
     """HOS Cycle Types"""
@@ -37,6 +46,124 @@ class DutyStatus(Enum):
     ON_DUTY_NOT_DRIVING = "on_duty_not_driving"
 
 
+# Every duty status value a log entry may carry
+VALID_DUTY_STATUSES = frozenset(status.value for status in DutyStatus)
+
+# Duty statuses that count towards on-duty and cycle hours
+ON_DUTY_STATUSES = frozenset({DutyStatus.DRIVING.value, DutyStatus.ON_DUTY_NOT_DRIVING.value})
+
+# Integer code stored in the EntryView status column for each duty status value
+DUTY_STATUS_CODES = types.MappingProxyType({
+    DutyStatus.OFF_DUTY.value: _hos_kernels.OFF_DUTY_CODE,
+    DutyStatus.SLEEPER_BERTH.value: _hos_kernels.SLEEPER_BERTH_CODE,
+    DutyStatus.DRIVING.value: _hos_kernels.DRIVING_CODE,
+    DutyStatus.ON_DUTY_NOT_DRIVING.value: _hos_kernels.ON_DUTY_NOT_DRIVING_CODE,
+})
+
+# Minimum off-duty time for a 34-hour restart, in seconds
+RESTART_MIN_SECONDS = 34 * SECONDS_PER_HOUR
+
+# Off-duty time that counts as a 30-minute break and as a 10-hour rest, in seconds
+BREAK_MIN_SECONDS = 30 * 60.0
+REST_MIN_SECONDS = 10 * SECONDS_PER_HOUR
+
+# How far back on-duty time is counted when there has been no 10-hour rest, in seconds
+ON_DUTY_LOOKBACK_SECONDS = 14 * SECONDS_PER_HOUR
+
+# Split sleeper berth: both periods within 24 hours, each at least 2 hours, 8+ hours together
+SPLIT_BERTH_WINDOW_SECONDS = 24 * SECONDS_PER_HOUR
+SPLIT_BERTH_MIN_PERIOD_SECONDS = 2 * SECONDS_PER_HOUR
+SPLIT_BERTH_MIN_TOTAL_SECONDS = 8 * SECONDS_PER_HOUR
+
+# Lead time before a recommended restart
+RESTART_RECOMMENDATION_LEAD = timedelta(hours=1)
+
+# Restart recommendation payloads, shared read-only by every status
+RESTART_IMMEDIATE_RECOMMENDATION = types.MappingProxyType({
+    'type': 'restart_immediate',
+    'message': 'Cycle limit nearly reached - 34-hour restart required immediately',
+    'priority': 'critical',
+    'action_required': True
+})
+RESTART_SOON_RECOMMENDATION = types.MappingProxyType({
+    'type': 'restart_soon',
+    'message': 'Consider a 34-hour restart soon to reset your cycle',
+    'priority': 'high',
+    'action_required': False
+})
+
+# Sleeper berth options offered with every restart recommendation
+SLEEPER_BERTH_OPTIONS = (
+    types.MappingProxyType({
+        'type': 'single_period',
+        'description': 'Single 8+ hour sleeper berth period',
+        'minimum_hours': 8.0,
+        'benefits': ('Simplest option', 'Full cycle reset')
+    }),
+    types.MappingProxyType({
+        'type': 'split_period',
+        'description': 'Split sleeper berth (2+2 hours)',
+        'minimum_hours': 4.0,
+        'benefits': ('More flexible', 'Can be split across days')
+    }),
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _last_valid_restart_position(
+    start_s: Tuple[float, ...],
+    end_s: Tuple[float, ...],
+    status_code: Tuple[int, ...]
+) -> int:
+    """
+    Position of the most recent valid 34-hour restart in start-sorted closed entries, or -1
+    
+    Takes the entry columns as tuples so repeated polls over an unchanged log
+    window are answered from the cache instead of re-validating every restart.
+    """
+    # On-duty intervals sorted by start, shared by every restart candidate
+    on_duty_intervals = sorted(
+        (start, end) for start, end, code in zip(start_s, end_s, status_code)
+        if code == _hos_kernels.DRIVING_CODE or code == _hos_kernels.ON_DUTY_NOT_DRIVING_CODE
+    )
+    on_duty_starts = [start for start, _ in on_duty_intervals]
+    on_duty_ends = [end for _, end in on_duty_intervals]
+    
+    for position in range(len(status_code) - 1, -1, -1):
+        if (status_code[position] == _hos_kernels.OFF_DUTY_CODE and
+                _is_valid_34_hour_restart(start_s[position], end_s[position], on_duty_starts, on_duty_ends)):
+            return position
+    return -1
+
+
+def _is_valid_34_hour_restart(
+    start: float,
+    end: float,
+    on_duty_starts: List[float],
+    on_duty_ends: List[float]
+) -> bool:
+    """
+    Enhanced 34-hour restart validation with sleeper berth support
+    
+    on_duty_starts/on_duty_ends describe the driving and on-duty intervals,
+    sorted by start time, so only intervals starting inside the break are visited.
+    """
+    # Must be at least 34 hours off duty
+    if end - start < RESTART_MIN_SECONDS:
+        return False
+    
+    # Check if this was consecutive off-duty time (no on-duty periods during the break)
+    # Allow sleeper berth time during 34-hour restart
+    index = bisect_right(on_duty_starts, start)
+    while index < len(on_duty_starts) and on_duty_starts[index] < end:
+        if on_duty_ends[index] < end:
+            # Found on-duty time during the break, not a valid 34-hour restart
+            return False
+        index += 1
+    
+    return True
+
+
 class ViolationSeverity(Enum):
     """Violation Severity Levels"""
     MINOR = "minor"
@@ -44,6 +171,17 @@ class ViolationSeverity(Enum):
     CRITICAL = "critical"
 
 
+# Violation severities that require the driver to rest
+REST_REQUIRED_SEVERITIES = frozenset({ViolationSeverity.MAJOR, ViolationSeverity.CRITICAL})
+
+# Compliance score penalty for each violation, by severity
+SEVERITY_PENALTY_POINTS = {
+    ViolationSeverity.CRITICAL: 20,
+    ViolationSeverity.MAJOR: 10,
+    ViolationSeverity.MINOR: 5,
+}
+
+
 class ViolationStatus(Enum):
     """Violation Resolution Status"""
     PENDING = "pending"
@@ -60,32 +198,63 @@ class TeamDrivingRole(Enum):
     RELIEF_DRIVER = "relief_driver"
 
 
-@dataclass
-class HOSLimits:
+class HOSLimits(NamedTuple):
     """HOS Limits for different cycle types"""
-    max_driving_hours: Decimal
-    max_on_duty_hours: Decimal
-    min_off_duty_hours: Decimal
+    max_driving_hours: float
+    max_on_duty_hours: float
+    min_off_duty_hours: float
     min_30_min_break: bool
-    min_sleeper_berth_hours: Decimal
-    cycle_hours: Decimal
+    min_sleeper_berth_hours: float
+    cycle_hours: float
     cycle_days: int
-    max_consecutive_driving_hours: Decimal = Decimal('11.00')
-    min_34_hour_restart_hours: Decimal = Decimal('34.00')
+    max_consecutive_driving_hours: float = 11.0
+    min_34_hour_restart_hours: float = 34.0
+
 
+# FMCSA HOS Limits by cycle type, shared read-only by every engine
+HOS_LIMITS = types.MappingProxyType({
+    CycleType.SEVENTY_EIGHT: HOSLimits(
+        max_driving_hours=11.0,
+        max_on_duty_hours=14.0,
+        min_off_duty_hours=10.0,
+        min_30_min_break=True,
+        min_sleeper_berth_hours=8.0,
+        cycle_hours=70.0,
+        cycle_days=8
+    ),
+    CycleType.SIXTY_SEVEN: HOSLimits(
+        max_driving_hours=11.0,
+        max_on_duty_hours=14.0,
+        min_off_duty_hours=10.0,
+        min_30_min_break=True,
+        min_sleeper_berth_hours=8.0,
+        cycle_hours=60.0,
+        cycle_days=7
+    ),
+    CycleType.THIRTY_FOUR_HOUR: HOSLimits(
+        max_driving_hours=11.0,
+        max_on_duty_hours=14.0,
+        min_off_duty_hours=34.0,
+        min_30_min_break=True,
+        min_sleeper_berth_hours=8.0,
+        cycle_hours=70.0,
+        cycle_days=8
+    )
+})
 
-@dataclass
+
+@dataclass(slots=True)
 class SleeperBerthPeriod:
     """Sleeper berth period tracking"""
     start_time: datetime
     end_time: Optional[datetime]
-    duration_hours: Decimal
+    duration_hours: float
     is_valid_for_restart: bool = False
-    consecutive_hours: Decimal = Decimal('0.00')
+    consecutive_hours: float = 0.0
     split_berth_period: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Violation:
     """Enhanced HOS Violation with workflow support"""
     violation_type: str
@@ -102,7 +271,7 @@ class Violation:
     compliance_impact: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class TeamDrivingInfo:
     """Team driving coordination information"""
     team_id: str
@@ -112,38 +281,255 @@ class TeamDrivingInfo:
     handoff_time: Optional[datetime] = None
     handoff_location: str = ""
     coordination_notes: str = ""
+    # Whether driver 1 is at the wheel; kept in step with current_driver by handoff_driving
+    is_driver1_active: bool = field(init=False)
+    
+    def __post_init__(self):
+        self.is_driver1_active = self.current_driver is TeamDrivingRole.DRIVER_1
 
 
-@dataclass
+@dataclass(slots=True)
 class ComplianceAnalytics:
     """Compliance analytics and metrics"""
     total_violations: int = 0
     violations_by_type: Dict[str, int] = field(default_factory=dict)
     violations_by_severity: Dict[str, int] = field(default_factory=dict)
-    compliance_score: Decimal = Decimal('100.00')
-    cycle_efficiency: Decimal = Decimal('0.00')
-    restart_frequency: Decimal = Decimal('0.00')
-    average_daily_hours: Decimal = Decimal('0.00')
+    compliance_score: float = 100.0
+    cycle_efficiency: float = 0.0
+    restart_frequency: float = 0.0
+    average_daily_hours: float = 0.0
     risk_factors: List[str] = field(default_factory=list)
 
 
-@dataclass
+class _FieldMapping:
+    """
+    Read-only dict access to a dataclass's fields
+    
+    Lets callers written against the old dict results keep using result['key']
+    and result.get('key'), and dict(result) gives the JSON payload for a view.
+    """
+    __slots__ = ()
+    
+    def keys(self) -> List[str]:
+        return [f.name for f in fields(self)]
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+@dataclass(slots=True)
+class RestartRecommendations(_FieldMapping):
+    """34-hour restart recommendations for the current cycle"""
+    cycle_limit: float
+    last_restart: Optional[str] = None
+    time_since_restart_hours: Optional[float] = None
+    current_cycle_hours: float = 0.0
+    cycle_progress_percent: float = 0.0
+    recommendations: List[Mapping[str, Any]] = field(default_factory=list)
+    optimal_restart_time: Optional[str] = None
+    sleeper_berth_options: Tuple[Mapping[str, Any], ...] = SLEEPER_BERTH_OPTIONS
+
+
 class HOSStatus:
-    """Enhanced HOS Status with advanced features"""
-    can_drive: bool
-    can_be_on_duty: bool
-    needs_rest: bool
-    hours_used_this_cycle: Decimal
-    hours_available: Decimal
-    consecutive_off_duty_hours: Decimal
-    last_30_min_break: Optional[datetime]
-    violations: List[Violation]
-    cycle_type: CycleType
-    cycle_start_date: datetime
-    sleeper_berth_periods: List[SleeperBerthPeriod] = field(default_factory=list)
-    team_driving_info: Optional[TeamDrivingInfo] = None
-    compliance_analytics: Optional[ComplianceAnalytics] = None
-    restart_recommendations: Dict[str, Any] = field(default_factory=dict)
+    """
+    Enhanced HOS Status with advanced features
+    
+    compliance_analytics and restart_recommendations may be passed as
+    zero-argument callables. They are then computed on first access, so callers
+    that only check can_drive never pay for the analytics pass.
+    """
+    __slots__ = (
+        'can_drive', 'can_be_on_duty', 'needs_rest', 'hours_used_this_cycle', 'hours_available',
+        'consecutive_off_duty_hours', 'last_30_min_break', 'violations', 'cycle_type',
+        'cycle_start_date', 'sleeper_berth_periods', 'team_driving_info',
+        '_compliance_analytics', '_restart_recommendations'
+    )
+    
+    def __init__(
+        self,
+        can_drive: bool,
+        can_be_on_duty: bool,
+        needs_rest: bool,
+        hours_used_this_cycle: float,
+        hours_available: float,
+        consecutive_off_duty_hours: float,
+        last_30_min_break: Optional[datetime],
+        violations: List[Violation],
+        cycle_type: CycleType,
+        cycle_start_date: datetime,
+        sleeper_berth_periods: Optional[List[SleeperBerthPeriod]] = None,
+        team_driving_info: Optional[TeamDrivingInfo] = None,
+        compliance_analytics: Union[ComplianceAnalytics, Callable[[], ComplianceAnalytics], None] = None,
+        restart_recommendations: Union[RestartRecommendations, Callable[[], RestartRecommendations], None] = None
+    ):
+        self.can_drive = can_drive
+        self.can_be_on_duty = can_be_on_duty
+        self.needs_rest = needs_rest
+        self.hours_used_this_cycle = hours_used_this_cycle
+        self.hours_available = hours_available
+        self.consecutive_off_duty_hours = consecutive_off_duty_hours
+        self.last_30_min_break = last_30_min_break
+        self.violations = violations
+        self.cycle_type = cycle_type
+        self.cycle_start_date = cycle_start_date
+        self.sleeper_berth_periods = [] if sleeper_berth_periods is None else sleeper_berth_periods
+        self.team_driving_info = team_driving_info
+        self._compliance_analytics = compliance_analytics
+        self._restart_recommendations = {} if restart_recommendations is None else restart_recommendations
+    
+    @property
+    def compliance_analytics(self) -> Optional[ComplianceAnalytics]:
+        """Compliance analytics, computed on first access when deferred"""
+        if callable(self._compliance_analytics):
+            self._compliance_analytics = self._compliance_analytics()
+        return self._compliance_analytics
+    
+    @compliance_analytics.setter
+    def compliance_analytics(self, value: Optional[ComplianceAnalytics]):
+        self._compliance_analytics = value
+    
+    @property
+    def restart_recommendations(self) -> Union[RestartRecommendations, Dict[str, Any]]:
+        """Restart recommendations, computed on first access when deferred"""
+        if callable(self._restart_recommendations):
+            self._restart_recommendations = self._restart_recommendations()
+        return self._restart_recommendations
+    
+    @restart_recommendations.setter
+    def restart_recommendations(self, value: Union[RestartRecommendations, Dict[str, Any]]):
+        self._restart_recommendations = value
+
+
+@dataclass(slots=True)
+class EntryView:
+    """
+    Log entries with their times as epoch-second columns
+    
+    Times are converted once when the view is built; the rule checks and hour
+    totals then work on these floats instead of subtracting datetimes per pass.
+    Open entries have a NaN end time and duration, which every comparison skips.
+    """
+    entries: List[Dict]
+    start_s: Any
+    end_s: Any
+    duration_s: Any
+    status_code: Any
+    
+    @classmethod
+    def from_entries(cls, entries: List[Dict]) -> 'EntryView':
+        """Build the columns in one pass over entries"""
+        starts = []
+        ends = []
+        durations = []
+        codes = []
+        code_of = DUTY_STATUS_CODES.get
+        unknown = _hos_kernels.UNKNOWN_STATUS_CODE
+        for entry in entries:
+            start = entry['start_time'].timestamp()
+            end = entry['end_time'].timestamp() if entry['end_time'] else math.nan
+            starts.append(start)
+            ends.append(end)
+            durations.append(end - start)
+            codes.append(code_of(entry['duty_status'], unknown))
+        return cls(
+            entries=entries,
+            start_s=_hos_kernels.as_float_column(starts),
+            end_s=_hos_kernels.as_float_column(ends),
+            duration_s=_hos_kernels.as_float_column(durations),
+            status_code=_hos_kernels.as_code_column(codes),
+        )
+    
+    def tail(self, index: int) -> 'EntryView':
+        """View of the entries from index onwards, sharing the converted times"""
+        return EntryView(
+            entries=self.entries[index:],
+            start_s=self.start_s[index:],
+            end_s=self.end_s[index:],
+            duration_s=self.duration_s[index:],
+            status_code=self.status_code[index:],
+        )
+
+
+def _cycle_start_index(view: 'EntryView', cycle_start: datetime) -> int:
+    """Index of the first entry starting at or after cycle_start in a start-sorted view"""
+    return bisect_left(view.start_s, cycle_start.timestamp())
+
+
+@dataclass(slots=True)
+class OffDutyMarks:
+    """
+    Positions of the latest off-duty entries in an EntryView (-1 when absent)
+    
+    Found in one backward sweep and shared by every helper that looks for the
+    last break; tail() maps them onto a tail of the same view.
+    """
+    last_off_duty: int
+    last_break: int
+    last_rest: int
+    
+    @classmethod
+    def from_view(cls, view: EntryView) -> 'OffDutyMarks':
+        """Sweep the view once for the last off-duty entry, 30-minute break and 10-hour rest"""
+        last_off_duty, last_break, last_rest = _hos_kernels.last_off_duty_marks(
+            view.duration_s, view.status_code, BREAK_MIN_SECONDS, REST_MIN_SECONDS
+        )
+        return cls(last_off_duty=last_off_duty, last_break=last_break, last_rest=last_rest)
+    
+    def tail(self, index: int) -> 'OffDutyMarks':
+        """Marks for view.tail(index); positions before the tail become -1"""
+        def shift(position: int) -> int:
+            return position - index if position >= index else -1
+        return OffDutyMarks(
+            last_off_duty=shift(self.last_off_duty),
+            last_break=shift(self.last_break),
+            last_rest=shift(self.last_rest),
+        )
+
+
+@dataclass(slots=True)
+class ViolationScan:
+    """Result of the fused per-entry rule pass over an EntryView"""
+    driving_over: List[int]
+    on_duty_over: List[int]
+    restart_too_short: List[int]
+    cycle_hours: float
+    # Filled in by callers that already know it, so the 30-minute break rule skips its own scan
+    driving_hours_since_break: Optional[float] = None
+    
+    @classmethod
+    def from_view(cls, view: EntryView, params: 'CompiledRuleParams') -> 'ViolationScan':
+        """Check every per-entry limit in one traversal of the view's columns"""
+        driving_over, on_duty_over, restart_too_short, on_duty_s = _hos_kernels.scan_violations(
+            view.duration_s, view.status_code,
+            params.max_driving * SECONDS_PER_HOUR,
+            params.max_on_duty * SECONDS_PER_HOUR,
+            params.min_restart * SECONDS_PER_HOUR
+        )
+        return cls(
+            driving_over=list(driving_over),
+            on_duty_over=list(on_duty_over),
+            restart_too_short=list(restart_too_short),
+            cycle_hours=on_duty_s / SECONDS_PER_HOUR,
+        )
+
+
+@dataclass(slots=True)
+class CompiledRuleParams:
+    """Rule parameters flattened to floats for the rule-check hot paths"""
+    max_driving: float = 11.0
+    max_on_duty: float = 14.0
+    break_threshold: float = 8.0
+    min_break: float = 0.5
+    cycle_hours: float = 70.0
+    min_restart: float = 34.0
+    min_first_sleeper_berth: float = 2.0
+    min_second_sleeper_berth: float = 2.0
 
 
 class HOSRuleEngine:
@@ -151,7 +537,11 @@ class HOSRuleEngine:
     
     def __init__(self):
         self.rules = {}
+        self.frozen = False
+        self._compiled_params: Optional[CompiledRuleParams] = None
         self._load_default_rules()
+        # Read-only view handed out by get_all_rules; tracks add_custom_rule/update_rule
+        self._rules_view = types.MappingProxyType(self.rules)
     
     def _load_default_rules(self):
         """Load default FMCSA rules"""
@@ -202,74 +592,118 @@ class HOSRuleEngine:
     
     def add_custom_rule(self, rule_id: str, rule_config: Dict[str, Any]) -> bool:
         """Add a custom rule to the engine"""
+        if self.frozen:
+            logger.warning("Cannot add rule %s to a frozen rule engine", rule_id)
+            return False
+        
         try:
             self.rules[rule_id] = rule_config
-            logger.info(f"Added custom rule: {rule_id}")
+            self._compiled_params = None
+            logger.info("Added custom rule: %s", rule_id)
             return True
         except Exception as e:
-            logger.error(f"Failed to add custom rule {rule_id}: {e}")
+            logger.error("Failed to add custom rule %s: %s", rule_id, e)
             return False
     
     def update_rule(self, rule_id: str, updates: Dict[str, Any]) -> bool:
         """Update an existing rule"""
         if rule_id not in self.rules:
             return False
+        if self.frozen:
+            logger.warning("Cannot update rule %s of a frozen rule engine", rule_id)
+            return False
         
         try:
             self.rules[rule_id].update(updates)
-            logger.info(f"Updated rule: {rule_id}")
+            self._compiled_params = None
+            logger.info("Updated rule: %s", rule_id)
             return True
         except Exception as e:
-            logger.error(f"Failed to update rule {rule_id}: {e}")
+            logger.error("Failed to update rule %s: %s", rule_id, e)
             return False
     
-    def get_rule(self, rule_id: str) -> Optional[Dict[str, Any]]:
+    def get_rule(self, rule_id: str) -> Optional[Mapping[str, Any]]:
         """Get a specific rule configuration"""
         return self.rules.get(rule_id)
     
-    def get_all_rules(self) -> Dict[str, Dict[str, Any]]:
-        """Get all rules"""
-        return self.rules.copy()
+    def get_all_rules(self) -> Mapping[str, Mapping[str, Any]]:
+        """Get all rules as a read-only view (change them via add_custom_rule/update_rule)"""
+        return self._rules_view
+    
+    def freeze(self) -> None:
+        """
+        Make the rules read-only, for an engine shared between requests
+        
+        add_custom_rule and update_rule refuse changes afterwards, and the rule
+        configurations and their parameters become read-only mappings.
+        """
+        self.rules = types.MappingProxyType({
+            rule_id: types.MappingProxyType({
+                key: types.MappingProxyType(dict(value)) if isinstance(value, dict) else value
+                for key, value in rule.items()
+            })
+            for rule_id, rule in self.rules.items()
+        })
+        self._rules_view = self.rules
+        self.frozen = True
+    
+    @property
+    def compiled_params(self) -> CompiledRuleParams:
+        """Rule parameters as floats, rebuilt after add_custom_rule/update_rule"""
+        if self._compiled_params is None:
+            self._compiled_params = self._compile_params()
+        return self._compiled_params
+    
+    def _compile_params(self) -> CompiledRuleParams:
+        """Read the built-in rules' parameters into a CompiledRuleParams"""
+        defaults = CompiledRuleParams()
+        
+        def param(rule_id: str, name: str, default: float) -> float:
+            return float(self.rules.get(rule_id, {}).get('parameters', {}).get(name, default))
+        
+        return CompiledRuleParams(
+            max_driving=param('driving_limit_11_hours', 'max_hours', defaults.max_driving),
+            max_on_duty=param('on_duty_limit_14_hours', 'max_hours', defaults.max_on_duty),
+            break_threshold=param('30_min_break_requirement', 'break_threshold', defaults.break_threshold),
+            min_break=param('30_min_break_requirement', 'min_break', defaults.min_break),
+            cycle_hours=param('cycle_hours_limit', 'cycle_hours', defaults.cycle_hours),
+            min_restart=param('34_hour_restart', 'min_hours', defaults.min_restart),
+            min_first_sleeper_berth=param('sleeper_berth_split', 'min_first_period', defaults.min_first_sleeper_berth),
+            min_second_sleeper_berth=param('sleeper_berth_split', 'min_second_period', defaults.min_second_sleeper_berth),
+        )
 
 
 class AdvancedHOSComplianceEngine:
     """Advanced HOS Compliance Engine with comprehensive features"""
     
-    # FMCSA HOS Limits
-    HOS_LIMITS = {
-        CycleType.SEVENTY_EIGHT: HOSLimits(
-            max_driving_hours=Decimal('11.00'),
-            max_on_duty_hours=Decimal('14.00'),
-            min_off_duty_hours=Decimal('10.00'),
-            min_30_min_break=True,
-            min_sleeper_berth_hours=Decimal('8.00'),
-            cycle_hours=Decimal('70.00'),
-            cycle_days=8
-        ),
-        CycleType.SIXTY_SEVEN: HOSLimits(
-            max_driving_hours=Decimal('11.00'),
-            max_on_duty_hours=Decimal('14.00'),
-            min_off_duty_hours=Decimal('10.00'),
-            min_30_min_break=True,
-            min_sleeper_berth_hours=Decimal('8.00'),
-            cycle_hours=Decimal('60.00'),
-            cycle_days=7
-        ),
-        CycleType.THIRTY_FOUR_HOUR: HOSLimits(
-            max_driving_hours=Decimal('11.00'),
-            max_on_duty_hours=Decimal('14.00'),
-            min_off_duty_hours=Decimal('34.00'),
-            min_30_min_break=True,
-            min_sleeper_berth_hours=Decimal('8.00'),
-            cycle_hours=Decimal('70.00'),
-            cycle_days=8
-        )
-    }
+    # FMCSA HOS Limits (the module-level table, kept here for existing callers)
+    HOS_LIMITS = HOS_LIMITS
     
     def __init__(self, cycle_type: CycleType = CycleType.SEVENTY_EIGHT):
         self.cycle_type = cycle_type
-        self.limits = self.HOS_LIMITS[cycle_type]
+        self.limits = HOS_LIMITS[cycle_type]
+        # Cycle length and the cycle-hour thresholds for the restart recommendations
+        self._cycle_window = timedelta(days=self.limits.cycle_days)
+        self._cycle_limit = self.limits.cycle_hours
+        self._cycle_restart_now = self._cycle_limit * 0.9
+        self._cycle_restart_soon = self._cycle_limit * 0.8
+        self._cycle_plan_restart = self._cycle_limit * 0.7
         self.rule_engine = HOSRuleEngine()
+        # Rule id -> check method; every handler takes the same arguments, reads its
+        # thresholds from the CompiledRuleParams and per-entry hits from the ViolationScan
+        self._rule_handlers = {
+            'driving_limit_11_hours': self._check_driving_limit_rule,
+            'on_duty_limit_14_hours': self._check_on_duty_limit_rule,
+            '30_min_break_requirement': self._check_30_min_break_rule,
+            'cycle_hours_limit': self._check_cycle_hours_rule,
+            '34_hour_restart': self._check_34_hour_restart_rule,
+            'sleeper_berth_split': self._check_sleeper_berth_split_rule,
+        }
+    
+    @classmethod
+    def get(cls, cycle_type: CycleType = CycleType.SEVENTY_EIGHT) -> 'AdvancedHOSComplianceEngine':
+        """Shared engine for cycle_type (see get_compliance_engine)"""
+        return get_compliance_engine(cycle_type)
     
     def calculate_advanced_hos_status(
         self, 
@@ -291,49 +725,87 @@ class AdvancedHOSComplianceEngine:
         if current_time is None:
             current_time = timezone.now()
         
+        # Inactive drivers have no entries; skip the scans that would all come back empty
+        if not log_entries:
+            return self._empty_hos_status(current_time, team_driving_info)
+        
         # Sort log entries by start time
         sorted_entries = sorted(log_entries, key=lambda x: x['start_time'])
         
+        # Convert entry times to epoch seconds once; everything below reuses these columns
+        entries_view = EntryView.from_entries(sorted_entries)
+        
         # Calculate cycle start with 34-hour restart logic
-        cycle_start = self._calculate_advanced_cycle_start(sorted_entries, current_time)
+        cycle_start = self._calculate_advanced_cycle_start(sorted_entries, current_time, view=entries_view)
         
         # Calculate sleeper berth periods
-        sleeper_berth_periods = self._calculate_sleeper_berth_periods(sorted_entries, current_time)
+        sleeper_berth_periods = self._calculate_sleeper_berth_periods(sorted_entries, current_time, view=entries_view)
+        
+        # Entries are sorted, so the current cycle is a tail slice found by bisection
+        cycle_index = _cycle_start_index(entries_view, cycle_start)
+        cycle_view = entries_view.tail(cycle_index)
+        cycle_entries = cycle_view.entries
+        
+        # One pass over the cycle checks the per-entry limits and totals the cycle hours
+        scan = ViolationScan.from_view(cycle_view, self.rule_engine.compiled_params)
         
         # Calculate hours used in current cycle
-        cycle_entries = [entry for entry in sorted_entries 
-                        if entry['start_time'] >= cycle_start]
+        cycle_hours = scan.cycle_hours
+        hours_available = self.limits.cycle_hours - cycle_hours
         
-        hours_used = self._calculate_cycle_hours(cycle_entries)
-        hours_available = self.limits.cycle_hours - hours_used
+        # One backward sweep locates the last off-duty entry, break and rest for the helpers below
+        off_duty_marks = OffDutyMarks.from_view(entries_view)
+        
+        # Hours since the last breaks feed the break rule and all three eligibility checks; compute them once
+        driving_hours, on_duty_hours = self._hours_since_breaks(
+            cycle_view, current_time, marks=off_duty_marks.tail(cycle_index)
+        )
+        scan.driving_hours_since_break = driving_hours
         
         # Check for violations using rule engine
-        violations = self._check_advanced_violations(cycle_entries, current_time, sleeper_berth_periods)
+        violations = self._check_advanced_violations(
+            cycle_entries, current_time, sleeper_berth_periods, view=cycle_view, scan=scan
+        )
         
         # Calculate consecutive off-duty hours
-        consecutive_off_duty = self._calculate_consecutive_off_duty_hours(sorted_entries, current_time)
+        consecutive_off_duty = self._calculate_consecutive_off_duty_hours(
+            sorted_entries, current_time, view=entries_view, marks=off_duty_marks
+        )
         
         # Check if 30-minute break is needed
-        last_30_min_break = self._get_last_30_min_break(sorted_entries, current_time)
+        last_30_min_break = self._get_last_30_min_break(
+            sorted_entries, current_time, view=entries_view, marks=off_duty_marks
+        )
         
         # Determine if driver can drive or be on duty
-        can_drive = self._can_drive_advanced(cycle_entries, current_time, violations, team_driving_info)
-        can_be_on_duty = self._can_be_on_duty_advanced(cycle_entries, current_time, violations, team_driving_info)
-        needs_rest = self._needs_rest_advanced(cycle_entries, current_time, violations)
+        can_drive = self._can_drive_advanced(
+            cycle_entries, current_time, violations, team_driving_info,
+            driving_hours=driving_hours, on_duty_hours=on_duty_hours
+        )
+        can_be_on_duty = self._can_be_on_duty_advanced(
+            cycle_entries, current_time, violations, team_driving_info, on_duty_hours=on_duty_hours
+        )
+        needs_rest = self._needs_rest_advanced(
+            cycle_entries, current_time, violations, driving_hours=driving_hours, on_duty_hours=on_duty_hours
+        )
         
-        # Calculate compliance analytics
-        compliance_analytics = self._calculate_compliance_analytics(sorted_entries, violations, current_time)
+        # Calculate compliance analytics, deferred until the caller reads it
+        compliance_analytics = functools.partial(
+            self._calculate_compliance_analytics,
+            sorted_entries, violations, current_time, view=entries_view
+        )
         
         # Get restart recommendations
-        restart_recommendations = self._get_advanced_restart_recommendations(
-            sorted_entries, current_time, sleeper_berth_periods
+        restart_recommendations = functools.partial(
+            self._get_advanced_restart_recommendations,
+            sorted_entries, current_time, sleeper_berth_periods, cycle_hours=cycle_hours
         )
         
         return HOSStatus(
             can_drive=can_drive,
             can_be_on_duty=can_be_on_duty,
             needs_rest=needs_rest,
-            hours_used_this_cycle=hours_used,
+            hours_used_this_cycle=cycle_hours,
             hours_available=hours_available,
             consecutive_off_duty_hours=consecutive_off_duty,
             last_30_min_break=last_30_min_break,
@@ -346,124 +818,169 @@ class AdvancedHOSComplianceEngine:
             restart_recommendations=restart_recommendations
         )
     
-    def _calculate_advanced_cycle_start(self, log_entries: List[Dict], current_time: datetime) -> datetime:
+    def _empty_hos_status(
+        self,
+        current_time: datetime,
+        team_driving_info: Optional[TeamDrivingInfo]
+    ) -> HOSStatus:
+        """HOSStatus for a driver with no log entries, as the full calculation would return it"""
+        return HOSStatus(
+            can_drive=self._can_drive_advanced(
+                [], current_time, [], team_driving_info, driving_hours=0.0, on_duty_hours=0.0
+            ),
+            can_be_on_duty=True,
+            needs_rest=False,
+            hours_used_this_cycle=0.0,
+            hours_available=self.limits.cycle_hours,
+            consecutive_off_duty_hours=0.0,
+            last_30_min_break=None,
+            violations=[],
+            cycle_type=self.cycle_type,
+            cycle_start_date=current_time - self._cycle_window,
+            team_driving_info=team_driving_info,
+            compliance_analytics=ComplianceAnalytics(),
+            restart_recommendations=self._get_advanced_restart_recommendations(
+                [], current_time, [], cycle_hours=0.0
+            )
+        )
+    
+    def _calculate_advanced_cycle_start(
+        self,
+        log_entries: List[Dict],
+        current_time: datetime,
+        view: Optional[EntryView] = None
+    ) -> datetime:
         """Calculate cycle start with enhanced 34-hour restart detection"""
-        if not log_entries:
-            return current_time - timedelta(days=self.limits.cycle_days)
-        
-        # Find the most recent valid 34-hour restart
-        cycle_start = current_time - timedelta(days=self.limits.cycle_days)
-        
-        # Check for 34-hour restarts in the last cycle period
-        for entry in reversed(log_entries):
-            if (entry['duty_status'] == DutyStatus.OFF_DUTY.value and 
-                entry['end_time'] and 
-                self._is_valid_34_hour_restart(entry, log_entries)):
-                # Found a valid 34-hour restart, cycle starts after this break
-                cycle_start = entry['end_time']
-                break
-        
         # Ensure cycle start is not more than cycle_days ago
-        max_cycle_start = current_time - timedelta(days=self.limits.cycle_days)
-        if cycle_start < max_cycle_start:
-            cycle_start = max_cycle_start
-        
-        return cycle_start
-    
-    def _is_valid_34_hour_restart(self, off_duty_entry: Dict, all_entries: List[Dict]) -> bool:
-        """Enhanced 34-hour restart validation with sleeper berth support"""
-        if not off_duty_entry['end_time']:
-            return False
-        
-        duration = off_duty_entry['end_time'] - off_duty_entry['start_time']
-        
-        # Must be at least 34 hours off duty
-        if duration < timedelta(hours=34):
-            return False
+        max_cycle_start = current_time - self._cycle_window
+        if not log_entries:
+            return max_cycle_start
+        
+        if view is None:
+            view = EntryView.from_entries(log_entries)
+        
+        # Only restarts ending after max_cycle_start can move the cycle start, and only
+        # on-duty time starting inside such a break can invalidate it, so the search
+        # window opens at the earliest entry still running at max_cycle_start
+        max_cycle_start_s = max_cycle_start.timestamp()
+        window_start_s = min(
+            (start for start, end in zip(view.start_s, view.end_s) if end >= max_cycle_start_s),
+            default=math.inf
+        )
+        window_index = bisect_left(view.start_s, window_start_s)
         
-        # Check if this was consecutive off-duty time (no on-duty periods during the break)
-        start_time = off_duty_entry['start_time']
-        end_time = off_duty_entry['end_time']
+        # Open entries can neither be a restart nor interrupt one
+        positions = [
+            index for index in range(window_index, len(view.entries))
+            if not math.isnan(view.end_s[index])
+        ]
         
-        # Allow sleeper berth time during 34-hour restart
-        for entry in all_entries:
-            if (entry['start_time'] > start_time and 
-                entry['end_time'] < end_time and
-                entry['duty_status'] in [DutyStatus.DRIVING.value, DutyStatus.ON_DUTY_NOT_DRIVING.value]):
-                # Found on-duty time during the break, not a valid 34-hour restart
-                return False
+        # Find the most recent valid 34-hour restart in the window
+        restart_position = _last_valid_restart_position(
+            tuple(float(view.start_s[index]) for index in positions),
+            tuple(float(view.end_s[index]) for index in positions),
+            tuple(int(view.status_code[index]) for index in positions),
+        )
+        if restart_position < 0:
+            return max_cycle_start
         
-        return True
+        # Found a valid 34-hour restart, cycle starts after this break
+        cycle_start = view.entries[positions[restart_position]]['end_time']
+        return max(cycle_start, max_cycle_start)
     
-    def _calculate_sleeper_berth_periods(self, log_entries: List[Dict], current_time: datetime) -> List[SleeperBerthPeriod]:
+    def _calculate_sleeper_berth_periods(
+        self,
+        log_entries: List[Dict],
+        current_time: datetime,
+        view: Optional[EntryView] = None
+    ) -> List[SleeperBerthPeriod]:
         """Calculate sleeper berth periods with split berth support"""
-        sleeper_periods = []
-        
-        for entry in log_entries:
-            if entry['duty_status'] == DutyStatus.SLEEPER_BERTH.value:
-                duration = entry['end_time'] - entry['start_time'] if entry['end_time'] else current_time - entry['start_time']
-                hours = Decimal(str(duration.total_seconds() / 3600))
-                
-                period = SleeperBerthPeriod(
-                    start_time=entry['start_time'],
-                    end_time=entry['end_time'],
-                    duration_hours=hours,
-                    is_valid_for_restart=hours >= self.limits.min_34_hour_restart_hours,
-                    consecutive_hours=hours,
-                    split_berth_period=False
-                )
-                
-                sleeper_periods.append(period)
+        if view is None:
+            view = EntryView.from_entries(log_entries)
+        now_s = current_time.timestamp()
+        
+        # Gather sleeper berth rows as parallel columns; an open period runs until current_time
+        indices = []
+        start_s = []
+        end_s = []
+        duration_s = []
+        for index, code in enumerate(view.status_code):
+            if code != _hos_kernels.SLEEPER_BERTH_CODE:
+                continue
+            duration = view.duration_s[index]
+            indices.append(index)
+            start_s.append(view.start_s[index])
+            end_s.append(view.end_s[index])
+            duration_s.append(now_s - view.start_s[index] if math.isnan(duration) else duration)
         
         # Check for split sleeper berth periods
-        sleeper_periods = self._validate_split_sleeper_berth(sleeper_periods)
+        split_flags = self._validate_split_sleeper_berth(start_s, end_s, duration_s)
+        
+        # Build the SleeperBerthPeriod objects only now, for the returned status
+        sleeper_periods = []
+        for index, duration, is_split in zip(indices, duration_s, split_flags):
+            entry = view.entries[index]
+            hours = duration / SECONDS_PER_HOUR
+            sleeper_periods.append(SleeperBerthPeriod(
+                start_time=entry['start_time'],
+                end_time=entry['end_time'],
+                duration_hours=hours,
+                is_valid_for_restart=hours >= self.limits.min_34_hour_restart_hours,
+                consecutive_hours=hours,
+                split_berth_period=is_split
+            ))
         
         return sleeper_periods
     
-    def _validate_split_sleeper_berth(self, sleeper_periods: List[SleeperBerthPeriod]) -> List[SleeperBerthPeriod]:
-        """Validate split sleeper berth periods according to FMCSA rules"""
-        if len(sleeper_periods) < 2:
-            return sleeper_periods
-        
-        # Sort by start time
-        sorted_periods = sorted(sleeper_periods, key=lambda x: x.start_time)
+    def _validate_split_sleeper_berth(self, start_s: List[float], end_s: List[float], duration_s: List[float]) -> List[bool]:
+        """
+        Flag sleeper berth periods that form a valid split according to FMCSA rules
         
-        # Check for valid split berth (minimum 2 hours each period, total 8+ hours)
-        for i in range(len(sorted_periods) - 1):
-            current_period = sorted_periods[i]
-            next_period = sorted_periods[i + 1]
-            
-            # Check if periods are within 24 hours of each other
-            time_between = next_period.start_time - current_period.end_time
-            if time_between <= timedelta(hours=24):
-                total_hours = current_period.duration_hours + next_period.duration_hours
-                
-                # Check if both periods are at least 2 hours and total is 8+ hours
-                if (current_period.duration_hours >= Decimal('2.0') and 
-                    next_period.duration_hours >= Decimal('2.0') and 
-                    total_hours >= Decimal('8.0')):
-                    
-                    current_period.split_berth_period = True
-                    next_period.split_berth_period = True
+        Takes the periods as start-sorted columns of epoch seconds and compares each
+        period with the next one. Both periods of a qualifying pair are flagged.
+        """
+        # Each adjacent pair must be within 24 hours, at least 2 hours each and 8+ hours in total
+        # (an open period has a NaN end, so its gap never qualifies)
+        pair_valid = [
+            next_start - end <= SPLIT_BERTH_WINDOW_SECONDS
+            and first >= SPLIT_BERTH_MIN_PERIOD_SECONDS
+            and second >= SPLIT_BERTH_MIN_PERIOD_SECONDS
+            and first + second >= SPLIT_BERTH_MIN_TOTAL_SECONDS
+            for next_start, end, first, second in zip(start_s[1:], end_s, duration_s, duration_s[1:])
+        ]
         
-        return sleeper_periods
+        # A period is split if it is valid as the first or as the second half of a pair
+        return [
+            as_first or as_second
+            for as_first, as_second in zip(pair_valid + [False], [False] + pair_valid)
+        ]
     
     def _check_advanced_violations(
         self, 
         cycle_entries: List[Dict], 
         current_time: datetime,
-        sleeper_berth_periods: List[SleeperBerthPeriod]
+        sleeper_berth_periods: List[SleeperBerthPeriod],
+        view: Optional['EntryView'] = None,
+        scan: Optional[ViolationScan] = None
     ) -> List[Violation]:
         """Check for violations using the rule engine"""
         violations = []
         
-        # Check each rule
-        for rule_id, rule_config in self.rule_engine.get_all_rules().items():
+        params = self.rule_engine.compiled_params
+        # Duration/status columns and per-entry results shared by every rule handler
+        if view is None:
+            view = EntryView.from_entries(cycle_entries)
+        if scan is None:
+            scan = ViolationScan.from_view(view, params)
+        
+        # Check each rule; iterate the live rule table rather than a copy
+        for rule_id, rule_config in self.rule_engine.rules.items():
             if not rule_config.get('enabled', True):
                 continue
             
-            rule_violations = self._check_rule_violation(rule_id, rule_config, cycle_entries, current_time, sleeper_berth_periods)
-            violations.extend(rule_violations)
+            handler = self._rule_handlers.get(rule_id)
+            if handler is not None:
+                violations.extend(handler(rule_config, params, view, scan, current_time, sleeper_berth_periods))
         
         return violations
     
@@ -476,76 +993,87 @@ class AdvancedHOSComplianceEngine:
         sleeper_berth_periods: List[SleeperBerthPeriod]
     ) -> List[Violation]:
         """Check a specific rule for violations"""
-        violations = []
-        
-        if rule_id == 'driving_limit_11_hours':
-            violations.extend(self._check_driving_limit_rule(rule_config, cycle_entries))
-        elif rule_id == 'on_duty_limit_14_hours':
-            violations.extend(self._check_on_duty_limit_rule(rule_config, cycle_entries))
-        elif rule_id == '30_min_break_requirement':
-            violations.extend(self._check_30_min_break_rule(rule_config, cycle_entries, current_time))
-        elif rule_id == 'cycle_hours_limit':
-            violations.extend(self._check_cycle_hours_rule(rule_config, cycle_entries))
-        elif rule_id == '34_hour_restart':
-            violations.extend(self._check_34_hour_restart_rule(rule_config, cycle_entries, sleeper_berth_periods))
-        elif rule_id == 'sleeper_berth_split':
-            violations.extend(self._check_sleeper_berth_split_rule(rule_config, sleeper_berth_periods))
-        
-        return violations
+        handler = self._rule_handlers.get(rule_id)
+        if handler is None:
+            return []
+        params = self.rule_engine.compiled_params
+        view = EntryView.from_entries(cycle_entries)
+        return handler(
+            rule_config, params, view, ViolationScan.from_view(view, params),
+            current_time, sleeper_berth_periods
+        )
     
-    def _check_driving_limit_rule(self, rule_config: Dict[str, Any], cycle_entries: List[Dict]) -> List[Violation]:
+    def _check_driving_limit_rule(
+        self,
+        rule_config: Dict[str, Any],
+        params: CompiledRuleParams,
+        view: 'EntryView',
+        scan: ViolationScan,
+        current_time: datetime,
+        sleeper_berth_periods: List[SleeperBerthPeriod]
+    ) -> List[Violation]:
         """Check 11-hour driving limit rule"""
         violations = []
-        max_hours = rule_config['parameters']['max_hours']
-        
-        for entry in cycle_entries:
-            if entry['duty_status'] == DutyStatus.DRIVING.value:
-                duration = entry['end_time'] - entry['start_time']
-                hours = Decimal(str(duration.total_seconds() / 3600))
-                
-                if hours > max_hours:
-                    violations.append(Violation(
-                        violation_type='driving_over_11',
-                        description=f'Drove for {hours:.1f} hours without 10-hour break (limit: {max_hours}h)',
-                        severity=rule_config['severity'],
-                        occurred_at=entry['start_time'],
-                        duration_over=timedelta(hours=float(hours - max_hours)),
-                        requires_immediate_action=True,
-                        compliance_impact='Driver must take 10-hour break before driving again'
-                    ))
+        max_hours = params.max_driving
+        
+        for index in scan.driving_over:
+            hours = view.duration_s[index] / SECONDS_PER_HOUR
+            violations.append(Violation(
+                violation_type='driving_over_11',
+                description=f'Drove for {hours:.1f} hours without 10-hour break (limit: {max_hours}h)',
+                severity=rule_config['severity'],
+                occurred_at=view.entries[index]['start_time'],
+                duration_over=timedelta(hours=hours - max_hours),
+                requires_immediate_action=True,
+                compliance_impact='Driver must take 10-hour break before driving again'
+            ))
         
         return violations
     
-    def _check_on_duty_limit_rule(self, rule_config: Dict[str, Any], cycle_entries: List[Dict]) -> List[Violation]:
+    def _check_on_duty_limit_rule(
+        self,
+        rule_config: Dict[str, Any],
+        params: CompiledRuleParams,
+        view: 'EntryView',
+        scan: ViolationScan,
+        current_time: datetime,
+        sleeper_berth_periods: List[SleeperBerthPeriod]
+    ) -> List[Violation]:
         """Check 14-hour on-duty limit rule"""
         violations = []
-        max_hours = rule_config['parameters']['max_hours']
-        
-        for entry in cycle_entries:
-            if entry['duty_status'] in [DutyStatus.DRIVING.value, DutyStatus.ON_DUTY_NOT_DRIVING.value]:
-                duration = entry['end_time'] - entry['start_time']
-                hours = Decimal(str(duration.total_seconds() / 3600))
-                
-                if hours > max_hours:
-                    violations.append(Violation(
-                        violation_type='on_duty_over_14',
-                        description=f'On duty for {hours:.1f} hours without 10-hour break (limit: {max_hours}h)',
-                        severity=rule_config['severity'],
-                        occurred_at=entry['start_time'],
-                        duration_over=timedelta(hours=float(hours - max_hours)),
-                        requires_immediate_action=True,
-                        compliance_impact='Driver must take 10-hour break before any duty'
-                    ))
+        max_hours = params.max_on_duty
+        
+        for index in scan.on_duty_over:
+            hours = view.duration_s[index] / SECONDS_PER_HOUR
+            violations.append(Violation(
+                violation_type='on_duty_over_14',
+                description=f'On duty for {hours:.1f} hours without 10-hour break (limit: {max_hours}h)',
+                severity=rule_config['severity'],
+                occurred_at=view.entries[index]['start_time'],
+                duration_over=timedelta(hours=hours - max_hours),
+                requires_immediate_action=True,
+                compliance_impact='Driver must take 10-hour break before any duty'
+            ))
         
         return violations
     
-    def _check_30_min_break_rule(self, rule_config: Dict[str, Any], cycle_entries: List[Dict], current_time: datetime) -> List[Violation]:
+    def _check_30_min_break_rule(
+        self,
+        rule_config: Dict[str, Any],
+        params: CompiledRuleParams,
+        view: 'EntryView',
+        scan: ViolationScan,
+        current_time: datetime,
+        sleeper_berth_periods: List[SleeperBerthPeriod]
+    ) -> List[Violation]:
         """Check 30-minute break requirement rule"""
         violations = []
-        break_threshold = rule_config['parameters']['break_threshold']
-        min_break = rule_config['parameters']['min_break']
+        break_threshold = params.break_threshold
+        min_break = params.min_break
         
-        driving_hours = self._calculate_driving_hours_since_break(cycle_entries, current_time)
+        driving_hours = scan.driving_hours_since_break
+        if driving_hours is None:
+            driving_hours = self._calculate_driving_hours_since_break(view.entries, current_time, view=view)
         if driving_hours > break_threshold:
             violations.append(Violation(
                 violation_type='no_30_min_break',
@@ -558,29 +1086,46 @@ class AdvancedHOSComplianceEngine:
         
         return violations
     
-    def _check_cycle_hours_rule(self, rule_config: Dict[str, Any], cycle_entries: List[Dict]) -> List[Violation]:
+    def _check_cycle_hours_rule(
+        self,
+        rule_config: Dict[str, Any],
+        params: CompiledRuleParams,
+        view: 'EntryView',
+        scan: ViolationScan,
+        current_time: datetime,
+        sleeper_berth_periods: List[SleeperBerthPeriod]
+    ) -> List[Violation]:
         """Check cycle hours limit rule"""
         violations = []
-        cycle_hours = rule_config['parameters']['cycle_hours']
+        cycle_hours = params.cycle_hours
         
-        total_hours = self._calculate_cycle_hours(cycle_entries)
+        total_hours = scan.cycle_hours
         
         if total_hours > cycle_hours:
             violations.append(Violation(
                 violation_type='cycle_hours_exceeded',
                 description=f'Exceeded {cycle_hours}-hour cycle limit by {total_hours - cycle_hours:.1f} hours',
                 severity=rule_config['severity'],
-                occurred_at=cycle_entries[-1]['end_time'] if cycle_entries else datetime.now(),
+                # Hours exceeded implies closed entries exist; an open last entry is still running now
+                occurred_at=view.entries[-1]['end_time'] or current_time,
                 requires_immediate_action=True,
                 compliance_impact='Driver must take 34-hour restart or wait for cycle reset'
             ))
         
         return violations
     
-    def _check_34_hour_restart_rule(self, rule_config: Dict[str, Any], cycle_entries: List[Dict], sleeper_berth_periods: List[SleeperBerthPeriod]) -> List[Violation]:
+    def _check_34_hour_restart_rule(
+        self,
+        rule_config: Dict[str, Any],
+        params: CompiledRuleParams,
+        view: 'EntryView',
+        scan: ViolationScan,
+        current_time: datetime,
+        sleeper_berth_periods: List[SleeperBerthPeriod]
+    ) -> List[Violation]:
         """Check 34-hour restart rule"""
         violations = []
-        min_hours = rule_config['parameters']['min_hours']
+        min_hours = params.min_restart
         
         # Check if there's a valid 34-hour restart period
         valid_restart_found = False
@@ -589,27 +1134,31 @@ class AdvancedHOSComplianceEngine:
                 valid_restart_found = True
                 break
         
-        # Check for invalid restart attempts
-        for entry in cycle_entries:
-            if (entry['duty_status'] == DutyStatus.OFF_DUTY.value and 
-                entry['end_time'] and 
-                entry['end_time'] - entry['start_time'] < timedelta(hours=min_hours)):
-                
-                violations.append(Violation(
-                    violation_type='invalid_34_hour_restart',
-                    description=f'Attempted 34-hour restart with only {(entry["end_time"] - entry["start_time"]).total_seconds()/3600:.1f} hours off duty (minimum: {min_hours}h)',
-                    severity=rule_config['severity'],
-                    occurred_at=entry['start_time'],
-                    compliance_impact='Restart attempt invalid, cycle continues'
-                ))
+        # Check for invalid restart attempts (open entries have a NaN duration and are skipped)
+        for index in scan.restart_too_short:
+            violations.append(Violation(
+                violation_type='invalid_34_hour_restart',
+                description=f'Attempted 34-hour restart with only {view.duration_s[index] / SECONDS_PER_HOUR:.1f} hours off duty (minimum: {min_hours}h)',
+                severity=rule_config['severity'],
+                occurred_at=view.entries[index]['start_time'],
+                compliance_impact='Restart attempt invalid, cycle continues'
+            ))
         
         return violations
     
-    def _check_sleeper_berth_split_rule(self, rule_config: Dict[str, Any], sleeper_berth_periods: List[SleeperBerthPeriod]) -> List[Violation]:
+    def _check_sleeper_berth_split_rule(
+        self,
+        rule_config: Dict[str, Any],
+        params: CompiledRuleParams,
+        view: 'EntryView',
+        scan: ViolationScan,
+        current_time: datetime,
+        sleeper_berth_periods: List[SleeperBerthPeriod]
+    ) -> List[Violation]:
         """Check sleeper berth split rule"""
         violations = []
-        min_first_period = rule_config['parameters']['min_first_period']
-        min_second_period = rule_config['parameters']['min_second_period']
+        min_first_period = params.min_first_sleeper_berth
+        min_second_period = params.min_second_sleeper_berth
         
         # Check for invalid split berth periods
         split_periods = [p for p in sleeper_berth_periods if p.split_berth_period]
@@ -642,7 +1191,8 @@ class AdvancedHOSComplianceEngine:
         self, 
         log_entries: List[Dict], 
         violations: List[Violation], 
-        current_time: datetime
+        current_time: datetime,
+        view: Optional[EntryView] = None
     ) -> ComplianceAnalytics:
         """Calculate comprehensive compliance analytics"""
         analytics = ComplianceAnalytics()
@@ -651,62 +1201,54 @@ class AdvancedHOSComplianceEngine:
         analytics.total_violations = len(violations)
         
         # Group violations by type and severity
-        for violation in violations:
-            analytics.violations_by_type[violation.violation_type] = analytics.violations_by_type.get(violation.violation_type, 0) + 1
-            analytics.violations_by_severity[violation.severity.value] = analytics.violations_by_severity.get(violation.severity.value, 0) + 1
+        analytics.violations_by_type = dict(Counter(v.violation_type for v in violations))
+        analytics.violations_by_severity = dict(Counter(v.severity.value for v in violations))
         
         # Calculate compliance score (100 - penalty points)
-        penalty_points = 0
-        for violation in violations:
-            if violation.severity == ViolationSeverity.CRITICAL:
-                penalty_points += 20
-            elif violation.severity == ViolationSeverity.MAJOR:
-                penalty_points += 10
-            elif violation.severity == ViolationSeverity.MINOR:
-                penalty_points += 5
-        
-        analytics.compliance_score = max(Decimal('0.00'), Decimal('100.00') - Decimal(str(penalty_points)))
-        
-        # Calculate cycle efficiency
-        if log_entries:
-            total_hours = sum((entry['end_time'] - entry['start_time']).total_seconds() / 3600 
-                            for entry in log_entries if entry['end_time'])
-            driving_hours = sum((entry['end_time'] - entry['start_time']).total_seconds() / 3600 
-                              for entry in log_entries if entry['duty_status'] == DutyStatus.DRIVING.value and entry['end_time'])
-            
-            if total_hours > 0:
-                analytics.cycle_efficiency = Decimal(str(driving_hours / total_hours * 100))
+        penalty_points = sum(SEVERITY_PENALTY_POINTS.get(v.severity, 0) for v in violations)
         
-        # Calculate restart frequency
-        restart_count = sum(1 for entry in log_entries 
-                          if entry['duty_status'] == DutyStatus.OFF_DUTY.value and 
-                          entry['end_time'] and 
-                          entry['end_time'] - entry['start_time'] >= timedelta(hours=34))
+        analytics.compliance_score = max(0.0, 100.0 - penalty_points)
         
         if log_entries:
+            if view is None:
+                view = EntryView.from_entries(log_entries)
+            
+            # Gather every per-entry total in a single pass over the log
+            total_hours = 0.0
+            driving_hours = 0.0
+            restart_count = 0
+            daily_hours = defaultdict(float)
+            for entry, duration, code in zip(log_entries, view.duration_s, view.status_code):
+                if math.isnan(duration):
+                    continue
+                hours = duration / SECONDS_PER_HOUR
+                total_hours += hours
+                daily_hours[entry['start_time'].date()] += hours
+                if code == _hos_kernels.DRIVING_CODE:
+                    driving_hours += hours
+                elif code == _hos_kernels.OFF_DUTY_CODE and hours >= 34:
+                    restart_count += 1
+            
+            # Calculate cycle efficiency
+            if total_hours > 0:
+                analytics.cycle_efficiency = driving_hours / total_hours * 100
+            
+            # Calculate restart frequency
             days_span = (current_time - log_entries[0]['start_time']).days + 1
-            analytics.restart_frequency = Decimal(str(restart_count / days_span * 7))  # Restarts per week
-        
-        # Calculate average daily hours
-        if log_entries:
-            daily_hours = {}
-            for entry in log_entries:
-                date = entry['start_time'].date()
-                if date not in daily_hours:
-                    daily_hours[date] = 0
-                daily_hours[date] += (entry['end_time'] - entry['start_time']).total_seconds() / 3600
+            analytics.restart_frequency = restart_count / days_span * 7  # Restarts per week
             
+            # Calculate average daily hours
             if daily_hours:
-                analytics.average_daily_hours = Decimal(str(sum(daily_hours.values()) / len(daily_hours)))
+                analytics.average_daily_hours = sum(daily_hours.values()) / len(daily_hours)
         
         # Identify risk factors
-        if analytics.compliance_score < Decimal('80.00'):
+        if analytics.compliance_score < 80.0:
             analytics.risk_factors.append('Low compliance score')
         if analytics.total_violations > 5:
             analytics.risk_factors.append('High violation count')
-        if analytics.restart_frequency > Decimal('2.0'):
+        if analytics.restart_frequency > 2.0:
             analytics.risk_factors.append('Frequent restarts')
-        if analytics.average_daily_hours > Decimal('12.0'):
+        if analytics.average_daily_hours > 12.0:
             analytics.risk_factors.append('High daily hours')
         
         return analytics
@@ -715,19 +1257,11 @@ class AdvancedHOSComplianceEngine:
         self, 
         log_entries: List[Dict], 
         current_time: datetime,
-        sleeper_berth_periods: List[SleeperBerthPeriod]
-    ) -> Dict[str, Any]:
-        """Get advanced restart recommendations"""
-        recommendations = {
-            'last_restart': None,
-            'time_since_restart_hours': None,
-            'current_cycle_hours': 0.0,
-            'cycle_limit': float(self.limits.cycle_hours),
-            'cycle_progress_percent': 0.0,
-            'recommendations': [],
-            'optimal_restart_time': None,
-            'sleeper_berth_options': []
-        }
+        sleeper_berth_periods: List[SleeperBerthPeriod],
+        cycle_hours: Optional[float] = None
+    ) -> RestartRecommendations:
+        """Get advanced restart recommendations (pass cycle_hours when already known)"""
+        recommendations = RestartRecommendations(cycle_limit=self._cycle_limit)
         
         # Find the last valid 34-hour restart
         last_restart = None
@@ -737,53 +1271,29 @@ class AdvancedHOSComplianceEngine:
                 break
         
         if last_restart:
-            recommendations['last_restart'] = last_restart.isoformat()
-            recommendations['time_since_restart_hours'] = (current_time - last_restart).total_seconds() / 3600
+            recommendations.last_restart = last_restart.isoformat()
+            recommendations.time_since_restart_hours = (current_time - last_restart).total_seconds() / SECONDS_PER_HOUR
         
-        # Calculate current cycle hours
-        cycle_start = self._calculate_advanced_cycle_start(log_entries, current_time)
-        cycle_entries = [entry for entry in log_entries if entry['start_time'] >= cycle_start]
-        cycle_hours = self._calculate_cycle_hours(cycle_entries)
+        # Calculate current cycle hours, converting the entries to columns only once
+        if cycle_hours is None:
+            view = EntryView.from_entries(log_entries)
+            cycle_start = self._calculate_advanced_cycle_start(log_entries, current_time, view=view)
+            cycle_view = view.tail(_cycle_start_index(view, cycle_start))
+            cycle_hours = self._calculate_cycle_hours(cycle_view.entries, view=cycle_view)
         
-        recommendations['current_cycle_hours'] = float(cycle_hours)
-        recommendations['cycle_progress_percent'] = float(cycle_hours) / float(self.limits.cycle_hours) * 100
+        recommendations.current_cycle_hours = cycle_hours
+        recommendations.cycle_progress_percent = cycle_hours / self._cycle_limit * 100
         
         # Generate recommendations
-        if cycle_hours >= self.limits.cycle_hours * Decimal('0.9'):
-            recommendations['recommendations'].append({
-                'type': 'restart_immediate',
-                'message': 'Cycle limit nearly reached - 34-hour restart required immediately',
-                'priority': 'critical',
-                'action_required': True
-            })
-        elif cycle_hours >= self.limits.cycle_hours * Decimal('0.8'):
-            recommendations['recommendations'].append({
-                'type': 'restart_soon',
-                'message': 'Consider a 34-hour restart soon to reset your cycle',
-                'priority': 'high',
-                'action_required': False
-            })
+        if cycle_hours >= self._cycle_restart_now:
+            recommendations.recommendations.append(RESTART_IMMEDIATE_RECOMMENDATION)
+        elif cycle_hours >= self._cycle_restart_soon:
+            recommendations.recommendations.append(RESTART_SOON_RECOMMENDATION)
         
         # Calculate optimal restart time
-        if cycle_hours >= self.limits.cycle_hours * Decimal('0.7'):
-            optimal_time = current_time + timedelta(hours=1)  # Recommend restart in 1 hour
-            recommendations['optimal_restart_time'] = optimal_time.isoformat()
-        
-        # Sleeper berth options
-        recommendations['sleeper_berth_options'] = [
-            {
-                'type': 'single_period',
-                'description': 'Single 8+ hour sleeper berth period',
-                'minimum_hours': 8.0,
-                'benefits': ['Simplest option', 'Full cycle reset']
-            },
-            {
-                'type': 'split_period',
-                'description': 'Split sleeper berth (2+2 hours)',
-                'minimum_hours': 4.0,
-                'benefits': ['More flexible', 'Can be split across days']
-            }
-        ]
+        if cycle_hours >= self._cycle_plan_restart:
+            optimal_time = current_time + RESTART_RECOMMENDATION_LEAD  # Recommend restart in 1 hour
+            recommendations.optimal_restart_time = optimal_time.isoformat()
         
         return recommendations
     
@@ -792,26 +1302,29 @@ class AdvancedHOSComplianceEngine:
         cycle_entries: List[Dict], 
         current_time: datetime, 
         violations: List[Violation],
-        team_driving_info: Optional[TeamDrivingInfo]
+        team_driving_info: Optional[TeamDrivingInfo],
+        driving_hours: Optional[float] = None,
+        on_duty_hours: Optional[float] = None
     ) -> bool:
         """Advanced driving eligibility check with team driving support"""
         # Check for critical violations
-        critical_violations = [v for v in violations if v.severity == ViolationSeverity.CRITICAL]
-        if critical_violations:
+        if any(v.severity is ViolationSeverity.CRITICAL for v in violations):
             return False
         
         # Check team driving coordination
         if team_driving_info:
-            if team_driving_info.current_driver != TeamDrivingRole.DRIVER_1:
+            if not team_driving_info.is_driver1_active:
                 return False  # Only current driver can drive
         
         # Check 11-hour driving limit
-        driving_hours = self._calculate_driving_hours_since_break(cycle_entries, current_time)
+        if driving_hours is None:
+            driving_hours = self._calculate_driving_hours_since_break(cycle_entries, current_time)
         if driving_hours >= 11:
             return False
         
         # Check 14-hour on-duty limit
-        on_duty_hours = self._calculate_on_duty_hours_since_break(cycle_entries, current_time)
+        if on_duty_hours is None:
+            on_duty_hours = self._calculate_on_duty_hours_since_break(cycle_entries, current_time)
         if on_duty_hours >= 14:
             return False
         
@@ -822,16 +1335,17 @@ class AdvancedHOSComplianceEngine:
         cycle_entries: List[Dict], 
         current_time: datetime, 
         violations: List[Violation],
-        team_driving_info: Optional[TeamDrivingInfo]
+        team_driving_info: Optional[TeamDrivingInfo],
+        on_duty_hours: Optional[float] = None
     ) -> bool:
         """Advanced on-duty eligibility check"""
         # Check for critical violations
-        critical_violations = [v for v in violations if v.severity == ViolationSeverity.CRITICAL]
-        if critical_violations:
+        if any(v.severity is ViolationSeverity.CRITICAL for v in violations):
             return False
         
         # Check 14-hour on-duty limit
-        on_duty_hours = self._calculate_on_duty_hours_since_break(cycle_entries, current_time)
+        if on_duty_hours is None:
+            on_duty_hours = self._calculate_on_duty_hours_since_break(cycle_entries, current_time)
         if on_duty_hours >= 14:
             return False
         
@@ -841,17 +1355,20 @@ class AdvancedHOSComplianceEngine:
         self, 
         cycle_entries: List[Dict], 
         current_time: datetime, 
-        violations: List[Violation]
+        violations: List[Violation],
+        driving_hours: Optional[float] = None,
+        on_duty_hours: Optional[float] = None
     ) -> bool:
         """Advanced rest requirement check"""
         # Check for violations that require rest
-        major_violations = [v for v in violations if v.severity in [ViolationSeverity.MAJOR, ViolationSeverity.CRITICAL]]
-        if major_violations:
+        if any(v.severity in REST_REQUIRED_SEVERITIES for v in violations):
             return True
         
         # Check if approaching limits
-        driving_hours = self._calculate_driving_hours_since_break(cycle_entries, current_time)
-        on_duty_hours = self._calculate_on_duty_hours_since_break(cycle_entries, current_time)
+        if driving_hours is None:
+            driving_hours = self._calculate_driving_hours_since_break(cycle_entries, current_time)
+        if on_duty_hours is None:
+            on_duty_hours = self._calculate_on_duty_hours_since_break(cycle_entries, current_time)
         
         if driving_hours >= 10 or on_duty_hours >= 13:
             return True
@@ -859,97 +1376,112 @@ class AdvancedHOSComplianceEngine:
         return False
     
     # Helper methods (keeping existing implementations)
-    def _calculate_cycle_hours(self, cycle_entries: List[Dict]) -> Decimal:
+    def _calculate_cycle_hours(self, cycle_entries: List[Dict], view: Optional[EntryView] = None) -> float:
         """Calculate total hours used in current cycle"""
-        total_hours = Decimal('0.00')
-        
-        for entry in cycle_entries:
-            if entry['duty_status'] in [DutyStatus.DRIVING.value, DutyStatus.ON_DUTY_NOT_DRIVING.value]:
-                duration = entry['end_time'] - entry['start_time']
-                hours = Decimal(str(duration.total_seconds() / 3600))
-                total_hours += hours
-        
-        return total_hours
+        if view is None:
+            view = EntryView.from_entries(cycle_entries)
+        total_s = _hos_kernels.sum_durations(
+            view.duration_s, view.status_code, view.start_s,
+            _hos_kernels.DRIVING_CODE, _hos_kernels.ON_DUTY_NOT_DRIVING_CODE, -math.inf
+        )
+        return total_s / SECONDS_PER_HOUR
     
-    def _calculate_consecutive_off_duty_hours(self, log_entries: List[Dict], current_time: datetime) -> Decimal:
+    def _calculate_consecutive_off_duty_hours(
+        self,
+        log_entries: List[Dict],
+        current_time: datetime,
+        view: Optional[EntryView] = None,
+        marks: Optional[OffDutyMarks] = None
+    ) -> float:
         """Calculate consecutive off-duty hours"""
         if not log_entries:
-            return Decimal('0.00')
+            return 0.0
+        if view is None:
+            view = EntryView.from_entries(log_entries)
+        if marks is None:
+            marks = OffDutyMarks.from_view(view)
         
         # Find the last off-duty period
-        last_off_duty = None
-        for entry in reversed(log_entries):
-            if entry['duty_status'] == DutyStatus.OFF_DUTY.value:
-                last_off_duty = entry
-                break
+        last_off_duty = marks.last_off_duty
         
-        if last_off_duty and last_off_duty['end_time']:
-            duration = current_time - last_off_duty['end_time']
-            return Decimal(str(duration.total_seconds() / 3600))
+        # An open off-duty period has a NaN end and counts as zero
+        if last_off_duty >= 0 and not math.isnan(view.end_s[last_off_duty]):
+            return (current_time.timestamp() - view.end_s[last_off_duty]) / SECONDS_PER_HOUR
         
-        return Decimal('0.00')
+        return 0.0
     
-    def _get_last_30_min_break(self, log_entries: List[Dict], current_time: datetime) -> Optional[datetime]:
+    def _get_last_30_min_break(
+        self,
+        log_entries: List[Dict],
+        current_time: datetime,
+        view: Optional[EntryView] = None,
+        marks: Optional[OffDutyMarks] = None
+    ) -> Optional[datetime]:
         """Get the last 30-minute break"""
-        for entry in reversed(log_entries):
-            if (entry['duty_status'] == DutyStatus.OFF_DUTY.value and 
-                entry['end_time'] and 
-                entry['end_time'] - entry['start_time'] >= timedelta(minutes=30)):
-                return entry['end_time']
+        if view is None:
+            view = EntryView.from_entries(log_entries)
+        if marks is None:
+            marks = OffDutyMarks.from_view(view)
+        
+        if marks.last_break >= 0:
+            return view.entries[marks.last_break]['end_time']
         
         return None
     
-    def _calculate_driving_hours_since_break(self, log_entries: List[Dict], current_time: datetime) -> Decimal:
-        """Calculate driving hours since last 30-minute break"""
-        last_break = self._get_last_30_min_break(log_entries, current_time)
-        
-        if last_break is None:
-            # If no break found, calculate all driving hours
-            driving_hours = Decimal('0.00')
-            for entry in log_entries:
-                if entry['duty_status'] == DutyStatus.DRIVING.value:
-                    duration = entry['end_time'] - entry['start_time']
-                    hours = Decimal(str(duration.total_seconds() / 3600))
-                    driving_hours += hours
-            return driving_hours
+    def _hours_since_breaks(
+        self,
+        view: EntryView,
+        current_time: datetime,
+        marks: Optional[OffDutyMarks] = None
+    ) -> Tuple[float, float]:
+        """Driving hours since the last 30-minute break and on-duty hours since the last 10-hour break"""
+        if marks is None:
+            marks = OffDutyMarks.from_view(view)
+        
+        # If no break found, count all driving hours
+        driving_since_s = view.end_s[marks.last_break] if marks.last_break >= 0 else -math.inf
+        # Find last 10-hour off-duty period, or look back 14 hours
+        if marks.last_rest >= 0:
+            on_duty_since_s = view.end_s[marks.last_rest]
+            # Entries are start-sorted, so nothing up to the rest starts after it ends
+            # (and the last break is never earlier than the last rest)
+            first = marks.last_rest + 1
         else:
-            # Calculate driving hours since the last break
-            cutoff_time = last_break
-            driving_hours = Decimal('0.00')
-            for entry in log_entries:
-                if (entry['duty_status'] == DutyStatus.DRIVING.value and 
-                    entry['start_time'] >= cutoff_time):
-                    duration = entry['end_time'] - entry['start_time']
-                    hours = Decimal(str(duration.total_seconds() / 3600))
-                    driving_hours += hours
-            return driving_hours
+            on_duty_since_s = current_time.timestamp() - ON_DUTY_LOOKBACK_SECONDS
+            # On-duty time only counts inside the lookback, found by bisecting the sorted starts;
+            # driving time since the last break may reach further back
+            first = bisect_left(view.start_s, on_duty_since_s)
+            if marks.last_break < 0:
+                first = 0
+            elif marks.last_break < first:
+                first = marks.last_break + 1
+        
+        driving_s, on_duty_s = _hos_kernels.hours_since(
+            view.duration_s, view.status_code, view.start_s, first, driving_since_s, on_duty_since_s
+        )
+        return driving_s / SECONDS_PER_HOUR, on_duty_s / SECONDS_PER_HOUR
+    
+    def _calculate_driving_hours_since_break(
+        self,
+        log_entries: List[Dict],
+        current_time: datetime,
+        view: Optional[EntryView] = None
+    ) -> float:
+        """Calculate driving hours since last 30-minute break"""
+        if view is None:
+            view = EntryView.from_entries(log_entries)
+        return self._hours_since_breaks(view, current_time)[0]
     
-    def _calculate_on_duty_hours_since_break(self, cycle_entries: List[Dict], current_time: datetime) -> Decimal:
+    def _calculate_on_duty_hours_since_break(
+        self,
+        cycle_entries: List[Dict],
+        current_time: datetime,
+        view: Optional[EntryView] = None
+    ) -> float:
         """Calculate on-duty hours since last 10-hour break"""
-        # Find last 10-hour off-duty period
-        last_10_hour_break = None
-        for entry in reversed(cycle_entries):
-            if (entry['duty_status'] == DutyStatus.OFF_DUTY.value and 
-                entry['end_time'] and 
-                entry['end_time'] - entry['start_time'] >= timedelta(hours=10)):
-                last_10_hour_break = entry['end_time']
-                break
-        
-        if last_10_hour_break is None:
-            # Look back 14 hours
-            cutoff_time = current_time - timedelta(hours=14)
-        else:
-            cutoff_time = last_10_hour_break
-        
-        on_duty_hours = Decimal('0.00')
-        for entry in cycle_entries:
-            if (entry['duty_status'] in [DutyStatus.DRIVING.value, DutyStatus.ON_DUTY_NOT_DRIVING.value] and 
-                entry['start_time'] >= cutoff_time):
-                duration = entry['end_time'] - entry['start_time']
-                hours = Decimal(str(duration.total_seconds() / 3600))
-                on_duty_hours += hours
-        
-        return on_duty_hours
+        if view is None:
+            view = EntryView.from_entries(cycle_entries)
+        return self._hours_since_breaks(view, current_time)[1]
 
 
 class ViolationResolutionWorkflow:
@@ -969,25 +1501,40 @@ class ViolationResolutionWorkflow:
         violation: Violation, 
         resolution_notes: str, 
         resolved_by: str,
-        action: str = 'resolve'
+        action: str = 'resolve',
+        resolved_at: Optional[datetime] = None
     ) -> bool:
-        """Resolve a violation with workflow validation"""
+        """Resolve a violation with workflow validation (resolved_at defaults to now)"""
         try:
             if action not in self.workflow_steps.get(violation.status, []):
                 raise ValidationError(f"Action '{action}' not allowed for status '{violation.status.value}'")
             
             violation.resolution_notes = resolution_notes
             violation.resolved_by = resolved_by
-            violation.resolved_at = timezone.now()
+            violation.resolved_at = resolved_at if resolved_at is not None else timezone.now()
             violation.status = ViolationStatus.RESOLVED
             
-            logger.info(f"Violation {violation.violation_type} resolved by {resolved_by}")
+            logger.info("Violation %s resolved by %s", violation.violation_type, resolved_by)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to resolve violation: {e}")
+            logger.error("Failed to resolve violation: %s", e)
             return False
     
+    def resolve_many(
+        self,
+        violations: List[Violation],
+        resolution_notes: str,
+        resolved_by: str,
+        action: str = 'resolve'
+    ) -> List[bool]:
+        """Resolve a batch of violations with one shared resolution time, returning each result"""
+        resolved_at = timezone.now()
+        return [
+            self.resolve_violation(violation, resolution_notes, resolved_by, action, resolved_at=resolved_at)
+            for violation in violations
+        ]
+    
     def escalate_violation(self, violation: Violation, escalation_reason: str) -> bool:
         """Escalate a violation to higher authority"""
         try:
@@ -995,11 +1542,11 @@ class ViolationResolutionWorkflow:
             violation.escalation_level += 1
             violation.resolution_notes += f"\nEscalated: {escalation_reason}"
             
-            logger.info(f"Violation {violation.violation_type} escalated to level {violation.escalation_level}")
+            logger.info("Violation %s escalated to level %s", violation.violation_type, violation.escalation_level)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to escalate violation: {e}")
+            logger.error("Failed to escalate violation: %s", e)
             return False
 
 
@@ -1020,15 +1567,21 @@ class TeamDrivingCoordinator:
             )
             
             self.active_teams[team_id] = team_info
-            logger.info(f"Created team {team_id} with drivers {driver_1_id} and {driver_2_id}")
+            logger.info("Created team %s with drivers %s and %s", team_id, driver_1_id, driver_2_id)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to create team {team_id}: {e}")
+            logger.error("Failed to create team %s: %s", team_id, e)
             return False
     
-    def handoff_driving(self, team_id: str, handoff_location: str, notes: str = "") -> bool:
-        """Coordinate driving handoff between team members"""
+    def handoff_driving(
+        self,
+        team_id: str,
+        handoff_location: str,
+        notes: str = "",
+        handoff_time: Optional[datetime] = None
+    ) -> bool:
+        """Coordinate driving handoff between team members (handoff_time defaults to now)"""
         try:
             if team_id not in self.active_teams:
                 raise ValidationError(f"Team {team_id} not found")
@@ -1036,20 +1589,21 @@ class TeamDrivingCoordinator:
             team_info = self.active_teams[team_id]
             
             # Switch current driver
-            if team_info.current_driver == TeamDrivingRole.DRIVER_1:
+            if team_info.is_driver1_active:
                 team_info.current_driver = TeamDrivingRole.DRIVER_2
             else:
                 team_info.current_driver = TeamDrivingRole.DRIVER_1
+            team_info.is_driver1_active = not team_info.is_driver1_active
             
-            team_info.handoff_time = timezone.now()
+            team_info.handoff_time = handoff_time if handoff_time is not None else timezone.now()
             team_info.handoff_location = handoff_location
             team_info.coordination_notes = notes
             
-            logger.info(f"Team {team_id} handoff to {team_info.current_driver.value} at {handoff_location}")
+            logger.info("Team %s handoff to %s at %s", team_id, team_info.current_driver.value, handoff_location)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to handoff driving for team {team_id}: {e}")
+            logger.error("Failed to handoff driving for team %s: %s", team_id, e)
             return False
     
     def get_team_status(self, team_id: str) -> Optional[TeamDrivingInfo]:
@@ -1063,57 +1617,97 @@ def create_compliance_engine(cycle_type: CycleType = CycleType.SEVENTY_EIGHT) ->
     return AdvancedHOSComplianceEngine(cycle_type)
 
 
+@functools.lru_cache(maxsize=None)
+def _shared_compliance_engine(cycle_type: CycleType) -> AdvancedHOSComplianceEngine:
+    engine = AdvancedHOSComplianceEngine(cycle_type)
+    engine.rule_engine.freeze()
+    return engine
+
+
+def get_compliance_engine(cycle_type: CycleType = CycleType.SEVENTY_EIGHT) -> AdvancedHOSComplianceEngine:
+    """
+    Get the shared compliance engine for cycle_type, built once per process
+    
+    Calculations keep no state on the engine, so one instance serves every
+    request and thread. Its rules are frozen; use create_compliance_engine
+    for an engine whose rules will be customised.
+    """
+    return _shared_compliance_engine(cycle_type)
+
+
+# Placeholder for a duty_status key that is absent, as opposed to present but None
+_MISSING = object()
+
+
 # Utility functions for common operations
 def validate_log_entry(entry: Dict[str, Any]) -> Tuple[bool, List[str]]:
     """Validate a single log entry"""
     errors = []
     
+    # One lookup per field; the values are reused by the checks below
+    start_time = entry.get('start_time')
+    end_time = entry.get('end_time')
+    duty_status = entry.get('duty_status', _MISSING)
+    
     # Check required fields
-    required_fields = ['start_time', 'end_time', 'duty_status']
-    for field in required_fields:
-        if field not in entry or entry[field] is None:
-            errors.append(f"Missing required field: {field}")
+    if start_time is None:
+        errors.append("Missing required field: start_time")
+    if end_time is None:
+        errors.append("Missing required field: end_time")
+    if duty_status is None or duty_status is _MISSING:
+        errors.append("Missing required field: duty_status")
     
     # Check time validity
-    if 'start_time' in entry and 'end_time' in entry and entry['start_time'] and entry['end_time']:
-        if entry['start_time'] >= entry['end_time']:
-            errors.append("Start time must be before end time")
+    if start_time and end_time and start_time >= end_time:
+        errors.append("Start time must be before end time")
     
     # Check duty status validity
-    if 'duty_status' in entry:
-        valid_statuses = [status.value for status in DutyStatus]
-        if entry['duty_status'] not in valid_statuses:
-            errors.append(f"Invalid duty status: {entry['duty_status']}")
+    if duty_status is not _MISSING:
+        # Non-string values (e.g. a JSON list) are invalid and cannot be hashed into the set lookup
+        if not isinstance(duty_status, str) or duty_status not in VALID_DUTY_STATUSES:
+            errors.append(f"Invalid duty status: {duty_status}")
     
     return len(errors) == 0, errors
 
 
-def calculate_cycle_efficiency(log_entries: List[Dict]) -> Decimal:
-    """Calculate cycle efficiency percentage"""
-    if not log_entries:
-        return Decimal('0.00')
+def calculate_cycle_efficiency(log_entries: Union[List[Dict], EntryView]) -> float:
+    """Calculate cycle efficiency percentage (accepts log entries or an EntryView of them)"""
+    view = log_entries if isinstance(log_entries, EntryView) else EntryView.from_entries(log_entries)
+    if not view.entries:
+        return 0.0
     
-    total_hours = sum((entry['end_time'] - entry['start_time']).total_seconds() / 3600 
-                     for entry in log_entries if entry['end_time'])
-    driving_hours = sum((entry['end_time'] - entry['start_time']).total_seconds() / 3600 
-                       for entry in log_entries 
-                       if entry['duty_status'] == DutyStatus.DRIVING.value and entry['end_time'])
+    # Closed-entry and driving totals come out of one pass over the duration column
+    total_s, driving_s = _hos_kernels.closed_and_driving_seconds(view.duration_s, view.status_code)
     
-    if total_hours == 0:
-        return Decimal('0.00')
+    if total_s == 0:
+        return 0.0
     
-    return Decimal(str(driving_hours / total_hours * 100))
+    return driving_s / total_s * 100
+
+
+@dataclass(slots=True)
+class ComplianceSummary(_FieldMapping):
+    """Headline compliance figures for a driver"""
+    can_drive: bool
+    can_be_on_duty: bool
+    needs_rest: bool
+    compliance_score: float
+    total_violations: int
+    cycle_progress: float
+    risk_level: str
+    recommendations: List[Mapping[str, Any]]
 
 
-def get_compliance_summary(hos_status: HOSStatus) -> Dict[str, Any]:
+def get_compliance_summary(hos_status: HOSStatus) -> ComplianceSummary:
     """Get a summary of compliance status"""
-    return {
-        'can_drive': hos_status.can_drive,
-        'can_be_on_duty': hos_status.can_be_on_duty,
-        'needs_rest': hos_status.needs_rest,
-        'compliance_score': float(hos_status.compliance_analytics.compliance_score) if hos_status.compliance_analytics else 0.0,
-        'total_violations': hos_status.compliance_analytics.total_violations if hos_status.compliance_analytics else 0,
-        'cycle_progress': float(hos_status.hours_used_this_cycle) / float(hos_status.hours_available + hos_status.hours_used_this_cycle) * 100,
-        'risk_level': 'high' if hos_status.compliance_analytics and hos_status.compliance_analytics.compliance_score < 80 else 'low',
-        'recommendations': hos_status.restart_recommendations.get('recommendations', [])
-    }
\ No newline at end of file
+    analytics = hos_status.compliance_analytics
+    return ComplianceSummary(
+        can_drive=hos_status.can_drive,
+        can_be_on_duty=hos_status.can_be_on_duty,
+        needs_rest=hos_status.needs_rest,
+        compliance_score=analytics.compliance_score if analytics else 0.0,
+        total_violations=analytics.total_violations if analytics else 0,
+        cycle_progress=hos_status.hours_used_this_cycle / (hos_status.hours_available + hos_status.hours_used_this_cycle) * 100,
+        risk_level='high' if analytics and analytics.compliance_score < 80 else 'low',
+        recommendations=hos_status.restart_recommendations.get('recommendations', [])
+    )
\ No newline at end of file
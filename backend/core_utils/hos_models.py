@@ -3,31 +3,41 @@ Enhanced HOS Models for Advanced Compliance Features
 Extends existing models with team driving, violation workflow, and analytics support
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Now
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from decimal import Decimal
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 import logging
 
+from .tasks import check_log_entries_compliance
+
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
 
+class TeamRole(models.IntegerChoices):
+    """
+    Roles in a driving team
+    
+    The HOS choice fields are stored as small integers; the API shows the
+    lowercase member name (e.g. 'driver_1', see ChoiceNameField).
+    """
+    
+    DRIVER_1 = 1, 'Driver 1'
+    DRIVER_2 = 2, 'Driver 2'
+    RELIEF_DRIVER = 3, 'Relief Driver'
+
+
 class TeamDriving(models.Model):
     """Team driving coordination and management"""
     
-    TEAM_ROLES = [
-        ('driver_1', 'Driver 1'),
-        ('driver_2', 'Driver 2'),
-        ('relief_driver', 'Relief Driver'),
-    ]
-    
     team_id = models.CharField(max_length=50, unique=True)
     driver_1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='team_driver_1')
     driver_2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='team_driver_2')
-    current_driver = models.CharField(max_length=20, choices=TEAM_ROLES, default='driver_1')
+    current_driver = models.PositiveSmallIntegerField(choices=TeamRole.choices, default=TeamRole.DRIVER_1)
     
     # Coordination details
     handoff_time = models.DateTimeField(null=True, blank=True)
@@ -36,8 +46,8 @@ class TeamDriving(models.Model):
     
     # Status
     is_active = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    updated_at = models.DateTimeField(db_default=Now(), editable=False)  # Set on UPDATE by a trigger (migration 0012)
     
     class Meta:
         db_table = 'team_driving'
@@ -48,17 +58,19 @@ class TeamDriving(models.Model):
         return f"Team {self.team_id}: {self.driver_1.get_full_name()} & {self.driver_2.get_full_name()}"
 
 
+class WorkflowStatus(models.IntegerChoices):
+    """Violation workflow states"""
+    
+    PENDING = 1, 'Pending'
+    IN_REVIEW = 2, 'In Review'
+    RESOLVED = 3, 'Resolved'
+    DISPUTED = 4, 'Disputed'
+    ESCALATED = 5, 'Escalated'
+
+
 class ViolationWorkflow(models.Model):
     """Violation resolution workflow tracking"""
     
-    WORKFLOW_STATUS = [
-        ('pending', 'Pending'),
-        ('in_review', 'In Review'),
-        ('resolved', 'Resolved'),
-        ('disputed', 'Disputed'),
-        ('escalated', 'Escalated'),
-    ]
-    
     ESCALATION_LEVELS = [
         (0, 'No Escalation'),
         (1, 'Supervisor'),
@@ -67,8 +79,9 @@ class ViolationWorkflow(models.Model):
         (4, 'Executive'),
     ]
     
+    # Created with each violation by a database trigger (migration 0013)
     violation = models.OneToOneField('log_sheets.Violation', on_delete=models.CASCADE, related_name='workflow')
-    status = models.CharField(max_length=20, choices=WORKFLOW_STATUS, default='pending')
+    status = models.PositiveSmallIntegerField(choices=WorkflowStatus.choices, default=WorkflowStatus.PENDING)
     escalation_level = models.IntegerField(choices=ESCALATION_LEVELS, default=0)
     
     # Resolution details
@@ -77,8 +90,8 @@ class ViolationWorkflow(models.Model):
     resolved_at = models.DateTimeField(null=True, blank=True)
     
     # Workflow tracking
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    updated_at = models.DateTimeField(db_default=Now(), editable=False)  # Set on UPDATE by a trigger (migration 0012)
     
     class Meta:
         db_table = 'violation_workflows'
@@ -100,45 +113,42 @@ class ComplianceAnalytics(models.Model):
     total_violations = models.IntegerField(default=0)
     violations_by_type = models.JSONField(default=dict)
     violations_by_severity = models.JSONField(default=dict)
-    compliance_score = models.DecimalField(
-        max_digits=5, 
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('100.00'))],
-        default=Decimal('100.00')
+    compliance_score = models.FloatField(
+        validators=[MinValueValidator(0.0), MaxValueValidator(100.0)],
+        default=100.0
     )
     
     # Efficiency metrics
-    cycle_efficiency = models.DecimalField(
-        max_digits=5, 
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('100.00'))],
-        default=Decimal('0.00')
+    cycle_efficiency = models.FloatField(
+        validators=[MinValueValidator(0.0), MaxValueValidator(100.0)],
+        default=0.0
     )
-    restart_frequency = models.DecimalField(
-        max_digits=5, 
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.00'))],
-        default=Decimal('0.00')
+    restart_frequency = models.FloatField(
+        validators=[MinValueValidator(0.0)],
+        default=0.0
     )
-    average_daily_hours = models.DecimalField(
-        max_digits=4, 
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('24.00'))],
-        default=Decimal('0.00')
+    average_daily_hours = models.FloatField(
+        validators=[MinValueValidator(0.0), MaxValueValidator(24.0)],
+        default=0.0
     )
     
     # Risk factors
     risk_factors = models.JSONField(default=list)
     
     # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    updated_at = models.DateTimeField(db_default=Now(), editable=False)  # Set on UPDATE by a trigger (migration 0012)
     
     class Meta:
         db_table = 'compliance_analytics'
         verbose_name = 'Compliance Analytics'
         verbose_name_plural = 'Compliance Analytics'
         unique_together = ['driver', 'period_start', 'period_end']
+        # Containment lookups (e.g. risk_factors__contains=[...]) only need jsonb_path_ops
+        indexes = [
+            GinIndex(fields=['violations_by_type'], name='analytics_viol_type_gin', opclasses=['jsonb_path_ops']),
+            GinIndex(fields=['risk_factors'], name='analytics_risk_gin', opclasses=['jsonb_path_ops']),
+        ]
     
     def __str__(self):
         return f"{self.driver.get_full_name()} - {self.period_start} to {self.period_end}"
@@ -153,19 +163,15 @@ class SleeperBerthPeriod(models.Model):
     # Period details
     start_time = models.DateTimeField()
     end_time = models.DateTimeField(null=True, blank=True)
-    duration_hours = models.DecimalField(
-        max_digits=4, 
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.01')), MaxValueValidator(Decimal('24.00'))]
+    duration_hours = models.FloatField(
+        validators=[MinValueValidator(0.01), MaxValueValidator(24.0)]
     )
     
     # Validation flags
     is_valid_for_restart = models.BooleanField(default=False)
-    consecutive_hours = models.DecimalField(
-        max_digits=4, 
-        decimal_places=2,
-        validators=[MinValueValidator(Decimal('0.00')), MaxValueValidator(Decimal('24.00'))],
-        default=Decimal('0.00')
+    consecutive_hours = models.FloatField(
+        validators=[MinValueValidator(0.0), MaxValueValidator(24.0)],
+        default=0.0
     )
     split_berth_period = models.BooleanField(default=False)
     
@@ -173,8 +179,8 @@ class SleeperBerthPeriod(models.Model):
     related_period = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True)
     
     # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    updated_at = models.DateTimeField(db_default=Now(), editable=False)  # Set on UPDATE by a trigger (migration 0012)
     
     class Meta:
         db_table = 'sleeper_berth_periods'
@@ -185,30 +191,34 @@ class SleeperBerthPeriod(models.Model):
         return f"{self.driver.get_full_name()} - Sleeper Berth {self.start_time.strftime('%m/%d %H:%M')}"
 
 
+class RuleType(models.IntegerChoices):
+    """Kinds of configurable HOS rule"""
+    
+    DRIVING_LIMIT = 1, 'Driving Limit'
+    ON_DUTY_LIMIT = 2, 'On Duty Limit'
+    BREAK_REQUIREMENT = 3, 'Break Requirement'
+    CYCLE_LIMIT = 4, 'Cycle Limit'
+    RESTART_REQUIREMENT = 5, 'Restart Requirement'
+    SLEEPER_BERTH = 6, 'Sleeper Berth'
+    CUSTOM = 7, 'Custom Rule'
+
+
+class RuleSeverity(models.IntegerChoices):
+    """Severity of breaking an HOS rule"""
+    
+    MINOR = 1, 'Minor'
+    MAJOR = 2, 'Major'
+    CRITICAL = 3, 'Critical'
+
+
 class HOSRuleConfiguration(models.Model):
     """Configurable HOS rules for scalable compliance"""
     
-    RULE_TYPES = [
-        ('driving_limit', 'Driving Limit'),
-        ('on_duty_limit', 'On Duty Limit'),
-        ('break_requirement', 'Break Requirement'),
-        ('cycle_limit', 'Cycle Limit'),
-        ('restart_requirement', 'Restart Requirement'),
-        ('sleeper_berth', 'Sleeper Berth'),
-        ('custom', 'Custom Rule'),
-    ]
-    
-    SEVERITY_LEVELS = [
-        ('minor', 'Minor'),
-        ('major', 'Major'),
-        ('critical', 'Critical'),
-    ]
-    
     rule_id = models.CharField(max_length=50, unique=True)
     rule_name = models.CharField(max_length=100)
-    rule_type = models.CharField(max_length=30, choices=RULE_TYPES)
+    rule_type = models.PositiveSmallIntegerField(choices=RuleType.choices)
     description = models.TextField()
-    severity = models.CharField(max_length=10, choices=SEVERITY_LEVELS, default='major')
+    severity = models.PositiveSmallIntegerField(choices=RuleSeverity.choices, default=RuleSeverity.MAJOR)
     
     # Rule configuration
     is_enabled = models.BooleanField(default=True)
@@ -219,8 +229,8 @@ class HOSRuleConfiguration(models.Model):
     applies_to_duty_statuses = models.JSONField(default=list)  # List of duty statuses this rule applies to
     
     # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    updated_at = models.DateTimeField(db_default=Now(), editable=False)  # Set on UPDATE by a trigger (migration 0012)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     
     class Meta:
@@ -232,27 +242,31 @@ class HOSRuleConfiguration(models.Model):
         return f"{self.rule_name} ({self.get_rule_type_display()})"
 
 
+class AlertType(models.IntegerChoices):
+    """Kinds of compliance alert"""
+    
+    VIOLATION = 1, 'Violation'
+    APPROACHING_LIMIT = 2, 'Approaching Limit'
+    RESTART_RECOMMENDED = 3, 'Restart Recommended'
+    TEAM_COORDINATION = 4, 'Team Coordination'
+    COMPLIANCE_SCORE = 5, 'Compliance Score'
+
+
+class AlertPriority(models.IntegerChoices):
+    """Compliance alert priorities"""
+    
+    LOW = 1, 'Low'
+    MEDIUM = 2, 'Medium'
+    HIGH = 3, 'High'
+    CRITICAL = 4, 'Critical'
+
+
 class ComplianceAlert(models.Model):
     """Compliance alerts and notifications"""
     
-    ALERT_TYPES = [
-        ('violation', 'Violation'),
-        ('approaching_limit', 'Approaching Limit'),
-        ('restart_recommended', 'Restart Recommended'),
-        ('team_coordination', 'Team Coordination'),
-        ('compliance_score', 'Compliance Score'),
-    ]
-    
-    PRIORITY_LEVELS = [
-        ('low', 'Low'),
-        ('medium', 'Medium'),
-        ('high', 'High'),
-        ('critical', 'Critical'),
-    ]
-    
     driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='compliance_alerts')
-    alert_type = models.CharField(max_length=30, choices=ALERT_TYPES)
-    priority = models.CharField(max_length=10, choices=PRIORITY_LEVELS, default='medium')
+    alert_type = models.PositiveSmallIntegerField(choices=AlertType.choices)
+    priority = models.PositiveSmallIntegerField(choices=AlertPriority.choices, default=AlertPriority.MEDIUM)
     
     # Alert details
     title = models.CharField(max_length=200)
@@ -271,36 +285,43 @@ class ComplianceAlert(models.Model):
     resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolved_alerts')
     
     # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(db_default=Now(), editable=False)
+    updated_at = models.DateTimeField(db_default=Now(), editable=False)  # Set on UPDATE by a trigger (migration 0012)
     
     class Meta:
+        # Partitioned by month on created_at (migration 0010), with primary key (id, created_at)
         db_table = 'compliance_alerts'
         verbose_name = 'Compliance Alert'
         verbose_name_plural = 'Compliance Alerts'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['driver', '-created_at'], name='alert_driver_created'),
+            models.Index(fields=['driver', 'is_read', 'is_resolved'], name='alert_driver_read_resolved'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.driver.get_full_name()}"
 
 
+class AuditAction(models.IntegerChoices):
+    """Actions recorded in the HOS audit log"""
+    
+    LOG_ENTRY_CREATED = 1, 'Log Entry Created'
+    LOG_ENTRY_MODIFIED = 2, 'Log Entry Modified'
+    LOG_ENTRY_CERTIFIED = 3, 'Log Entry Certified'
+    VIOLATION_DETECTED = 4, 'Violation Detected'
+    VIOLATION_RESOLVED = 5, 'Violation Resolved'
+    RESTART_INITIATED = 6, 'Restart Initiated'
+    TEAM_HANDOFF = 7, 'Team Handoff'
+    RULE_MODIFIED = 8, 'Rule Modified'
+    COMPLIANCE_CALCULATED = 9, 'Compliance Calculated'
+
+
 class HOSAuditLog(models.Model):
     """Audit log for HOS compliance actions"""
     
-    ACTION_TYPES = [
-        ('log_entry_created', 'Log Entry Created'),
-        ('log_entry_modified', 'Log Entry Modified'),
-        ('log_entry_certified', 'Log Entry Certified'),
-        ('violation_detected', 'Violation Detected'),
-        ('violation_resolved', 'Violation Resolved'),
-        ('restart_initiated', 'Restart Initiated'),
-        ('team_handoff', 'Team Handoff'),
-        ('rule_modified', 'Rule Modified'),
-        ('compliance_calculated', 'Compliance Calculated'),
-    ]
-    
     driver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hos_audit_logs')
-    action_type = models.CharField(max_length=30, choices=ACTION_TYPES)
+    action_type = models.PositiveSmallIntegerField(choices=AuditAction.choices)
     
     # Action details
     description = models.TextField()
@@ -316,10 +337,15 @@ class HOSAuditLog(models.Model):
     user_agent = models.TextField(blank=True)
     
     class Meta:
+        # Partitioned by month on timestamp (migration 0010), with primary key (id, timestamp)
         db_table = 'hos_audit_logs'
         verbose_name = 'HOS Audit Log'
         verbose_name_plural = 'HOS Audit Logs'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['driver', '-timestamp'], name='hos_audit_driver_timestamp'),
+            GinIndex(fields=['details'], name='hos_audit_details_gin', opclasses=['jsonb_path_ops']),
+        ]
     
     def __str__(self):
         return f"{self.get_action_type_display()} - {self.driver.get_full_name()} at {self.timestamp}"
@@ -330,85 +356,35 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 
+class PendingComplianceChecks:
+    """
+    Log entries saved in the current transaction, queued as one compliance check
+    
+    Registered as the transaction's on_commit callback by the first save, so a
+    transaction that saves many entries sends a single task.
+    """
+    
+    def __init__(self):
+        self.log_entry_ids = []
+    
+    def __call__(self):
+        log_entry_ids, self.log_entry_ids = self.log_entry_ids, []
+        try:
+            check_log_entries_compliance.delay(log_entry_ids)
+        except Exception:
+            logger.exception("Failed to queue compliance check for log entries %s", log_entry_ids)
+
+
 @receiver(post_save, sender='log_sheets.LogEntry')
 def check_compliance_on_log_entry_save(sender, instance, created, **kwargs):
-    """Automatically check compliance when log entry is saved"""
-    from .hos_compliance import create_compliance_engine
-    
-    try:
-        # Get driver's recent log entries
-        recent_entries = sender.objects.filter(
-            driver=instance.driver,
-            start_time__gte=timezone.now() - timezone.timedelta(days=8)
-        ).order_by('start_time')
-        
-        # Convert to dict format for compliance engine
-        log_entries = []
-        for entry in recent_entries:
-            log_entries.append({
-                'start_time': entry.start_time,
-                'end_time': entry.end_time,
-                'duty_status': entry.duty_status.name,
-                'location': entry.location,
-                'remarks': entry.remarks
-            })
-        
-        # Calculate compliance status
-        engine = create_compliance_engine()
-        hos_status = engine.calculate_advanced_hos_status(log_entries)
-        
-        # Create alerts for violations
-        for violation in hos_status.violations:
-            ComplianceAlert.objects.create(
-                driver=instance.driver,
-                alert_type='violation',
-                priority='critical' if violation.severity.value == 'critical' else 'high',
-                title=f"HOS Violation: {violation.violation_type}",
-                message=violation.description,
-                action_required=violation.requires_immediate_action,
-                action_description=violation.compliance_impact,
-                related_log_entry=instance
-            )
-        
-        # Create alerts for approaching limits
-        if hos_status.needs_rest:
-            ComplianceAlert.objects.create(
-                driver=instance.driver,
-                alert_type='approaching_limit',
-                priority='medium',
-                title="Approaching HOS Limits",
-                message="You are approaching your HOS limits and may need rest soon.",
-                action_required=False,
-                related_log_entry=instance
-            )
-        
-        # Log the compliance check
-        HOSAuditLog.objects.create(
-            driver=instance.driver,
-            action_type='compliance_calculated',
-            description=f"Compliance calculated for log entry {instance.id}",
-            details={
-                'can_drive': hos_status.can_drive,
-                'can_be_on_duty': hos_status.can_be_on_duty,
-                'needs_rest': hos_status.needs_rest,
-                'violations_count': len(hos_status.violations),
-                'compliance_score': float(hos_status.compliance_analytics.compliance_score) if hos_status.compliance_analytics else 100.0
-            },
-            related_log_entry=instance
-        )
-        
-    except Exception as e:
-        logger.error(f"Failed to check compliance for log entry {instance.id}: {e}")
-
-
-@receiver(post_save, sender='log_sheets.Violation')
-def create_violation_workflow(sender, instance, created, **kwargs):
-    """Create workflow entry when violation is created"""
-    if created:
-        try:
-            ViolationWorkflow.objects.create(
-                violation=instance,
-                status='pending'
-            )
-        except Exception as e:
-            logger.error(f"Failed to create workflow for violation {instance.id}: {e}")
+    """Add the saved log entry to its transaction's compliance check"""
+    connection = transaction.get_connection()
+    pending = getattr(connection, 'pending_compliance_checks', None)
+    # A rolled back transaction discards its callback, so start a new batch
+    if pending is None or not any(func is pending for _, func, _ in connection.run_on_commit):
+        pending = connection.pending_compliance_checks = PendingComplianceChecks()
+        pending.log_entry_ids.append(instance.id)
+        # Run after commit so the worker sees the saved entries and the save is not held up by the check
+        transaction.on_commit(pending)
+    else:
+        pending.log_entry_ids.append(instance.id)
@@ -3,7 +3,11 @@ Serializers for Advanced HOS Compliance Models
 """
 
 from rest_framework import serializers
+from rest_framework.fields import SkipField
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, Case, CharField, ExpressionWrapper, Q, Value, When
+from django.db.models.functions import Concat, Trim
+from django.utils import timezone
 from .hos_models import (
     TeamDriving,
     ViolationWorkflow,
@@ -11,18 +15,151 @@ from .hos_models import (
     SleeperBerthPeriod,
     HOSRuleConfiguration,
     ComplianceAlert,
-    HOSAuditLog
+    HOSAuditLog,
+    TeamRole,
+    WorkflowStatus,
+    RuleType,
+    RuleSeverity,
+    AlertType,
+    AlertPriority,
+    AuditAction
 )
 from log_sheets.models import Violation, LogEntry
 
 User = get_user_model()
 
+# Lowest compliance score for each risk level, best first; anything below is 'high'
+RISK_LEVEL_THRESHOLDS = ((90, 'low'), (70, 'medium'))
+
+# Per-row values computed by the database for list querysets (see the HOS viewsets);
+# the serializers fall back to computing them when an object was not annotated
+RISK_LEVEL_ANNOTATION = Case(
+    *(When(compliance_score__gte=score, then=Value(level)) for score, level in RISK_LEVEL_THRESHOLDS),
+    default=Value('high'),
+    output_field=CharField()
+)
+IS_CURRENT_ANNOTATION = ExpressionWrapper(Q(end_time__isnull=True), output_field=BooleanField())
+
+# Serializer field holding the name of the team's current driver, by role
+CURRENT_DRIVER_NAME_FIELDS = {TeamRole.DRIVER_1: 'driver_1_name', TeamRole.DRIVER_2: 'driver_2_name'}
+
+
+def full_name_annotation(relation):
+    """A related user's get_full_name() computed by the database, NULL when there is no user"""
+    return Case(
+        When(**{f'{relation}__isnull': True}, then=Value(None)),
+        default=Trim(Concat(f'{relation}__first_name', Value(' '), f'{relation}__last_name')),
+        output_field=CharField()
+    )
+
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+def context_now(serializer):
+    """
+    Current time for a serializer, read once per response
+    
+    The time is kept in the root serializer's context, which list children share,
+    so every row of a list is measured against the same now.
+    """
+    context = serializer.context
+    now = context.get('now')
+    if now is None:
+        now = context['now'] = timezone.now()
+    return now
+
+
+def format_time_since(then, now):
+    """Relative time such as '3 hours ago' from then until now"""
+    seconds = int((now - then).total_seconds())
+    if seconds >= SECONDS_PER_DAY:
+        days = seconds // SECONDS_PER_DAY
+        return f"{days} day{'s' if days != 1 else ''} ago"
+    elif seconds > SECONDS_PER_HOUR:
+        hours = seconds // SECONDS_PER_HOUR
+        return f"{hours} hour{'s' if hours != 1 else ''} ago"
+    elif seconds > SECONDS_PER_MINUTE:
+        minutes = seconds // SECONDS_PER_MINUTE
+        return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
+    else:
+        return "Just now"
+
+
+class ChoiceDisplayField(serializers.ReadOnlyField):
+    """
+    Display label of a choice field's value, like the model's get_FOO_display
+    
+    The label lookup is built once from the model's choices instead of on every
+    row, which get_FOO_display does.
+    """
+    
+    def __init__(self, choices, **kwargs):
+        self.labels = dict(choices)
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        return self.labels.get(value, value)
+
+
+class ChoiceNameField(serializers.ChoiceField):
+    """
+    Integer choice field read and written as the lowercase member name
+    
+    The HOS choice fields are stored as small integers, but the API keeps the
+    string values they used to have ('pending', 'critical', ...).
+    """
+    
+    def __init__(self, choices_enum, **kwargs):
+        self.values_by_name = {member.name.lower(): member for member in choices_enum}
+        self.names_by_value = {member.value: name for name, member in self.values_by_name.items()}
+        super().__init__([(name, member.label) for name, member in self.values_by_name.items()], **kwargs)
+    
+    def to_internal_value(self, data):
+        try:
+            return self.values_by_name[str(data)]
+        except KeyError:
+            self.fail('invalid_choice', input=data)
+    
+    def to_representation(self, value):
+        return self.names_by_value.get(value, value)
+
+
+class FullNameField(serializers.ReadOnlyField):
+    """
+    Full name of the user at relation (a lookup such as 'violation__driver')
+    
+    Reads the annotation named like the field (see full_name_annotation) and
+    falls back to the user's get_full_name(). Left out when there is no user,
+    as a source='relation.get_full_name' field is.
+    """
+    
+    def __init__(self, relation, **kwargs):
+        self.relation = relation.split('__')
+        super().__init__(source='*', **kwargs)
+    
+    def get_attribute(self, instance):
+        if hasattr(instance, self.field_name):
+            name = getattr(instance, self.field_name)
+        else:
+            user = instance
+            for attr in self.relation:
+                user = getattr(user, attr)
+                if user is None:
+                    break
+            name = user.get_full_name() if user is not None else None
+        if name is None:
+            raise SkipField()
+        return name
+
 
 class TeamDrivingSerializer(serializers.ModelSerializer):
     """Serializer for TeamDriving model"""
     
-    driver_1_name = serializers.CharField(source='driver_1.get_full_name', read_only=True)
-    driver_2_name = serializers.CharField(source='driver_2.get_full_name', read_only=True)
+    driver_1_name = FullNameField('driver_1')
+    driver_2_name = FullNameField('driver_2')
+    current_driver = ChoiceNameField(TeamRole, required=False)
     current_driver_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -36,10 +173,9 @@ class TeamDrivingSerializer(serializers.ModelSerializer):
     
     def get_current_driver_name(self, obj):
         """Get the name of the current driver"""
-        if obj.current_driver == 'driver_1':
-            return obj.driver_1.get_full_name()
-        elif obj.current_driver == 'driver_2':
-            return obj.driver_2.get_full_name()
+        name_field = CURRENT_DRIVER_NAME_FIELDS.get(obj.current_driver)
+        if name_field is not None:
+            return self.fields[name_field].get_attribute(obj)
         return 'Unknown'
 
 
@@ -50,8 +186,9 @@ class ViolationWorkflowSerializer(serializers.ModelSerializer):
     violation_description = serializers.CharField(source='violation.description', read_only=True)
     violation_severity = serializers.CharField(source='violation.severity', read_only=True)
     violation_occurred_at = serializers.DateTimeField(source='violation.occurred_at', read_only=True)
-    driver_name = serializers.CharField(source='violation.driver.get_full_name', read_only=True)
-    resolved_by_name = serializers.CharField(source='resolved_by.get_full_name', read_only=True)
+    driver_name = FullNameField('violation__driver')
+    status = ChoiceNameField(WorkflowStatus, required=False)
+    resolved_by_name = FullNameField('resolved_by')
     
     class Meta:
         model = ViolationWorkflow
@@ -67,7 +204,7 @@ class ViolationWorkflowSerializer(serializers.ModelSerializer):
 class ComplianceAnalyticsSerializer(serializers.ModelSerializer):
     """Serializer for ComplianceAnalytics model"""
     
-    driver_name = serializers.CharField(source='driver.get_full_name', read_only=True)
+    driver_name = FullNameField('driver')
     period_duration_days = serializers.SerializerMethodField()
     risk_level = serializers.SerializerMethodField()
     
@@ -87,18 +224,19 @@ class ComplianceAnalyticsSerializer(serializers.ModelSerializer):
     
     def get_risk_level(self, obj):
         """Determine risk level based on compliance score"""
-        if obj.compliance_score >= 90:
-            return 'low'
-        elif obj.compliance_score >= 70:
-            return 'medium'
-        else:
-            return 'high'
+        risk_level = getattr(obj, 'risk_level', None)
+        if risk_level is not None:
+            return risk_level
+        for score, level in RISK_LEVEL_THRESHOLDS:
+            if obj.compliance_score >= score:
+                return level
+        return 'high'
 
 
 class SleeperBerthPeriodSerializer(serializers.ModelSerializer):
     """Serializer for SleeperBerthPeriod model"""
     
-    driver_name = serializers.CharField(source='driver.get_full_name', read_only=True)
+    driver_name = FullNameField('driver')
     duration_formatted = serializers.SerializerMethodField()
     is_current = serializers.SerializerMethodField()
     
@@ -114,21 +252,26 @@ class SleeperBerthPeriodSerializer(serializers.ModelSerializer):
     
     def get_duration_formatted(self, obj):
         """Format duration as hours and minutes"""
-        hours = int(obj.duration_hours)
-        minutes = int((obj.duration_hours - hours) * 60)
+        # Rounding first keeps float error from truncating e.g. 8.1 hours to 8h 5m
+        hours, minutes = divmod(int(round(obj.duration_hours * 60, 6)), 60)
         return f"{hours}h {minutes}m"
     
     def get_is_current(self, obj):
         """Check if this is a current sleeper berth period"""
+        is_current = getattr(obj, 'is_current', None)
+        if is_current is not None:
+            return is_current
         return obj.end_time is None
 
 
 class HOSRuleConfigurationSerializer(serializers.ModelSerializer):
     """Serializer for HOSRuleConfiguration model"""
     
-    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    rule_type_display = serializers.CharField(source='get_rule_type_display', read_only=True)
-    severity_display = serializers.CharField(source='get_severity_display', read_only=True)
+    created_by_name = FullNameField('created_by')
+    rule_type = ChoiceNameField(RuleType)
+    rule_type_display = ChoiceDisplayField(RuleType.choices, source='rule_type')
+    severity = ChoiceNameField(RuleSeverity, required=False)
+    severity_display = ChoiceDisplayField(RuleSeverity.choices, source='severity')
     
     class Meta:
         model = HOSRuleConfiguration
@@ -144,10 +287,12 @@ class HOSRuleConfigurationSerializer(serializers.ModelSerializer):
 class ComplianceAlertSerializer(serializers.ModelSerializer):
     """Serializer for ComplianceAlert model"""
     
-    driver_name = serializers.CharField(source='driver.get_full_name', read_only=True)
-    alert_type_display = serializers.CharField(source='get_alert_type_display', read_only=True)
-    priority_display = serializers.CharField(source='get_priority_display', read_only=True)
-    resolved_by_name = serializers.CharField(source='resolved_by.get_full_name', read_only=True)
+    driver_name = FullNameField('driver')
+    alert_type = ChoiceNameField(AlertType)
+    alert_type_display = ChoiceDisplayField(AlertType.choices, source='alert_type')
+    priority = ChoiceNameField(AlertPriority, required=False)
+    priority_display = ChoiceDisplayField(AlertPriority.choices, source='priority')
+    resolved_by_name = FullNameField('resolved_by')
     time_since_created = serializers.SerializerMethodField()
     
     class Meta:
@@ -163,27 +308,15 @@ class ComplianceAlertSerializer(serializers.ModelSerializer):
     
     def get_time_since_created(self, obj):
         """Calculate time since alert was created"""
-        from django.utils import timezone
-        now = timezone.now()
-        delta = now - obj.created_at
-        
-        if delta.days > 0:
-            return f"{delta.days} day{'s' if delta.days != 1 else ''} ago"
-        elif delta.seconds > 3600:
-            hours = delta.seconds // 3600
-            return f"{hours} hour{'s' if hours != 1 else ''} ago"
-        elif delta.seconds > 60:
-            minutes = delta.seconds // 60
-            return f"{minutes} minute{'s' if minutes != 1 else ''} ago"
-        else:
-            return "Just now"
+        return format_time_since(obj.created_at, context_now(self))
 
 
 class HOSAuditLogSerializer(serializers.ModelSerializer):
     """Serializer for HOSAuditLog model"""
     
-    driver_name = serializers.CharField(source='driver.get_full_name', read_only=True)
-    action_type_display = serializers.CharField(source='get_action_type_display', read_only=True)
+    driver_name = FullNameField('driver')
+    action_type = ChoiceNameField(AuditAction)
+    action_type_display = ChoiceDisplayField(AuditAction.choices, source='action_type')
     time_since_timestamp = serializers.SerializerMethodField()
     
     class Meta:
@@ -194,6 +327,10 @@ class HOSAuditLogSerializer(serializers.ModelSerializer):
             'timestamp', 'time_since_timestamp', 'ip_address', 'user_agent'
         ]
         read_only_fields = ['id', 'timestamp']
+    
+    def get_time_since_timestamp(self, obj):
+        """Calculate time since the action was logged"""
+        return format_time_since(obj.timestamp, context_now(self))
 
 
 class HOSComplianceSummarySerializer(serializers.Serializer):
@@ -10,19 +10,21 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils import timezone
 from django.db import transaction, models
 from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from collections import Counter
 from datetime import datetime, timedelta
-from decimal import Decimal
 import logging
 
 from .hos_compliance import (
-    AdvancedHOSComplianceEngine, 
     CycleType, 
     ViolationResolutionWorkflow,
     TeamDrivingCoordinator,
-    create_compliance_engine,
+    get_compliance_engine,
     validate_log_entry,
     calculate_cycle_efficiency,
-    get_compliance_summary
+    get_compliance_summary,
+    SEVERITY_PENALTY_POINTS
 )
 from .hos_models import (
     TeamDriving, 
@@ -31,7 +33,8 @@ from .hos_models import (
     SleeperBerthPeriod,
     HOSRuleConfiguration,
     ComplianceAlert,
-    HOSAuditLog
+    HOSAuditLog,
+    TeamRole
 )
 from .hos_serializers import (
     TeamDrivingSerializer,
@@ -40,17 +43,147 @@ from .hos_serializers import (
     SleeperBerthPeriodSerializer,
     HOSRuleConfigurationSerializer,
     ComplianceAlertSerializer,
-    HOSAuditLogSerializer
+    HOSAuditLogSerializer,
+    RISK_LEVEL_ANNOTATION,
+    IS_CURRENT_ANNOTATION,
+    full_name_annotation
 )
+from .renderers import ORJSONRenderer, iterate_in_thread, stream_json_array
 from log_sheets.models import LogEntry, Violation
 from log_sheets.serializers import LogEntrySerializer, ViolationSerializer
 
 logger = logging.getLogger(__name__)
 
+# Compliance score penalty keyed by the severity string stored on Violation rows
+SEVERITY_PENALTY_BY_VALUE = {severity.value: points for severity, points in SEVERITY_PENALTY_POINTS.items()}
+
+class ListOnlyRelatedMixin:
+    """
+    Load only what the serializer shows of related rows in list_actions
+    
+    full_name_relations maps each user name field of the serializer to its user
+    relation. List queries compute those names in the database instead of
+    joining the user rows, and load only list_related_fields from other joined
+    tables. Detail views and other actions join the users, since they may change
+    them before serializing.
+    """
+    full_name_relations = {}
+    list_related_fields = ()
+    list_actions = ('list',)
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.list_actions:
+            return queryset.select_related(*self.full_name_relations.values())
+        queryset = queryset.annotate(**{
+            field: full_name_annotation(relation) for field, relation in self.full_name_relations.items()
+        })
+        if self.list_related_fields:
+            own_fields = [field.name for field in queryset.model._meta.concrete_fields]
+            queryset = queryset.only(*own_fields, *self.list_related_fields)
+        return queryset
+
+
+class RefreshUpdatedAtMixin:
+    """
+    Read updated_at back after an update, since the database sets it
+    
+    A trigger stamps updated_at on every UPDATE of the HOS tables (core_utils
+    migration 0012), so the saved instance still holds the previous time.
+    """
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        serializer.instance.refresh_from_db(fields=['updated_at'])
+
+
+# Analytics cover the last this many days up to today
+ANALYTICS_PERIOD_DAYS = 30
+
+
+def current_analytics_period():
+    """Start and end dates of the current analytics period"""
+    end_date = timezone.now().date()
+    return end_date - timedelta(days=ANALYTICS_PERIOD_DAYS), end_date
+
+
+def generate_compliance_analytics(driver_id, start_date, end_date):
+    """
+    Calculate a driver's analytics for a period and store them
+    
+    Replaces the stored figures if the period was calculated before.
+    """
+    # Get log entries for the period
+    log_entries = list(LogEntry.objects.filter(
+        driver_id=driver_id,
+        start_time__date__gte=start_date,
+        start_time__date__lte=end_date
+    ).values_list('start_time', 'end_time', 'duty_status__name'))
+    
+    # Get violations for the period
+    violations = Violation.objects.filter(
+        driver_id=driver_id,
+        occurred_at__date__gte=start_date,
+        occurred_at__date__lte=end_date
+    )
+    
+    # Calculate metrics from one fetch of the two columns they need
+    violation_rows = list(violations.values_list('violation_type', 'severity'))
+    total_violations = len(violation_rows)
+    violations_by_type = dict(Counter(violation_type for violation_type, _ in violation_rows))
+    severity_counts = Counter(severity for _, severity in violation_rows)
+    violations_by_severity = dict(severity_counts)
+    
+    # Calculate compliance score
+    penalty_points = sum(
+        SEVERITY_PENALTY_BY_VALUE.get(severity, 0) * count
+        for severity, count in severity_counts.items()
+    )
+    
+    compliance_score = max(0.0, 100.0 - penalty_points)
+    
+    # Calculate efficiency
+    cycle_efficiency = round(calculate_cycle_efficiency([
+        {
+            'start_time': start_time,
+            'end_time': end_time,
+            'duty_status': duty_status
+        }
+        for start_time, end_time, duty_status in log_entries
+    ]), 2)
+    
+    # Calculate average daily hours
+    daily_hours = {}
+    for start_time, end_time, _ in log_entries:
+        date = start_time.date()
+        if date not in daily_hours:
+            daily_hours[date] = 0
+        daily_hours[date] += (end_time - start_time).total_seconds() / 3600
+    
+    average_daily_hours = round(sum(daily_hours.values()) / len(daily_hours), 2) if daily_hours else 0.0
+    
+    # Create or refresh the analytics record
+    analytics, _ = ComplianceAnalytics.objects.update_or_create(
+        driver_id=driver_id,
+        period_start=start_date,
+        period_end=end_date,
+        defaults={
+            'total_violations': total_violations,
+            'violations_by_type': violations_by_type,
+            'violations_by_severity': violations_by_severity,
+            'compliance_score': compliance_score,
+            'cycle_efficiency': cycle_efficiency,
+            'average_daily_hours': average_daily_hours
+        }
+    )
+    
+    return analytics
+
 
 class AdvancedHOSComplianceView(generics.GenericAPIView):
     """Advanced HOS compliance calculation and analysis"""
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def post(self, request):
         """Calculate advanced HOS compliance status"""
@@ -90,7 +223,7 @@ class AdvancedHOSComplianceView(generics.GenericAPIView):
                 })
             
             # Calculate compliance status
-            engine = create_compliance_engine(cycle_enum)
+            engine = get_compliance_engine(cycle_enum)
             hos_status = engine.calculate_advanced_hos_status(log_data)
             
             # Prepare response
@@ -145,7 +278,7 @@ class AdvancedHOSComplianceView(generics.GenericAPIView):
             
             # Add recommendations if requested
             if include_recommendations:
-                response_data['recommendations'] = hos_status.restart_recommendations
+                response_data['recommendations'] = dict(hos_status.restart_recommendations)
             
             # Add team driving info if available
             if hos_status.team_driving_info:
@@ -166,17 +299,23 @@ class AdvancedHOSComplianceView(generics.GenericAPIView):
             )
 
 
-class ViolationResolutionViewSet(viewsets.ModelViewSet):
+class ViolationResolutionViewSet(RefreshUpdatedAtMixin, ListOnlyRelatedMixin, viewsets.ModelViewSet):
     """Violation resolution workflow management"""
-    queryset = ViolationWorkflow.objects.all()
+    queryset = ViolationWorkflow.objects.select_related('violation')
+    full_name_relations = {'driver_name': 'violation__driver', 'resolved_by_name': 'resolved_by'}
+    list_related_fields = (
+        'violation__violation_type', 'violation__description', 'violation__severity', 'violation__occurred_at'
+    )
     serializer_class = ViolationWorkflowSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         # Users can only see their own violation workflows unless they're staff
         if self.request.user.is_staff:
-            return ViolationWorkflow.objects.all()
-        return ViolationWorkflow.objects.filter(violation__driver=self.request.user)
+            return queryset
+        return queryset.filter(violation__driver=self.request.user)
     
     @action(detail=True, methods=['post'])
     def resolve(self, request, pk=None):
@@ -256,17 +395,20 @@ class ViolationResolutionViewSet(viewsets.ModelViewSet):
             )
 
 
-class TeamDrivingViewSet(viewsets.ModelViewSet):
+class TeamDrivingViewSet(RefreshUpdatedAtMixin, ListOnlyRelatedMixin, viewsets.ModelViewSet):
     """Team driving coordination management"""
     queryset = TeamDriving.objects.all()
+    full_name_relations = {'driver_1_name': 'driver_1', 'driver_2_name': 'driver_2'}
     serializer_class = TeamDrivingSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         # Users can only see teams they're part of unless they're staff
         if self.request.user.is_staff:
-            return TeamDriving.objects.all()
-        return TeamDriving.objects.filter(
+            return queryset
+        return queryset.filter(
             models.Q(driver_1=self.request.user) | models.Q(driver_2=self.request.user)
         )
     
@@ -310,12 +452,13 @@ class TeamDrivingViewSet(viewsets.ModelViewSet):
                 team.coordination_notes = notes
                 
                 # Switch current driver
-                if team.current_driver == 'driver_1':
-                    team.current_driver = 'driver_2'
+                if team.current_driver == TeamRole.DRIVER_1:
+                    team.current_driver = TeamRole.DRIVER_2
                 else:
-                    team.current_driver = 'driver_1'
+                    team.current_driver = TeamRole.DRIVER_1
                 
                 team.save()
+                team.refresh_from_db(fields=['updated_at'])
                 
                 return Response(TeamDrivingSerializer(team).data)
             else:
@@ -332,26 +475,28 @@ class TeamDrivingViewSet(viewsets.ModelViewSet):
             )
 
 
-class ComplianceAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
+class ComplianceAnalyticsViewSet(ListOnlyRelatedMixin, viewsets.ReadOnlyModelViewSet):
     """Compliance analytics and reporting"""
-    queryset = ComplianceAnalytics.objects.all()
+    queryset = ComplianceAnalytics.objects.annotate(risk_level=RISK_LEVEL_ANNOTATION)
+    full_name_relations = {'driver_name': 'driver'}
     serializer_class = ComplianceAnalyticsSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         # Users can only see their own analytics unless they're staff
         if self.request.user.is_staff:
-            return ComplianceAnalytics.objects.all()
-        return ComplianceAnalytics.objects.filter(driver=self.request.user)
+            return queryset
+        return queryset.filter(driver=self.request.user)
     
     @action(detail=False, methods=['get'])
     def current_period(self, request):
         """Get analytics for current period"""
         try:
-            # Calculate current period (last 30 days)
-            end_date = timezone.now().date()
-            start_date = end_date - timedelta(days=30)
+            start_date, end_date = current_analytics_period()
             
+            # Normally refreshed overnight by the refresh_compliance_analytics task
             analytics = ComplianceAnalytics.objects.filter(
                 driver=request.user,
                 period_start=start_date,
@@ -362,7 +507,7 @@ class ComplianceAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
                 return Response(ComplianceAnalyticsSerializer(analytics).data)
             else:
                 # Generate analytics if not available
-                analytics = self._generate_analytics(request.user, start_date, end_date)
+                analytics = generate_compliance_analytics(request.user.id, start_date, end_date)
                 return Response(ComplianceAnalyticsSerializer(analytics).data)
                 
         except Exception as e:
@@ -371,91 +516,22 @@ class ComplianceAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
                 {'error': 'Failed to get analytics', 'details': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _generate_analytics(self, user, start_date, end_date):
-        """Generate analytics for a period"""
-        # Get log entries for the period
-        log_entries = LogEntry.objects.filter(
-            driver=user,
-            start_time__date__gte=start_date,
-            start_time__date__lte=end_date
-        )
-        
-        # Get violations for the period
-        violations = Violation.objects.filter(
-            driver=user,
-            occurred_at__date__gte=start_date,
-            occurred_at__date__lte=end_date
-        )
-        
-        # Calculate metrics
-        total_violations = violations.count()
-        violations_by_type = {}
-        violations_by_severity = {}
-        
-        for violation in violations:
-            violations_by_type[violation.violation_type] = violations_by_type.get(violation.violation_type, 0) + 1
-            violations_by_severity[violation.severity] = violations_by_severity.get(violation.severity, 0) + 1
-        
-        # Calculate compliance score
-        penalty_points = 0
-        for violation in violations:
-            if violation.severity == 'critical':
-                penalty_points += 20
-            elif violation.severity == 'major':
-                penalty_points += 10
-            elif violation.severity == 'minor':
-                penalty_points += 5
-        
-        compliance_score = max(Decimal('0.00'), Decimal('100.00') - Decimal(str(penalty_points)))
-        
-        # Calculate efficiency
-        cycle_efficiency = calculate_cycle_efficiency([
-            {
-                'start_time': entry.start_time,
-                'end_time': entry.end_time,
-                'duty_status': entry.duty_status.name
-            }
-            for entry in log_entries
-        ])
-        
-        # Calculate average daily hours
-        daily_hours = {}
-        for entry in log_entries:
-            date = entry.start_time.date()
-            if date not in daily_hours:
-                daily_hours[date] = 0
-            daily_hours[date] += (entry.end_time - entry.start_time).total_seconds() / 3600
-        
-        average_daily_hours = Decimal(str(sum(daily_hours.values()) / len(daily_hours))) if daily_hours else Decimal('0.00')
-        
-        # Create analytics record
-        analytics = ComplianceAnalytics.objects.create(
-            driver=user,
-            period_start=start_date,
-            period_end=end_date,
-            total_violations=total_violations,
-            violations_by_type=violations_by_type,
-            violations_by_severity=violations_by_severity,
-            compliance_score=compliance_score,
-            cycle_efficiency=cycle_efficiency,
-            average_daily_hours=average_daily_hours
-        )
-        
-        return analytics
 
 
-class ComplianceAlertViewSet(viewsets.ModelViewSet):
+class ComplianceAlertViewSet(RefreshUpdatedAtMixin, ListOnlyRelatedMixin, viewsets.ModelViewSet):
     """Compliance alerts and notifications"""
     queryset = ComplianceAlert.objects.all()
+    full_name_relations = {'driver_name': 'driver', 'resolved_by_name': 'resolved_by'}
     serializer_class = ComplianceAlertSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         # Users can only see their own alerts unless they're staff
         if self.request.user.is_staff:
-            return ComplianceAlert.objects.all()
-        return ComplianceAlert.objects.filter(driver=self.request.user)
+            return queryset
+        return queryset.filter(driver=self.request.user)
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -463,6 +539,7 @@ class ComplianceAlertViewSet(viewsets.ModelViewSet):
         alert = self.get_object()
         alert.is_read = True
         alert.save()
+        alert.refresh_from_db(fields=['updated_at'])
         return Response(ComplianceAlertSerializer(alert).data)
     
     @action(detail=True, methods=['post'])
@@ -478,6 +555,7 @@ class ComplianceAlertViewSet(viewsets.ModelViewSet):
             alert.resolved_by = request.user
             alert.message += f"\nResolved: {resolution_notes}"
             alert.save()
+            alert.refresh_from_db(fields=['updated_at'])
             
             return Response(ComplianceAlertSerializer(alert).data)
             
@@ -495,11 +573,13 @@ class ComplianceAlertViewSet(viewsets.ModelViewSet):
         return Response({'unread_count': count})
 
 
-class HOSRuleConfigurationViewSet(viewsets.ModelViewSet):
+class HOSRuleConfigurationViewSet(RefreshUpdatedAtMixin, ListOnlyRelatedMixin, viewsets.ModelViewSet):
     """HOS rule configuration management"""
     queryset = HOSRuleConfiguration.objects.all()
+    full_name_relations = {'created_by_name': 'created_by'}
     serializer_class = HOSRuleConfigurationSerializer
     permission_classes = [IsAdminUser]  # Only admins can modify rules
+    renderer_classes = [ORJSONRenderer]
     
     @action(detail=True, methods=['post'])
     def toggle(self, request, pk=None):
@@ -507,39 +587,61 @@ class HOSRuleConfigurationViewSet(viewsets.ModelViewSet):
         rule = self.get_object()
         rule.is_enabled = not rule.is_enabled
         rule.save()
+        rule.refresh_from_db(fields=['updated_at'])
         return Response(HOSRuleConfigurationSerializer(rule).data)
 
 
-class HOSAuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class HOSAuditLogViewSet(ListOnlyRelatedMixin, viewsets.ReadOnlyModelViewSet):
     """HOS audit log (read-only for security)"""
     queryset = HOSAuditLog.objects.all()
+    full_name_relations = {'driver_name': 'driver'}
+    list_actions = ('list', 'export')
     serializer_class = HOSAuditLogSerializer
     permission_classes = [IsAdminUser]  # Only admins can view audit logs
+    renderer_classes = [ORJSONRenderer]
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         # Filter by driver if specified
         driver_id = self.request.query_params.get('driver_id')
         if driver_id:
-            return HOSAuditLog.objects.filter(driver_id=driver_id)
-        return HOSAuditLog.objects.all()
+            return queryset.filter(driver_id=driver_id)
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every matching audit log entry as one JSON array, without pagination"""
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        # iterator() reads the rows through a server-side cursor on PostgreSQL
+        rows = queryset.iterator(chunk_size=1000)
+        content = stream_json_array(rows, serializer.to_representation)
+        if isinstance(request._request, ASGIRequest):
+            # Under ASGI a sync iterator would be read in full before sending
+            content = iterate_in_thread(content)
+        return StreamingHttpResponse(content, content_type='application/json')
 
 
-class SleeperBerthPeriodViewSet(viewsets.ReadOnlyModelViewSet):
+class SleeperBerthPeriodViewSet(ListOnlyRelatedMixin, viewsets.ReadOnlyModelViewSet):
     """Sleeper berth period tracking"""
-    queryset = SleeperBerthPeriod.objects.all()
+    queryset = SleeperBerthPeriod.objects.annotate(is_current=IS_CURRENT_ANNOTATION)
+    full_name_relations = {'driver_name': 'driver'}
     serializer_class = SleeperBerthPeriodSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         # Users can only see their own sleeper berth periods unless they're staff
         if self.request.user.is_staff:
-            return SleeperBerthPeriod.objects.all()
-        return SleeperBerthPeriod.objects.filter(driver=self.request.user)
+            return queryset
+        return queryset.filter(driver=self.request.user)
 
 
 class HOSComplianceSummaryView(generics.GenericAPIView):
     """Get a summary of HOS compliance status"""
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer]
     
     def get(self, request):
         """Get compliance summary"""
@@ -565,13 +667,13 @@ class HOSComplianceSummaryView(generics.GenericAPIView):
                 })
             
             # Calculate compliance status
-            engine = create_compliance_engine()
+            engine = get_compliance_engine()
             hos_status = engine.calculate_advanced_hos_status(log_data)
             
             # Get summary
             summary = get_compliance_summary(hos_status)
             
-            return Response(summary)
+            return Response(dict(summary))
             
         except Exception as e:
             logger.error(f"Failed to get compliance summary: {e}")
@@ -4,11 +4,14 @@ Custom middleware for the TruckLog application
 
 import time
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.core.cache import cache
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
 
+from .audit import AuditLogBuffer
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,6 +70,50 @@ class RequestLoggingMiddleware(MiddlewareMixin):
         return response
 
 
+class AuditLogBufferMiddleware:
+    """
+    Buffer audit log entries for the duration of a request and write them
+    with one bulk insert once the response is ready
 
-
-
+    The buffer is activated and reset within a single call so the context
+    variable token is always reset in the context that created it, which
+    process_request/process_response cannot guarantee under ASGI.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        buffer = request.audit_log = AuditLogBuffer()
+        token = buffer.activate()
+        try:
+            response = self.get_response(request)
+            self._flush(buffer)
+        finally:
+            buffer.deactivate(token)
+        return response
+    
+    async def __acall__(self, request):
+        buffer = request.audit_log = AuditLogBuffer()
+        token = buffer.activate()
+        try:
+            response = await self.get_response(request)
+            await sync_to_async(self._flush)(buffer)
+        finally:
+            buffer.deactivate(token)
+        return response
+    
+    @staticmethod
+    def _flush(buffer):
+        try:
+            buffer.flush()
+        except Exception:
+            logger.exception("Failed to write buffered audit logs")
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-16 22:22
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building the
+    # indexes concurrently keeps the audit log writable while they are built
+    atomic = False
+
+    dependencies = [
+        ('core_utils', '0006_notification_user_unread_indexes'),
+        ('log_sheets', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='complianceanalytics',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['violations_by_type'], name='analytics_viol_type_gin', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='complianceanalytics',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['risk_factors'], name='analytics_risk_gin', opclasses=['jsonb_path_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='hosauditlog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['details'], name='hos_audit_details_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-16 22:24
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core_utils', '0007_hos_json_gin_indexes'),
+        ('log_sheets', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='compliancealert',
+            index=models.Index(fields=['driver', '-created_at'], name='alert_driver_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='compliancealert',
+            index=models.Index(fields=['driver', 'is_read', 'is_resolved'], name='alert_driver_read_resolved'),
+        ),
+        AddIndexConcurrently(
+            model_name='hosauditlog',
+            index=models.Index(fields=['driver', '-timestamp'], name='hos_audit_driver_timestamp'),
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 5.1.15 on 2026-10-16 22:58
+
+from django.db import migrations
+
+# Months of partitions created ahead of the current one; the
+# maintain_monthly_partitions task keeps this many in place afterwards
+PARTITION_MONTHS_AHEAD = 3
+
+# Rebuilds a table as PARTITION BY RANGE on a timestamp column with one partition
+# per month, keeping its rows, indexes and foreign keys. Postgres needs the
+# partition column in the primary key, so it becomes (id, column); ids still come
+# from a sequence, since partitioned tables cannot have identity columns before
+# Postgres 17. A DEFAULT partition takes rows past the last month partition, so
+# inserts keep working if the maintenance task stops running. Does nothing if
+# the table is already partitioned.
+PARTITION_TABLE_SQL = """
+DO $$
+DECLARE
+    index_defs text[];
+    fk_defs text[];
+    stmt text;
+    partition_month date;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = '{table}'::regclass) THEN
+        RETURN;
+    END IF;
+
+    SELECT array_agg(indexdef) INTO index_defs
+    FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = '{table}'
+        AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = '{table}'::regclass AND contype = 'p');
+    SELECT array_agg(format('ALTER TABLE {table} ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid))) INTO fk_defs
+    FROM pg_constraint
+    WHERE conrelid = '{table}'::regclass AND contype = 'f';
+
+    ALTER TABLE {table} RENAME TO {table}_unpartitioned;
+    CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)
+        PARTITION BY RANGE ({column});
+
+    SELECT date_trunc('month', coalesce(min({column}), now()))::date INTO partition_month FROM {table}_unpartitioned;
+    WHILE partition_month <= date_trunc('month', now()) + interval '{months_ahead} months' LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF {table} FOR VALUES FROM (%L) TO (%L)',
+            '{table}_' || to_char(partition_month, 'YYYY_MM'),
+            partition_month,
+            (partition_month + interval '1 month')::date
+        );
+        partition_month := partition_month + interval '1 month';
+    END LOOP;
+    CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;
+
+    INSERT INTO {table} SELECT * FROM {table}_unpartitioned;
+    DROP TABLE {table}_unpartitioned;
+
+    CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id;
+    PERFORM setval('{table}_id_seq', coalesce(max(id), 0) + 1, false) FROM {table};
+    ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq');
+    ALTER TABLE {table} ADD PRIMARY KEY (id, {column});
+
+    FOREACH stmt IN ARRAY coalesce(index_defs, ARRAY[]::text[]) LOOP
+        EXECUTE stmt;
+    END LOOP;
+    FOREACH stmt IN ARRAY coalesce(fk_defs, ARRAY[]::text[]) LOOP
+        EXECUTE stmt;
+    END LOOP;
+END
+$$;
+"""
+
+# Reverse of PARTITION_TABLE_SQL: copies the rows back into a plain table with an
+# identity id and primary key (id), recreating its indexes and foreign keys. Does
+# nothing if the table is not partitioned.
+UNPARTITION_TABLE_SQL = """
+DO $$
+DECLARE
+    index_defs text[];
+    fk_defs text[];
+    stmt text;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = '{table}'::regclass) THEN
+        RETURN;
+    END IF;
+
+    SELECT array_agg(replace(indexdef, ' ON ONLY ', ' ON ')) INTO index_defs
+    FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = '{table}'
+        AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = '{table}'::regclass AND contype = 'p');
+    SELECT array_agg(format('ALTER TABLE {table} ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid))) INTO fk_defs
+    FROM pg_constraint
+    WHERE conrelid = '{table}'::regclass AND contype = 'f';
+
+    ALTER TABLE {table} RENAME TO {table}_partitioned;
+    CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE);
+    ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT;
+    INSERT INTO {table} SELECT * FROM {table}_partitioned;
+    DROP TABLE {table}_partitioned;
+
+    ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY;
+    PERFORM setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table};
+    ALTER TABLE {table} ADD PRIMARY KEY (id);
+
+    FOREACH stmt IN ARRAY coalesce(index_defs, ARRAY[]::text[]) LOOP
+        EXECUTE stmt;
+    END LOOP;
+    FOREACH stmt IN ARRAY coalesce(fk_defs, ARRAY[]::text[]) LOOP
+        EXECUTE stmt;
+    END LOOP;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_utils', '0008_hos_alert_audit_indexes'),
+    ]
+
+    # The tables keep the same columns, so Django's model state is unchanged.
+    #
+    # Both tables are rewritten under an ACCESS EXCLUSIVE lock, so writes to them
+    # wait for the row copy; run it in a quiet period on a large database.
+    # CREATE INDEX CONCURRENTLY does not work on partitioned tables, so later
+    # indexes on them must use AddIndex (or be built concurrently on each
+    # partition and attached), not AddIndexConcurrently. For the same reason the
+    # tables are turned back into plain tables here before 0008's concurrent
+    # indexes can be removed.
+    operations = [
+        migrations.RunSQL(
+            PARTITION_TABLE_SQL.format(table='hos_audit_logs', column='timestamp', months_ahead=PARTITION_MONTHS_AHEAD),
+            reverse_sql=UNPARTITION_TABLE_SQL.format(table='hos_audit_logs'),
+        ),
+        migrations.RunSQL(
+            PARTITION_TABLE_SQL.format(table='compliance_alerts', column='created_at', months_ahead=PARTITION_MONTHS_AHEAD),
+            reverse_sql=UNPARTITION_TABLE_SQL.format(table='compliance_alerts'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_utils', '0010_partition_hos_audit_alerts_by_month'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complianceanalytics',
+            name='average_daily_hours',
+            field=models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(24.0)]),
+        ),
+        migrations.AlterField(
+            model_name='complianceanalytics',
+            name='compliance_score',
+            field=models.FloatField(default=100.0, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(100.0)]),
+        ),
+        migrations.AlterField(
+            model_name='complianceanalytics',
+            name='cycle_efficiency',
+            field=models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(100.0)]),
+        ),
+        migrations.AlterField(
+            model_name='complianceanalytics',
+            name='restart_frequency',
+            field=models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0)]),
+        ),
+        migrations.AlterField(
+            model_name='sleeperberthperiod',
+            name='consecutive_hours',
+            field=models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(24.0)]),
+        ),
+        migrations.AlterField(
+            model_name='sleeperberthperiod',
+            name='duration_hours',
+            field=models.FloatField(validators=[django.core.validators.MinValueValidator(0.01), django.core.validators.MaxValueValidator(24.0)]),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:41
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+# Tables whose updated_at is set by the set_updated_at trigger
+TIMESTAMPED_TABLES = [
+    'compliance_alerts',
+    'compliance_analytics',
+    'hos_rule_configurations',
+    'sleeper_berth_periods',
+    'team_driving',
+    'violation_workflows',
+]
+
+# Same clock as Now() on PostgreSQL, which sets created_at
+CREATE_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := statement_timestamp();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_utils', '0011_hos_scores_as_float'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='compliancealert',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='compliancealert',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='complianceanalytics',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='complianceanalytics',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='hosruleconfiguration',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='hosruleconfiguration',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='sleeperberthperiod',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='sleeperberthperiod',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='teamdriving',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='teamdriving',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='violationworkflow',
+            name='created_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.AlterField(
+            model_name='violationworkflow',
+            name='updated_at',
+            field=models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), editable=False),
+        ),
+        migrations.RunSQL(CREATE_FUNCTION_SQL, reverse_sql='DROP FUNCTION set_updated_at();'),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE TRIGGER {table}_set_updated_at BEFORE UPDATE ON {table} FOR EACH ROW EXECUTE FUNCTION set_updated_at();',
+            reverse_sql=f'DROP TRIGGER {table}_set_updated_at ON {table};',
+        )
+        for table in TIMESTAMPED_TABLES
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:58
+
+from django.db import migrations
+
+# Gives each new violation its pending workflow row in the same statement, so
+# bulk inserts of violations need no per-row INSERT from Python. The values are
+# the ViolationWorkflow field defaults, which Django does not put in the table.
+CREATE_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION create_violation_workflow() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO violation_workflows (violation_id, status, escalation_level, resolution_notes)
+    VALUES (NEW.id, 'pending', 0, '')
+    ON CONFLICT (violation_id) DO NOTHING;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER violations_create_workflow AFTER INSERT ON violations
+    FOR EACH ROW EXECUTE FUNCTION create_violation_workflow();
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER violations_create_workflow ON violations;
+DROP FUNCTION create_violation_workflow();
+"""
+
+# Violations saved while the signal handler was not connected have no workflow
+BACKFILL_WORKFLOWS_SQL = """
+INSERT INTO violation_workflows (violation_id, status, escalation_level, resolution_notes)
+SELECT id, 'pending', 0, '' FROM violations
+ON CONFLICT (violation_id) DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_utils', '0012_hos_timestamps_set_by_database'),
+        ('log_sheets', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER_SQL, reverse_sql=DROP_TRIGGER_SQL),
+        migrations.RunSQL(BACKFILL_WORKFLOWS_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
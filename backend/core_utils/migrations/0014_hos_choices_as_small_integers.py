@@ -0,0 +1,130 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+# (table, column, former max_length, former values); each value is stored as
+# its 1-based position, matching the IntegerChoices in hos_models
+CHOICE_COLUMNS = [
+    ('compliance_alerts', 'alert_type', 30, [
+        'violation', 'approaching_limit', 'restart_recommended', 'team_coordination', 'compliance_score',
+    ]),
+    ('compliance_alerts', 'priority', 10, ['low', 'medium', 'high', 'critical']),
+    ('hos_audit_logs', 'action_type', 30, [
+        'log_entry_created', 'log_entry_modified', 'log_entry_certified', 'violation_detected',
+        'violation_resolved', 'restart_initiated', 'team_handoff', 'rule_modified', 'compliance_calculated',
+    ]),
+    ('hos_rule_configurations', 'rule_type', 30, [
+        'driving_limit', 'on_duty_limit', 'break_requirement', 'cycle_limit', 'restart_requirement',
+        'sleeper_berth', 'custom',
+    ]),
+    ('hos_rule_configurations', 'severity', 10, ['minor', 'major', 'critical']),
+    ('team_driving', 'current_driver', 20, ['driver_1', 'driver_2', 'relief_driver']),
+    ('violation_workflows', 'status', 20, ['pending', 'in_review', 'resolved', 'disputed', 'escalated']),
+]
+
+
+def to_small_integer_sql(table, column, max_length, values):
+    """
+    Rewrite a choice column to smallint in one pass, mapping each string to its number
+
+    A string outside the choices would have no number, so the migration stops
+    first with the offending values instead of failing on a NULL.
+    """
+    choices = ', '.join(f"'{value}'" for value in values)
+    cases = ' '.join(f"WHEN '{value}' THEN {number}" for number, value in enumerate(values, 1))
+    return f"""
+DO $$
+DECLARE
+    unexpected text;
+BEGIN
+    SELECT string_agg(DISTINCT quote_literal({column}), ', ') INTO unexpected
+    FROM {table} WHERE {column} NOT IN ({choices});
+    IF unexpected IS NOT NULL THEN
+        RAISE EXCEPTION '{table}.{column} has values outside its choices: %', unexpected;
+    END IF;
+END
+$$;
+
+ALTER TABLE {table} ALTER COLUMN {column} TYPE smallint USING CASE {column} {cases} END,
+    ADD CONSTRAINT {table}_{column}_check CHECK ({column} >= 0);
+"""
+
+
+def to_string_sql(table, column, max_length, values):
+    """Turn a choice column rewritten by to_small_integer_sql back into strings"""
+    cases = ' '.join(f"WHEN {number} THEN '{value}'" for number, value in enumerate(values, 1))
+    return (
+        f'ALTER TABLE {table} DROP CONSTRAINT {table}_{column}_check, '
+        f'ALTER COLUMN {column} TYPE varchar({max_length}) USING CASE {column} {cases} END;'
+    )
+
+
+# The violation workflow trigger from migration 0013, inserting the new status value
+WORKFLOW_TRIGGER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION create_violation_workflow() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO violation_workflows (violation_id, status, escalation_level, resolution_notes)
+    VALUES (NEW.id, {pending}, 0, '')
+    ON CONFLICT (violation_id) DO NOTHING;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_utils', '0013_violation_workflow_insert_trigger'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(to_small_integer_sql(*column), reverse_sql=to_string_sql(*column))
+                for column in CHOICE_COLUMNS
+            ] + [
+                migrations.RunSQL(
+                    WORKFLOW_TRIGGER_FUNCTION_SQL.format(pending=1),
+                    reverse_sql=WORKFLOW_TRIGGER_FUNCTION_SQL.format(pending="'pending'"),
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='compliancealert',
+                    name='alert_type',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Violation'), (2, 'Approaching Limit'), (3, 'Restart Recommended'), (4, 'Team Coordination'), (5, 'Compliance Score')]),
+                ),
+                migrations.AlterField(
+                    model_name='compliancealert',
+                    name='priority',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Low'), (2, 'Medium'), (3, 'High'), (4, 'Critical')], default=2),
+                ),
+                migrations.AlterField(
+                    model_name='hosauditlog',
+                    name='action_type',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Log Entry Created'), (2, 'Log Entry Modified'), (3, 'Log Entry Certified'), (4, 'Violation Detected'), (5, 'Violation Resolved'), (6, 'Restart Initiated'), (7, 'Team Handoff'), (8, 'Rule Modified'), (9, 'Compliance Calculated')]),
+                ),
+                migrations.AlterField(
+                    model_name='hosruleconfiguration',
+                    name='rule_type',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Driving Limit'), (2, 'On Duty Limit'), (3, 'Break Requirement'), (4, 'Cycle Limit'), (5, 'Restart Requirement'), (6, 'Sleeper Berth'), (7, 'Custom Rule')]),
+                ),
+                migrations.AlterField(
+                    model_name='hosruleconfiguration',
+                    name='severity',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Minor'), (2, 'Major'), (3, 'Critical')], default=2),
+                ),
+                migrations.AlterField(
+                    model_name='teamdriving',
+                    name='current_driver',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Driver 1'), (2, 'Driver 2'), (3, 'Relief Driver')], default=1),
+                ),
+                migrations.AlterField(
+                    model_name='violationworkflow',
+                    name='status',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'In Review'), (3, 'Resolved'), (4, 'Disputed'), (5, 'Escalated')], default=1),
+                ),
+            ],
+        ),
+    ]
@@ -2,7 +2,8 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import JSONField
+from django.db.models import JSONField, Q
+from django.contrib.postgres.indexes import GinIndex
 from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext_lazy as _
 
@@ -45,9 +46,12 @@ class Notification(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'is_read', 'created_at']),
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created'),
+            models.Index(fields=['user', '-created_at'], condition=Q(is_read=False), name='notif_unread_user'),
             models.Index(fields=['created_at']),
             models.Index(fields=['notification_type']),
+            GinIndex(fields=['title'], name='notif_title_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['message'], name='notif_message_trgm', opclasses=['gin_trgm_ops']),
         ]
 
     def __str__(self):
@@ -133,6 +137,9 @@ class AuditLog(models.Model):
         verbose_name = 'Audit Log'
         verbose_name_plural = 'Audit Logs'
         ordering = ['-timestamp']
+        indexes = [
+            GinIndex(fields=['description'], name='audit_description_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.get_action_display()} - {self.timestamp}"
@@ -209,6 +216,9 @@ class FileUpload(models.Model):
         verbose_name = 'File Upload'
         verbose_name_plural = 'File Uploads'
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['original_filename'], name='file_filename_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return f"{self.original_filename} ({self.get_file_type_display()})"
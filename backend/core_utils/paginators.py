@@ -0,0 +1,41 @@
+"""
+Paginators for admin changelists over large, append-only tables
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class LargeTablePaginator(Paginator):
+    """
+    Paginator that reads the planner's row estimate from pg_class instead of
+    running COUNT(*) over the whole table.
+
+    The estimate is only used for unfiltered querysets on PostgreSQL; filtered
+    querysets (searches, list filters) and other backends fall back to an exact
+    count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is None or query.where:
+            return super().count
+
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return super().count
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+
+        # reltuples is -1 (or missing) until the table has been analyzed
+        if not row or row[0] <= 0:
+            return super().count
+        return row[0]
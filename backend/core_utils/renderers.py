@@ -0,0 +1,77 @@
+"""
+JSON rendering with orjson for the HOS API
+"""
+
+import orjson
+from asgiref.sync import sync_to_async
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Dates, times and dataclasses go through DRF's encoder so they are written
+# exactly as JSONRenderer writes them; non-string keys become strings as with json
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+# Rows encoded per chunk of a streamed JSON array
+STREAM_CHUNK_ROWS = 500
+
+_encode_default = JSONEncoder().default
+
+
+def dumps(data):
+    """Encode data as compact UTF-8 JSON bytes"""
+    # Escape the JavaScript line separators, as JSONRenderer does
+    return orjson.dumps(data, default=_encode_default, option=ORJSON_OPTIONS).replace(
+        b'\xe2\x80\xa8', b'\\u2028'
+    ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def stream_json_array(rows, to_representation):
+    """
+    Yield a JSON array of to_representation(row) for each row, a chunk of rows at a time
+
+    Only one chunk is held in memory, so rows can come from a queryset iterator.
+    """
+    yield b'['
+    chunk = []
+    separator = b''
+    for row in rows:
+        chunk.append(dumps(to_representation(row)))
+        if len(chunk) == STREAM_CHUNK_ROWS:
+            yield separator + b','.join(chunk)
+            chunk = []
+            separator = b','
+    if chunk:
+        yield separator + b','.join(chunk)
+    yield b']'
+
+
+async def iterate_in_thread(iterator):
+    """
+    Async iterator over a sync iterator, advancing it with sync_to_async
+
+    StreamingHttpResponse buffers a sync iterator in full under ASGI, so
+    streamed responses served by an ASGI server wrap their iterator in this.
+    The iterator advances on the request's thread, where its database cursor
+    was opened.
+    """
+    iterator = iter(iterator)
+    done = object()
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, done)) is not done:
+        yield chunk
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson
+
+    Output matches JSONRenderer's compact, non-ASCII-escaped JSON. Requests for
+    indented output fall back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
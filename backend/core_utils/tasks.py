@@ -5,12 +5,18 @@ Background tasks using Celery
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import DatabaseError, transaction
 from django.contrib.auth import get_user_model
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from datetime import timedelta
+from core_utils.hos_compliance import get_compliance_engine
+import logging
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task
 def send_notification_email(user_id, subject, message):
@@ -171,6 +177,245 @@ def process_trip_route(trip_id):
         return {'success': False, 'error': str(e)}
 
 
+def recent_log_entries(driver_id, window_start):
+    """
+    The driver's log entries starting at or after window_start, as compliance engine dicts
+    
+    Read with a single values_list query over the window on every check. The
+    rows are not cached: a per-process cache is not cleared by deletions made
+    in another process (the web server), and a stale row would be reported as
+    a violation.
+    """
+    from log_sheets.models import LogEntry
+    
+    return [
+        {
+            'start_time': start_time,
+            'end_time': end_time,
+            'duty_status': duty_status,
+            'location': location,
+            'remarks': remarks
+        }
+        for start_time, end_time, duty_status, location, remarks in LogEntry.objects.filter(
+            driver_id=driver_id, start_time__gte=window_start
+        ).order_by('start_time').values_list('start_time', 'end_time', 'duty_status__name', 'location', 'remarks')
+    ]
+
+
+def compliance_alerts(instance, hos_status):
+    """Unsaved ComplianceAlerts for a log entry's driver status"""
+    from core_utils.hos_models import AlertPriority, AlertType, ComplianceAlert
+    
+    # Create alerts for violations
+    alerts = [
+        ComplianceAlert(
+            driver=instance.driver,
+            alert_type=AlertType.VIOLATION,
+            priority=AlertPriority.CRITICAL if violation.severity.value == 'critical' else AlertPriority.HIGH,
+            title=f"HOS Violation: {violation.violation_type}",
+            message=violation.description,
+            action_required=violation.requires_immediate_action,
+            action_description=violation.compliance_impact,
+            related_log_entry=instance
+        )
+        for violation in hos_status.violations
+    ]
+    
+    # Create alerts for approaching limits
+    if hos_status.needs_rest:
+        alerts.append(ComplianceAlert(
+            driver=instance.driver,
+            alert_type=AlertType.APPROACHING_LIMIT,
+            priority=AlertPriority.MEDIUM,
+            title="Approaching HOS Limits",
+            message="You are approaching your HOS limits and may need rest soon.",
+            action_required=False,
+            related_log_entry=instance
+        ))
+    
+    return alerts
+
+
+@shared_task(acks_late=True, autoretry_for=(DatabaseError,), retry_backoff=True, max_retries=5)
+def check_log_entries_compliance(log_entry_ids):
+    """
+    Check HOS compliance after log entries are saved
+    
+    Queued by the LogEntry post_save signal once per transaction, with every
+    entry the transaction saved. Each driver's status is calculated once, and
+    the alerts and the audit rows of all the entries are written with one bulk
+    insert each.
+    """
+    from log_sheets.models import LogEntry
+    from core_utils.hos_models import AuditAction, ComplianceAlert, HOSAuditLog
+    from django.utils import timezone
+    
+    # Entries deleted before the check ran have nothing to report on
+    entries = list(LogEntry.objects.select_related('driver').filter(id__in=log_entry_ids).order_by('id'))
+    if not entries:
+        return f"Log entries {log_entry_ids} not found"
+    
+    try:
+        window_start = timezone.now() - timedelta(days=8)
+        engine = get_compliance_engine()
+        statuses = {}
+        alerts = []
+        audit_logs = []
+        for instance in entries:
+            # Calculate compliance status from the driver's recent log entries
+            hos_status = statuses.get(instance.driver_id)
+            if hos_status is None:
+                hos_status = statuses[instance.driver_id] = engine.calculate_advanced_hos_status(
+                    recent_log_entries(instance.driver_id, window_start)
+                )
+            
+            alerts.extend(compliance_alerts(instance, hos_status))
+            audit_logs.append(HOSAuditLog(
+                driver=instance.driver,
+                action_type=AuditAction.COMPLIANCE_CALCULATED,
+                description=f"Compliance calculated for log entry {instance.id}",
+                details={
+                    'can_drive': hos_status.can_drive,
+                    'can_be_on_duty': hos_status.can_be_on_duty,
+                    'needs_rest': hos_status.needs_rest,
+                    'violations_count': len(hos_status.violations),
+                    'compliance_score': float(hos_status.compliance_analytics.compliance_score) if hos_status.compliance_analytics else 100.0
+                },
+                related_log_entry=instance
+            ))
+        
+        # The alerts and the audit rows of the checks commit together, so the
+        # task is never acknowledged without its audit records
+        with transaction.atomic():
+            if alerts:
+                ComplianceAlert.objects.bulk_create(alerts, batch_size=500)
+            HOSAuditLog.objects.bulk_create(audit_logs, batch_size=1000)
+        
+        return f"Created {len(alerts)} compliance alerts for {len(entries)} log entries"
+        
+    except Exception:
+        logger.exception("Failed to check compliance for log entries %s", log_entry_ids)
+        raise
+
+
+# Tables partitioned by month (see core_utils migration 0010), with their partition column
+MONTHLY_PARTITIONED_TABLES = {'hos_audit_logs': 'timestamp', 'compliance_alerts': 'created_at'}
+
+# Partitions are kept in place this many months ahead of the current one
+PARTITION_MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    """First day of the month count months after the month containing month"""
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def create_month_partition(cursor, table, column, partition, month):
+    """
+    Create table's partition for the month starting at month
+    
+    Postgres refuses to add a partition while the default partition holds rows
+    in its range, so those rows are moved across with the default detached.
+    """
+    bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+    default_partition = f"{table}_default"
+    create_sql = f'CREATE TABLE "{partition}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)'
+    in_range = f'"{column}" >= %s AND "{column}" < %s'
+    
+    with transaction.atomic():
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{default_partition}" WHERE {in_range})', bounds)
+        if not cursor.fetchone()[0]:
+            cursor.execute(create_sql, bounds)
+            return
+        cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default_partition}"')
+        cursor.execute(create_sql, bounds)
+        cursor.execute(f'INSERT INTO "{partition}" SELECT * FROM "{default_partition}" WHERE {in_range}', bounds)
+        cursor.execute(f'DELETE FROM "{default_partition}" WHERE {in_range}', bounds)
+        cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default_partition}" DEFAULT')
+
+
+@shared_task
+def maintain_monthly_partitions():
+    """
+    Create the coming months' partitions of the HOS audit log and compliance alert
+    tables, and detach those older than settings.HOS_PARTITION_RETENTION_MONTHS
+    
+    Rows that went to the default partition for a month without its own partition
+    are moved into it when it is created. Detached partitions are left as ordinary
+    tables to be archived or dropped.
+    """
+    from django.db import connection
+    from django.utils import timezone
+    
+    this_month = timezone.now().date().replace(day=1)
+    retention_months = settings.HOS_PARTITION_RETENTION_MONTHS
+    created = []
+    detached = []
+    
+    with connection.cursor() as cursor:
+        for table, column in MONTHLY_PARTITIONED_TABLES.items():
+            default_partition = f"{table}_default"
+            for offset in range(PARTITION_MONTHS_AHEAD + 1):
+                month = add_months(this_month, offset)
+                partition = f"{table}_{month:%Y_%m}"
+                cursor.execute("SELECT to_regclass(%s)", [partition])
+                if cursor.fetchone()[0] is None:
+                    create_month_partition(cursor, table, column, partition, month)
+                    created.append(partition)
+            
+            if retention_months:
+                # Partition names end in the year and month, so they sort by month
+                oldest_kept = f"{table}_{add_months(this_month, -retention_months):%Y_%m}"
+                cursor.execute(
+                    "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE pg_inherits.inhparent = %s::regclass",
+                    [table]
+                )
+                for (partition,) in cursor.fetchall():
+                    if partition != default_partition and partition < oldest_kept:
+                        cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{partition}"')
+                        detached.append(partition)
+    
+    return f"Created partitions {created}; detached partitions {detached}"
+
+
+@shared_task
+def refresh_compliance_analytics():
+    """
+    Recalculate the current period's compliance analytics for every driver
+    with log entries or violations in it
+    
+    Scheduled overnight, so the analytics endpoint reads stored figures
+    instead of calculating them on the first request of the day.
+    """
+    from log_sheets.models import LogEntry, Violation
+    from core_utils.hos_views import current_analytics_period, generate_compliance_analytics
+    import logging
+    
+    logger = logging.getLogger(__name__)
+    
+    start_date, end_date = current_analytics_period()
+    driver_ids = set(LogEntry.objects.filter(
+        start_time__date__gte=start_date,
+        start_time__date__lte=end_date
+    ).values_list('driver_id', flat=True).distinct())
+    driver_ids.update(Violation.objects.filter(
+        occurred_at__date__gte=start_date,
+        occurred_at__date__lte=end_date
+    ).values_list('driver_id', flat=True).distinct())
+    
+    failed = 0
+    for driver_id in driver_ids:
+        try:
+            generate_compliance_analytics(driver_id, start_date, end_date)
+        except Exception as e:
+            failed += 1
+            logger.error(f"Failed to refresh compliance analytics for driver {driver_id}: {e}")
+    
+    return f"Refreshed compliance analytics for {len(driver_ids) - failed} drivers ({failed} failed)"
+
+
 @shared_task
 def generate_log_sheet(driver_id, start_date, end_date):
     """
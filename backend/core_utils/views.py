@@ -107,7 +107,7 @@ class FileUploadViewSet(viewsets.ModelViewSet):
             is_public = request.data.get("is_public", "false").lower() == "true"
 
             # Use FileManager for secure upload
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             result = file_manager.upload_file(
                 uploaded_file=uploaded_file, file_type=file_type, description=description, is_public=is_public
             )
@@ -124,7 +124,7 @@ class FileUploadViewSet(viewsets.ModelViewSet):
     def download(self, request, pk=None):
         """Download a file with proper security checks"""
         try:
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             return file_manager.download_file(pk, request.user)
         except Http404:
             return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -139,7 +139,7 @@ class FileUploadViewSet(viewsets.ModelViewSet):
     def preview(self, request, pk=None):
         """Preview a file in the browser"""
         try:
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             return file_manager.preview_file(pk, request.user)
         except Http404:
             return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -156,7 +156,7 @@ class FileUploadViewSet(viewsets.ModelViewSet):
     def delete_file(self, request, pk=None):
         """Delete a file with proper security checks"""
         try:
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             result = file_manager.delete_file(pk, request.user)
 
             if result["success"]:
@@ -179,7 +179,7 @@ class FileUploadViewSet(viewsets.ModelViewSet):
             if is_public is not None:
                 is_public_bool = is_public.lower() == "true"
 
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             files = file_manager.list_user_files(user=request.user, file_type=file_type, is_public=is_public_bool)
 
             return Response({"files": files, "total_count": len(files)})
@@ -192,15 +192,15 @@ class FileUploadViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def file_types(self, request):
         """Get available file types and their constraints"""
-        file_manager = FileManager(request.user)
+        file_manager = FileManager(request.user, request)
 
         file_types_info = {}
         for file_type, mime_types in file_manager.ALLOWED_FILE_TYPES.items():
             file_types_info[file_type] = {
-                "allowed_mime_types": mime_types,
+                "allowed_mime_types": sorted(mime_types),
                 "max_size_mb": round(file_manager.MAX_FILE_SIZES[file_type] / (1024 * 1024), 2),
                 "supports_preview": (
-                    any(FileManager()._supports_preview(mime) for mime in mime_types) if mime_types else False
+                    any(file_manager._supports_preview(mime) for mime in mime_types) if mime_types else False
                 ),
             }
 
@@ -209,7 +209,7 @@ class FileUploadViewSet(viewsets.ModelViewSet):
     def destroy(self, request, pk=None):
         """Override destroy to use FileManager"""
         try:
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             result = file_manager.delete_file(pk, request.user)
 
             if result["success"]:
@@ -304,7 +304,7 @@ class FileCleanupView(generics.GenericAPIView):
             if days_old < 1:
                 return Response({"error": "days_old must be at least 1"}, status=status.HTTP_400_BAD_REQUEST)
 
-            file_manager = FileManager(request.user)
+            file_manager = FileManager(request.user, request)
             result = file_manager.cleanup_old_files(days_old)
 
             if result["success"]:
@@ -242,7 +242,7 @@ class PlanRouteView(generics.CreateAPIView):
                 })
             
             # Initialize HOS compliance engine
-            engine = AdvancedHOSComplianceEngine(cycle_type)
+            engine = AdvancedHOSComplianceEngine.get(cycle_type)
             hos_status = engine.calculate_hos_status(log_data)
             
             # Optimize route with HOS compliance
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from decouple import config
 import os
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -71,6 +73,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core_utils.middleware.RateLimitMiddleware',
     'core_utils.middleware.RequestLoggingMiddleware',
+    'core_utils.middleware.AuditLogBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'trucklog_backend.urls'
@@ -306,6 +309,8 @@ LOGGING = {
             'formatter': 'verbose',
         },
     },
+    # CoreUtilsConfig.ready() moves these behind a queue, so formatting and
+    # stream/file I/O happen on a listener thread instead of the ASGI event loop
     'root': {
         'handlers': ['console', 'file'],
         'level': 'INFO',
@@ -331,6 +336,31 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Without a broker (no REDIS_URL) tasks run in the calling process instead of
+# being queued, so deployments without a Celery worker still run the HOS
+# compliance checks, inline in the request as before
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=not os.getenv('REDIS_URL'), cast=bool)
+CELERY_BEAT_SCHEDULE = {
+    'maintain-monthly-partitions': {
+        'task': 'core_utils.tasks.maintain_monthly_partitions',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'refresh-compliance-analytics': {
+        'task': 'core_utils.tasks.refresh_compliance_analytics',
+        'schedule': crontab(hour=2, minute=0),
+    },
+}
+
+# The HOS audit log and compliance alert tables are partitioned by month.
+# Partitions older than this many months are detached by the
+# maintain_monthly_partitions task; 0 keeps every month attached.
+HOS_PARTITION_RETENTION_MONTHS = int(os.getenv('HOS_PARTITION_RETENTION_MONTHS', '0'))
+
+# Numba compile cache for the HOS rule kernels (core_utils/_hos_kernels.py).
+# Numba reads this when it is first imported, so it has to be set here. A
+# writable directory lets every worker reuse the compiled kernels instead of
+# compiling them again, including when the source tree is read-only.
+os.environ.setdefault('NUMBA_CACHE_DIR', os.path.join(BASE_DIR, '.numba_cache'))
 
 # Django Channels Configuration
 ASGI_APPLICATION = 'trucklog_backend.asgi.application'
@@ -340,6 +370,12 @@ CHANNEL_LAYERS = {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
             "hosts": [os.getenv('REDIS_URL', 'redis://localhost:6379/0')],
+            # Room broadcasts fan out to many consumers; a larger per-channel
+            # buffer keeps group_send from backing up under load, and a short
+            # expiry drops messages for sockets that have gone away
+            "capacity": 2000,
+            "expiry": 10,
+            "symmetric_encryption_keys": None,
         },
     },
 }